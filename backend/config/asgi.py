@@ -9,5 +9,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# Serve the content API reads from the async views (see content/async_views.py).
+os.environ.setdefault("API_ASYNC_VIEWS", "True")
 
 application = get_asgi_application()
@@ -43,6 +43,16 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# Metrics: per-route latency, SQL and serializer timings, exported as
+# Server-Timing headers and Prometheus text on /metrics.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "False").lower() == "true"
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+METRICS_SLOW_REQUEST_MS = float(os.getenv("METRICS_SLOW_REQUEST_MS", "0"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, "content.metrics.MetricsMiddleware")
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -73,6 +83,22 @@ DATABASES = {
     )
 }
 
+# Read replicas: comma-separated database URLs. API list/retrieve requests read
+# from them; clients that wrote stay on the primary for REPLICA_STICKY_SECONDS
+# (content/routers.py).
+raw_replica_urls = os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+replica_urls = [url.strip() for url in raw_replica_urls if url.strip()]
+DATABASE_REPLICAS = [f"replica_{index}" for index in range(1, len(replica_urls) + 1)]
+for alias, replica_url in zip(DATABASE_REPLICAS, replica_urls):
+    DATABASES[alias] = dj_database_url.parse(replica_url, conn_max_age=600, ssl_require=False)
+    DATABASES[alias]["TEST"] = {"MIRROR": "default"}
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+REPLICA_HEALTH_CHECK_INTERVAL = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL", "5"))
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+if DATABASE_REPLICAS:
+    DATABASE_ROUTERS = ["content.routers.ReplicaRouter"]
+    MIDDLEWARE.append("content.routers.ReplicaRoutingMiddleware")
+
 db_settings = DATABASES.get("default", {})
 logger.info(
     "Database backend configured: ENGINE=%s NAME=%s HOST=%s USER=%s",
@@ -82,6 +108,83 @@ logger.info(
     db_settings.get("USER"),
 )
 
+# Caches
+# The "api" cache holds rendered responses for the read endpoints. Use "file" or
+# "redis" when running several worker processes so that invalidations made by
+# one process (e.g. an admin edit) are seen by all of them.
+API_CACHE_BACKEND = os.getenv("API_CACHE_BACKEND", "none").lower()
+API_CACHE_ENABLED = API_CACHE_BACKEND != "none"
+API_CACHE_TIMEOUT = int(os.getenv("API_CACHE_TIMEOUT", "600"))
+API_CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "1000"))
+API_CACHE_MAX_ENTRY_BYTES = int(os.getenv("API_CACHE_MAX_ENTRY_BYTES", str(2 * 1024 * 1024)))
+API_CACHE_LOCK_TIMEOUT = int(os.getenv("API_CACHE_LOCK_TIMEOUT", "10"))
+API_CACHE_LOCK_WAIT = float(os.getenv("API_CACHE_LOCK_WAIT", "2"))
+
+api_cache_backends = {
+    "none": ("django.core.cache.backends.dummy.DummyCache", ""),
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "spark-api"),
+    "file": ("django.core.cache.backends.filebased.FileBasedCache", str(BASE_DIR / "cache" / "api")),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://localhost:6379/1"),
+}
+api_cache_engine, api_cache_location = api_cache_backends[API_CACHE_BACKEND]
+api_cache = {
+    "BACKEND": api_cache_engine,
+    "LOCATION": os.getenv("API_CACHE_LOCATION", api_cache_location),
+    "TIMEOUT": API_CACHE_TIMEOUT,
+}
+if API_CACHE_BACKEND in ("locmem", "file"):
+    # Both cap their size at MAX_ENTRIES; locmem evicts the least recently used entries.
+    api_cache["OPTIONS"] = {"MAX_ENTRIES": API_CACHE_MAX_ENTRIES}
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "api": api_cache,
+}
+
+# Book reading: target size of a page served by /api/books/<id>/content/.
+BOOK_PAGE_CHARS = int(os.getenv("BOOK_PAGE_CHARS", "20000"))
+# Decompressed book texts each process keeps for the next page or range, in characters.
+BOOK_TEXT_CACHE_CHARS = int(os.getenv("BOOK_TEXT_CACHE_CHARS", "20000000"))
+
+# Reading speed behind Book.reading_minutes.
+BOOK_READING_WPM = int(os.getenv("BOOK_READING_WPM", "200"))
+
+# Compression of new book text in content_bookbody: "zlib", or "zstd" with the
+# zstandard package installed. Each row records its codec, so this can change.
+BOOK_BODY_CODEC = os.getenv("BOOK_BODY_CODEC", "zlib")
+
+# Image renditions are generated on a background thread pool after uploads.
+IMAGE_RENDITIONS_ASYNC = os.getenv("IMAGE_RENDITIONS_ASYNC", "True").lower() == "true"
+IMAGE_RENDITION_WORKERS = int(os.getenv("IMAGE_RENDITION_WORKERS", "2"))
+
+# Serve GET list/retrieve from the async views in content/async_views.py.
+# config/asgi.py turns this on; under WSGI the DRF viewsets handle everything.
+API_ASYNC_VIEWS = os.getenv("API_ASYNC_VIEWS", "False").lower() == "true"
+
+# Build list responses from .values() rows instead of serializers (content/fastpath.py).
+API_FAST_READS = os.getenv("API_FAST_READS", "False").lower() == "true"
+
+# Newest books included in the /api/bootstrap/ payload.
+BOOTSTRAP_BOOK_COUNT = int(os.getenv("BOOTSTRAP_BOOK_COUNT", "12"))
+
+# Change feeds (content/sync.py): how far before a sync token feeds start
+# reading, to cover transactions that commit after their updated_at; how long
+# delete tombstones are kept; and the most changes per collection before a
+# client is told to refetch the list.
+SYNC_TOKEN_OVERLAP_SECONDS = float(os.getenv("SYNC_TOKEN_OVERLAP_SECONDS", "5"))
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))
+SYNC_MAX_CHANGES = int(os.getenv("SYNC_MAX_CHANGES", "1000"))
+
+# Admin change lists count rows exactly up to this many and use PostgreSQL's
+# estimate beyond it (content/admin.py).
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv("ADMIN_EXACT_COUNT_LIMIT", "10000"))
+
+# Largest number of items accepted by the bulk/ write endpoints.
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "500"))
+
+# Search
+SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "100"))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -102,6 +205,49 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Static JSON snapshots of the public reads (content/snapshots.py): `manage.py publish_snapshots`
+# renders them; with API_SNAPSHOTS_ON_COMMIT every write republishes the snapshots it affects.
+API_SNAPSHOT_ROOT = os.getenv("API_SNAPSHOT_ROOT", str(BASE_DIR / "snapshots"))
+API_SNAPSHOT_BASE_URL = os.getenv("API_SNAPSHOT_BASE_URL", "http://localhost:8000")
+API_SNAPSHOTS_ON_COMMIT = os.getenv("API_SNAPSHOTS_ON_COMMIT", "False").lower() == "true"
+
+# Uploads are stored once per content under blobs/ (content/storage.py) and every other media
+# file gets a content-hashed name, so they can be cached as immutable.
+MEDIA_HASHED_NAMES = os.getenv("MEDIA_HASHED_NAMES", "True").lower() == "true"
+STORAGES = {
+    "default": {
+        "BACKEND": (
+            "content.storage.BlobStorage"
+            if MEDIA_HASHED_NAMES
+            else "django.core.files.storage.FileSystemStorage"
+        ),
+    },
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+# Media serving (content/media.py): "django" sends files itself, "x-accel-redirect"
+# (nginx) and "x-sendfile" (Apache/lighttpd) let the front proxy send them.
+MEDIA_SERVE = os.getenv("MEDIA_SERVE", "True").lower() == "true"
+MEDIA_SERVE_MODE = os.getenv("MEDIA_SERVE_MODE", "django").lower()
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv("MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/")
+MEDIA_MAX_AGE = int(os.getenv("MEDIA_MAX_AGE", "3600"))
+MEDIA_PUBLIC_DIRS = ("books", "partners", "team", "renditions", "blobs")
+# upload_to folders whose files BlobStorage stores as blobs; gc_blobs deletes blobs that no row
+# has referenced or re-uploaded for MEDIA_BLOB_GRACE_HOURS.
+MEDIA_BLOB_DIRS = ("books", "partners", "team")
+MEDIA_BLOB_GRACE_HOURS = int(os.getenv("MEDIA_BLOB_GRACE_HOURS", "24"))
+
+# Uploads (content/uploads.py): refuse files above MEDIA_UPLOAD_MAX_BYTES while they arrive, and
+# stream anything above FILE_UPLOAD_MAX_MEMORY_SIZE to FILE_UPLOAD_TEMP_DIR instead of memory.
+MEDIA_UPLOAD_MAX_BYTES = int(os.getenv("MEDIA_UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+FILE_UPLOAD_HANDLERS = [
+    "content.uploads.UploadLimitHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv("FILE_UPLOAD_MAX_MEMORY_SIZE", str(256 * 1024)))
+FILE_UPLOAD_TEMP_DIR = os.getenv("FILE_UPLOAD_TEMP_DIR") or None
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # REST framework
@@ -109,6 +255,10 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "content.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
 
 # CORS
@@ -118,4 +268,6 @@ if cors_origins:
 else:
     CORS_ALLOW_ALL_ORIGINS = True
 
+CORS_EXPOSE_HEADERS = ["ETag", "Link", "Content-Range", "X-Page", "X-Page-Count", "X-Content-Chars", "X-Content-Window"]
+
 CSRF_TRUSTED_ORIGINS = [origin for origin in cors_origins if origin]
@@ -1,9 +1,14 @@
+import re
+
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework.routers import DefaultRouter
 
+from content import bootstrap as content_bootstrap
+from content import media as content_media
+from content import metrics as content_metrics
+from content import sync as content_sync
 from content import views as content_views
 
 router = DefaultRouter()
@@ -12,10 +17,26 @@ router.register(r"categories", content_views.CategoryViewSet, basename="category
 router.register(r"partners", content_views.PartnerViewSet, basename="partner")
 router.register(r"team-members", content_views.TeamMemberViewSet, basename="team-member")
 
+api_urls = router.urls
+if settings.API_ASYNC_VIEWS:
+    from content import async_views as content_async_views
+
+    api_urls = content_async_views.urlpatterns + api_urls
+
 urlpatterns = [
     path("admin/", admin.site.urls),
-    path("api/", include(router.urls)),
+    path("api/bootstrap/", content_bootstrap.BootstrapView.as_view(), name="bootstrap"),
+    path("api/sync/", content_sync.SyncView.as_view(), name="sync"),
+    path("api/", include(api_urls)),
+    path("metrics", content_metrics.metrics_view, name="metrics"),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Skipped when MEDIA_URL points at another host, such as a CDN.
+if settings.MEDIA_SERVE and settings.MEDIA_URL.startswith("/"):
+    urlpatterns.append(
+        re_path(
+            rf"^{re.escape(settings.MEDIA_URL.lstrip('/'))}(?P<path>.+)$",
+            content_media.serve_media,
+            name="media",
+        )
+    )
@@ -1,7 +1,119 @@
+import json
+
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.files.storage import default_storage
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from django.utils.html import format_html
 
-from .models import Book, Category, Partner, TeamMember
+from .models import Book, BookBody, Category, Partner, TeamMember
+from .search import filter_books
+
+
+def estimated_count(queryset):
+    """Return PostgreSQL's row estimate for ``queryset``, or ``None`` on other databases.
+
+    An unfiltered table uses ``pg_class.reltuples`` (kept up to date by
+    autovacuum/ANALYZE); a filtered one the planner's estimate for the query.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        # -1 means the table has never been analyzed.
+        return int(row[0]) if row and row[0] >= 0 else None
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Count exactly up to ``ADMIN_EXACT_COUNT_LIMIT`` rows, estimate beyond that."""
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is not None and estimate > settings.ADMIN_EXACT_COUNT_LIMIT:
+            return estimate
+        return super().count
+
+
+class AutocompleteListFilter(admin.RelatedFieldListFilter):
+    """Related-object filter that picks the value with an autocomplete box.
+
+    The stock filter lists every related row in the sidebar; this one only
+    renders "All", "(None)" and a select2 search backed by the admin's
+    autocomplete view, so the related admin needs ``search_fields``.
+    """
+
+    template = "admin/content/autocomplete_filter.html"
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        form_field = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+            required=False,
+        )
+        selected = self.lookup_val[-1] if self.lookup_val else None
+        self.rendered_widget = form_field.widget.render(
+            self.lookup_kwarg,
+            selected,
+            attrs={"data-autocomplete-filter": "true", "data-isnull-param": self.lookup_kwarg_isnull},
+        )
+
+    def field_choices(self, field, request, model_admin):
+        return []
+
+    def has_output(self):
+        return True
+
+
+class BookAdminForm(forms.ModelForm):
+    # Book.content is a property backed by the compressed BookBody row.
+    content = forms.CharField(widget=forms.Textarea, required=False, empty_value=None)
+
+    class Meta:
+        model = Book
+        fields = "__all__"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.instance._state.adding:
+            # Edit the text as written, not what the sanitizer kept of it.
+            body = BookBody.objects.filter(book=self.instance).first()
+            self.initial.setdefault("content", body.source_text if body is not None else None)
+
+    def save(self, commit=True):
+        if "content" in self.changed_data:
+            self.instance.content = self.cleaned_data["content"]
+        return super().save(commit)
+
+
+class BookChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        # The change list never shows the text, its page index or its contents.
+        return super().get_queryset(request, exclude_parameters).defer(
+            "content_pages", "table_of_contents", "description"
+        )
+
+
+def image_preview(image, renditions, legacy_url):
+    thumbnail = (renditions or {}).get("webp", {}).get("thumbnail")
+    if image and thumbnail and renditions.get("source") == image.name:
+        return format_html('<img src="{}" style="height: 60px;"/>', default_storage.url(thumbnail["name"]))
+    if image:
+        return format_html('<img src="{}" style="height: 60px;"/>', image.url)
+    if legacy_url:
+        return format_html('<img src="{}" style="height: 60px;"/>', legacy_url)
+    return "—"
 
 
 @admin.register(Category)
@@ -13,20 +125,50 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Book)
 class BookAdmin(admin.ModelAdmin):
+    form = BookAdminForm
+    fields = (
+        "title",
+        "author",
+        "description",
+        "content",
+        "cover_image",
+        "legacy_cover_image_url",
+        "category",
+        "cover_preview",
+        "word_count",
+        "reading_minutes",
+    )
     list_display = ("title", "author", "category", "cover_preview", "created_at", "updated_at")
-    list_filter = ("category", "created_at")
-    search_fields = ("title", "author", "description", "content")
-    raw_id_fields = ("category",)
+    list_filter = (("category", AutocompleteListFilter), "created_at")
+    # Searches go through the full-text index (see get_search_results); the
+    # fields are listed so the admin shows its search box.
+    search_fields = ("title", "author", "description")
+    autocomplete_fields = ("category",)
+    # select_related() without arguments skips nullable foreign keys.
+    list_select_related = ("category",)
     ordering = ("-created_at",)
-    readonly_fields = ("cover_preview",)
+    readonly_fields = ("cover_preview", "word_count", "reading_minutes")
+    paginator = EstimatedCountPaginator
+    # Skips the second COUNT(*) over the whole table when a filter is active.
+    show_full_result_count = False
+
+    @property
+    def media(self):
+        category_widget = AutocompleteSelect(Book._meta.get_field("category"), self.admin_site)
+        return super().media + category_widget.media + forms.Media(js=["content/admin/autocomplete_filter.js"])
+
+    def get_changelist(self, request, **kwargs):
+        return BookChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        return filter_books(queryset, search_term), False
 
     @admin.display(description="Cover")
     def cover_preview(self, obj):
-        if obj.cover_image:
-            return format_html('<img src="{}" style="height: 60px;"/>', obj.cover_image.url)
-        if obj.legacy_cover_image_url:
-            return format_html('<img src="{}" style="height: 60px;"/>', obj.legacy_cover_image_url)
-        return "—"
+        return image_preview(obj.cover_image, obj.cover_image_renditions, obj.legacy_cover_image_url)
 
 
 @admin.register(Partner)
@@ -38,11 +180,7 @@ class PartnerAdmin(admin.ModelAdmin):
 
     @admin.display(description="Logo")
     def logo_preview(self, obj):
-        if obj.logo:
-            return format_html('<img src="{}" style="height: 60px;"/>', obj.logo.url)
-        if obj.legacy_logo_url:
-            return format_html('<img src="{}" style="height: 60px;"/>', obj.legacy_logo_url)
-        return "—"
+        return image_preview(obj.logo, obj.logo_renditions, obj.legacy_logo_url)
 
 
 @admin.register(TeamMember)
@@ -54,8 +192,4 @@ class TeamMemberAdmin(admin.ModelAdmin):
 
     @admin.display(description="Photo")
     def photo_preview(self, obj):
-        if obj.photo:
-            return format_html('<img src="{}" style="height: 60px;"/>', obj.photo.url)
-        if obj.legacy_photo_url:
-            return format_html('<img src="{}" style="height: 60px;"/>', obj.legacy_photo_url)
-        return "—"
+        return image_preview(obj.photo, obj.photo_renditions, obj.legacy_photo_url)
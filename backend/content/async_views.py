@@ -0,0 +1,204 @@
+"""Async list/retrieve views for the content API.
+
+Under ASGI (``config/asgi.py`` turns on ``API_ASYNC_VIEWS``) these views answer
+``GET`` on the collection and detail URLs of the four content endpoints with
+Django's async ORM, instead of running the DRF viewsets in a worker thread.
+They borrow each viewset's queryset, serializers and validators, so the
+response body and headers match the sync path. Lists are streamed: rows come
+from ``aiterator()`` and every batch is serialized in a thread pool, off the
+event loop (as ``.values()`` rows when ``API_FAST_READS`` is on, see
+``fastpath.py``). Everything else (writes, search, keyset pages, ``HEAD``, the
+browsable API, the response cache) is handed to the DRF view unchanged.
+"""
+
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import re_path
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import APIException
+
+from . import metrics
+from .cache import response_cache_enabled
+from .renderers import FastJSONRenderer
+from .views import BookViewSet, CategoryViewSet, PartnerViewSet, TeamMemberViewSet
+
+LIST_ACTIONS = {"get": "list", "post": "create"}
+DETAIL_ACTIONS = {"get": "retrieve", "put": "update", "patch": "partial_update", "delete": "destroy"}
+# Query parameters that only the DRF views implement.
+SYNC_ONLY_PARAMS = ("q", "cursor", "page_size", "format")
+STREAM_BATCH_SIZE = 200
+
+renderer = FastJSONRenderer()
+
+
+def _render_items(serializer_class, instances, context):
+    # Render the batch as a JSON array and drop the brackets so batches can be joined.
+    return renderer.render(serializer_class(instances, many=True, context=context).data)[1:-1]
+
+
+def _render_rows(plan, rows):
+    with metrics.stage("serialize"):
+        data = plan.build(rows)
+    return renderer.render(data)[1:-1]
+
+
+def _render_item(serializer_class, instance, context):
+    return renderer.render(serializer_class(instance, context=context).data)
+
+
+class AsyncReadEndpoint:
+    """Async front for one viewset route that falls back to the DRF view."""
+
+    def __init__(self, viewset, basename, detail):
+        self.viewset = viewset
+        self.basename = basename
+        self.detail = detail
+        actions = DETAIL_ACTIONS if detail else LIST_ACTIONS
+        self.actions = {method: name for method, name in actions.items() if hasattr(viewset, name)}
+        self.sync_view = viewset.as_view(self.actions, basename=basename, detail=detail)
+
+    def as_view(self):
+        @csrf_exempt
+        async def view(request, **kwargs):
+            response = None
+            if self._handles(request):
+                if self.detail:
+                    response = await self.retrieve(request, kwargs["pk"])
+                else:
+                    response = await self.list(request)
+            if response is None:
+                response = await sync_to_async(self.sync_view)(request, **kwargs)
+            return response
+
+        # Read by content.routers to send list/retrieve to a replica.
+        view.actions = self.actions
+        return view
+
+    def _handles(self, request):
+        if request.method != "GET" or response_cache_enabled():
+            return False
+        if any(name in request.GET for name in SYNC_ONLY_PARAMS):
+            return False
+        return "text/html" not in request.headers.get("Accept", "")
+
+    async def _viewset(self, request, action, kwargs):
+        """Set up a viewset instance the way DRF would, without running its handler.
+
+        Returns ``None`` when authentication, permissions or throttling reject
+        the request, so that the DRF view can produce the error response.
+        """
+        view = self.viewset(basename=self.basename, detail=self.detail, action=action, action_map=self.actions)
+        for method, name in self.actions.items():
+            setattr(view, method, getattr(view, name))
+        view.head = view.get
+        view.args, view.kwargs = (), kwargs
+        view.request = view.initialize_request(request)
+        view.headers = view.default_response_headers
+        try:
+            # Authentication may touch the session, which is sync-only.
+            await sync_to_async(view.initial)(view.request)
+        except APIException:
+            return None
+        view.request.accepted_renderer = renderer
+        view.request.accepted_media_type = renderer.media_type
+        return view
+
+    def _finalize(self, view, response, etag, last_modified):
+        view._add_validators(response, etag, last_modified)
+        for name, value in view.headers.items():
+            response[name] = value
+        return response
+
+    async def list(self, request):
+        view = await self._viewset(request, "list", {})
+        if view is None:
+            return None
+        try:
+            queryset = view.filter_queryset(view.get_queryset())
+        except APIException:
+            return None
+        states = [await view._atable_state(queryset)]
+        for model in view.collection_dependencies:
+            states.append(await view._atable_state(model._default_manager.all()))
+        timestamps = [last for _, last in states]
+        timestamps.append(await view._alast_deleted([queryset.model, *view.collection_dependencies]))
+        not_modified, etag, last_modified = view._check_validators(view.request, states, timestamps)
+        if not_modified is not None:
+            return self._finalize(view, not_modified, etag, last_modified)
+        plan = view.get_row_plan()
+        if plan is not None:
+            render = sync_to_async(_render_rows, thread_sensitive=False)
+            stream = self._stream(queryset.values(*plan.columns), lambda rows: render(plan, rows))
+        else:
+            render = sync_to_async(_render_items, thread_sensitive=False)
+            serializer_class, context = view.get_serializer_class(), view.get_serializer_context()
+            stream = self._stream(queryset, lambda instances: render(serializer_class, instances, context))
+        response = StreamingHttpResponse(stream, content_type=renderer.media_type)
+        return self._finalize(view, response, etag, last_modified)
+
+    async def _stream(self, queryset, render):
+        yield b"["
+        separator = b""
+        batch = []
+        async for instance in queryset.aiterator(chunk_size=STREAM_BATCH_SIZE):
+            batch.append(instance)
+            if len(batch) == STREAM_BATCH_SIZE:
+                yield separator + await render(batch)
+                separator, batch = b",", []
+        if batch:
+            yield separator + await render(batch)
+        yield b"]"
+
+    async def retrieve(self, request, pk):
+        try:
+            uuid.UUID(pk)
+        except ValueError:
+            return None
+        view = await self._viewset(request, "retrieve", {"pk": pk})
+        if view is None:
+            return None
+        try:
+            queryset = view.filter_queryset(view.get_queryset()).filter(pk=pk)
+        except APIException:
+            return None
+        row = await queryset.values_list(*view.object_validator_fields).afirst()
+        if row is None:
+            return None
+        not_modified, etag, last_modified = view._check_validators(view.request, row, row)
+        if not_modified is not None:
+            return self._finalize(view, not_modified, etag, last_modified)
+        instance = await queryset.afirst()
+        if instance is None:
+            return None
+        render = sync_to_async(_render_item, thread_sensitive=False)
+        body = await render(view.get_serializer_class(), instance, view.get_serializer_context())
+        response = HttpResponse(body, content_type=renderer.media_type)
+        return self._finalize(view, response, etag, last_modified)
+
+
+ENDPOINTS = (
+    ("books", BookViewSet, "book"),
+    ("categories", CategoryViewSet, "category"),
+    ("partners", PartnerViewSet, "partner"),
+    ("team-members", TeamMemberViewSet, "team-member"),
+)
+
+# Same paths as the DefaultRouter routes; include them ahead of router.urls.
+# Detail routes only match UUIDs so that extra actions such as bulk/ still
+# reach the router.
+urlpatterns = []
+for prefix, viewset, basename in ENDPOINTS:
+    urlpatterns += [
+        re_path(
+            rf"^{prefix}/$",
+            AsyncReadEndpoint(viewset, basename, detail=False).as_view(),
+            name=f"{basename}-list-async",
+        ),
+        re_path(
+            rf"^{prefix}/(?P<pk>[0-9a-fA-F-]{{32,36}})/$",
+            AsyncReadEndpoint(viewset, basename, detail=True).as_view(),
+            name=f"{basename}-detail-async",
+        ),
+    ]
@@ -0,0 +1,84 @@
+"""Reference counts of uploaded blobs: ``Blob.ref_count``.
+
+A blob is referenced by every book cover, partner logo and team photo whose
+field holds its name. Saving or deleting a single row adjusts the blob it
+references now and the one it referenced when it was loaded
+(``content.signals``); bulk writes, which send no signals, call
+:func:`track` with the rows they wrote. Rows whose previous image is
+unknown, such as upserts of rows that were never loaded, only add
+references, so the counts can drift upwards but never below the truth.
+``manage.py gc_blobs`` recounts every blob with :func:`refresh_blobs`
+before it deletes anything.
+"""
+
+from collections import Counter
+
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import Blob, Book, Partner, TeamMember
+from .storage import BLOB_ROOT, blob_digest
+
+UPLOAD_MODELS = (Book, Partner, TeamMember)
+
+
+def upload_name(instance):
+    return getattr(instance, instance.UPLOAD_FIELD).name or ""
+
+
+def track(instances, using=None, deleted=False):
+    """Count the blobs ``instances`` reference now and release those they referenced when loaded."""
+    added = Counter()
+    released = Counter()
+    for instance in instances:
+        name = "" if deleted else upload_name(instance)
+        loaded = instance.__dict__.get("_loaded_upload_name", upload_name(instance) if deleted else "")
+        if name != loaded:
+            added[blob_digest(name)] += 1
+            released[blob_digest(loaded)] += 1
+        instance._loaded_upload_name = name
+    adjust(added, released, using)
+
+
+def adjust(added, released, using=None):
+    """Apply ``{digest: references}`` deltas, one ``UPDATE`` per distinct delta."""
+    deltas = Counter(added)
+    deltas.subtract(released)
+    by_delta = {}
+    for digest, delta in deltas.items():
+        if digest is not None and delta:
+            by_delta.setdefault(delta, []).append(digest)
+    for delta, digests in by_delta.items():
+        # Never below zero, whatever was written behind the counters' back.
+        Blob.objects.using(using).filter(digest__in=digests).update(ref_count=Greatest(F("ref_count") + delta, 0))
+
+
+def count_references(using=None):
+    """``{digest: references}`` of every referenced blob, one grouped query per model."""
+    references = Counter()
+    for model in UPLOAD_MODELS:
+        rows = (
+            model.objects.using(using)
+            .filter(**{f"{model.UPLOAD_FIELD}__startswith": f"{BLOB_ROOT}/"})
+            .order_by()
+            .values_list(model.UPLOAD_FIELD)
+            .annotate(n=Count("pk"))
+        )
+        for name, count in rows:
+            digest = blob_digest(name)
+            if digest is not None:
+                references[digest] += count
+    return references
+
+
+def refresh_blobs(using=None):
+    """Recompute every ``Blob.ref_count`` from the rows; return how many had drifted."""
+    references = count_references(using)
+    drifted = []
+    for blob in Blob.objects.using(using).only("digest", "ref_count").iterator(chunk_size=2000):
+        count = references.get(blob.digest, 0)
+        if blob.ref_count != count:
+            blob.ref_count = count
+            drifted.append(blob)
+    Blob.objects.using(using).bulk_update(drifted, ["ref_count"], batch_size=500)
+    return len(drifted)
@@ -0,0 +1,102 @@
+"""``GET /api/bootstrap/``: everything the landing page needs in one response.
+
+The payload holds the categories (with their stored book counts), the
+``BOOTSTRAP_BOOK_COUNT`` newest book summaries, the partners and the team
+members. It is built with four queries, rendered once and kept gzip-compressed;
+clients that accept gzip get the stored bytes as they are. The stored blob is
+rebuilt when any of the four models changes: with the response cache enabled
+the generation counters tell (no queries at all on a hit), otherwise the same
+``COUNT``/``MAX(updated_at)`` state (and newest tombstone) the list validators use.
+"""
+
+import gzip
+import hashlib
+import re
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.views import APIView
+
+from .cache import get_cache, get_generations, response_cache_enabled
+from .conditional import ConditionalGetMixin
+from .fastpath import MediaUrls, plan_for
+from .models import Book, Category, Partner, TeamMember
+from .renderers import FastJSONRenderer
+from .serializers import BookSummarySerializer, CategorySerializer, PartnerSerializer, TeamMemberSerializer
+
+MODELS = (Book, Category, Partner, TeamMember)
+ACCEPTS_GZIP_RE = re.compile(r"\bgzip\b")
+
+# Per-process copy of the blob, used when the shared response cache is off.
+_local = {}
+_local_lock = threading.Lock()
+
+
+def build_payload(request):
+    """Return the bootstrap payload as a dict, reading each table once."""
+    media_urls = MediaUrls(request)
+    # Serializers without a request: ?fields= must not shape the shared blob.
+    categories = plan_for(CategorySerializer(), media_urls)
+    books = plan_for(BookSummarySerializer(), media_urls)
+    partners = plan_for(PartnerSerializer(), media_urls)
+    team_members = plan_for(TeamMemberSerializer(), media_urls)
+    newest = Book.objects.order_by("-created_at", "-id")[: settings.BOOTSTRAP_BOOK_COUNT]
+    return {
+        "categories": categories.build(Category.objects.order_by("name").values(*categories.columns)),
+        "books": books.build(newest.values(*books.columns)),
+        "partners": partners.build(Partner.objects.order_by("name").values(*partners.columns)),
+        "team_members": team_members.build(TeamMember.objects.order_by("name").values(*team_members.columns)),
+    }
+
+
+def build_blob(request):
+    return gzip.compress(FastJSONRenderer().render(build_payload(request)), compresslevel=6, mtime=0)
+
+
+class BootstrapView(ConditionalGetMixin, APIView):
+    renderer_classes = [FastJSONRenderer]
+
+    def get(self, request):
+        host = request.build_absolute_uri("/")
+        if response_cache_enabled():
+            version = ("generations", *get_generations(MODELS))
+            timestamps = []
+        else:
+            states = [self._table_state(model._default_manager.all()) for model in MODELS]
+            version = ("states", *states)
+            timestamps = [last for _, last in states]
+            timestamps.append(self._last_deleted(MODELS))
+        # The gzip and identity bodies differ byte for byte, so each gets its own strong ETag.
+        encoding = "gzip" if ACCEPTS_GZIP_RE.search(request.headers.get("Accept-Encoding", "")) else "identity"
+        not_modified, etag, last_modified = self._check_validators(request, (host, version, encoding), timestamps)
+        if not_modified is not None:
+            patch_vary_headers(not_modified, ("Accept-Encoding",))
+            return not_modified
+
+        blob = self._blob(request, host, version)
+        if encoding == "gzip":
+            response = HttpResponse(blob, content_type="application/json")
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(gzip.decompress(blob), content_type="application/json")
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return self._add_validators(response, etag, last_modified)
+
+    def _blob(self, request, host, version):
+        key = hashlib.sha1(repr((host, settings.BOOTSTRAP_BOOK_COUNT, version)).encode()).hexdigest()
+        if response_cache_enabled():
+            cache = get_cache()
+            blob = cache.get(f"bootstrap:{key}")
+            if blob is None:
+                blob = build_blob(request)
+                cache.set(f"bootstrap:{key}", blob)
+            return blob
+        with _local_lock:
+            stored_key, blob = _local.get(host, (None, None))
+        if stored_key != key:
+            blob = build_blob(request)
+            with _local_lock:
+                _local[host] = (key, blob)
+        return blob
@@ -0,0 +1,179 @@
+"""Batch create/update endpoints for the writable viewsets."""
+
+import json
+import re
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from . import blobs, images, snapshots
+from .cache import bump_generation
+from .serializers import BulkListSerializer
+
+INDEXED_FILE_RE = re.compile(r"^(?P<field>\w+)\[(?P<index>\d+)\]$")
+
+
+def _item_error(item_status, errors):
+    return {"status": item_status, "errors": errors}
+
+
+class BulkWriteMixin:
+    """Add ``POST``/``PATCH`` ``<collection>/bulk/`` to a ``ModelViewSet``.
+
+    The body is a JSON array of objects, or multipart form data with that
+    array as JSON in ``items`` and files named after their item, such as
+    ``cover_image[3]``. ``PATCH`` items must include their ``id``. Every
+    valid item is written in one transaction with ``bulk_create`` or
+    ``bulk_update``; the response lists each item in request order with its
+    status and either ``data`` or ``errors``.
+    """
+
+    bulk_response_serializer_class = None
+
+    @action(detail=False, methods=["post", "patch"], url_path="bulk")
+    def bulk(self, request):
+        items = self._bulk_items(request)
+        partial = request.method == "PATCH"
+        results = [None] * len(items)
+        instances = {}
+        if partial:
+            instances = self._bulk_instances(items, results)
+
+        serializer = BulkListSerializer(
+            instance=instances if partial else None,
+            child=self.get_serializer_class()(partial=partial),
+            data=items,
+            partial=partial,
+            context=self.get_serializer_context(),
+        )
+        model = self.get_queryset().model
+        written = []
+        for index, (validated, errors) in enumerate(serializer.validate_items()):
+            if results[index] is not None:
+                continue
+            if errors is not None:
+                results[index] = _item_error(status.HTTP_400_BAD_REQUEST, errors)
+                continue
+            if partial:
+                instance = instances[str(items[index]["id"])]
+                for name, value in validated.items():
+                    setattr(instance, name, value)
+                changed = set(validated)
+            else:
+                instance = model(**validated)
+                changed = None
+            self.prepare_bulk_instance(instance, changed)
+            written.append((index, instance, changed))
+
+        if written:
+            self._bulk_write(model, written, partial)
+            response_serializer = (self.bulk_response_serializer_class or self.get_serializer_class())(
+                [instance for _, instance, _ in written], many=True, context=self.get_serializer_context()
+            )
+            item_status = status.HTTP_200_OK if partial else status.HTTP_201_CREATED
+            for (index, _, _), data in zip(written, response_serializer.data):
+                results[index] = {"status": item_status, "data": data}
+
+        if len(written) == len(items):
+            response_status = status.HTTP_200_OK if partial else status.HTTP_201_CREATED
+        elif written:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        body = {"results": [{"index": index, **result} for index, result in enumerate(results)]}
+        return Response(body, status=response_status)
+
+    def prepare_bulk_instance(self, instance, changed):
+        """Hook for derived fields that ``save()`` would normally maintain.
+
+        ``changed`` is the set of updated field names, or ``None`` for new
+        objects. Add any extra field that must be written to ``changed``.
+        """
+
+    def finish_bulk_write(self, written):
+        """Hook run in the write transaction after the bulk query, with ``(instance, changed)`` pairs.
+
+        For data that lives outside the model's own table.
+        """
+
+    def _bulk_items(self, request):
+        data = request.data
+        if not isinstance(data, list):
+            raw = data.get("items") if hasattr(data, "get") else None
+            if isinstance(raw, str):
+                try:
+                    raw = json.loads(raw)
+                except ValueError:
+                    raise ValidationError({"items": ["Must be a JSON array."]})
+            data = raw
+        if not isinstance(data, list) or not data:
+            raise ValidationError({"items": ["Expected a non-empty list of objects."]})
+        if len(data) > settings.BULK_MAX_ITEMS:
+            raise ValidationError({"items": [f"At most {settings.BULK_MAX_ITEMS} items per request."]})
+        for key, upload in request.FILES.items():
+            match = INDEXED_FILE_RE.match(key)
+            if not match:
+                continue
+            index = int(match["index"])
+            if index >= len(data) or not isinstance(data[index], dict):
+                raise ValidationError({key: ["Does not match an item."]})
+            data[index][match["field"]] = upload
+        return data
+
+    def _bulk_instances(self, items, results):
+        """Load the targets of a bulk update in one query, flagging bad ids in ``results``."""
+        ids = {}
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            try:
+                pk = uuid.UUID(str(item["id"]))
+            except KeyError:
+                results[index] = _item_error(status.HTTP_400_BAD_REQUEST, {"id": ["This field is required."]})
+            except ValueError:
+                results[index] = _item_error(status.HTTP_400_BAD_REQUEST, {"id": ["Must be a valid UUID."]})
+            else:
+                if pk in ids.values():
+                    results[index] = _item_error(status.HTTP_400_BAD_REQUEST, {"id": ["Duplicate id in request."]})
+                else:
+                    ids[index] = pk
+        found = self.get_queryset().in_bulk(set(ids.values()))
+        for index, pk in ids.items():
+            if pk not in found:
+                results[index] = _item_error(status.HTTP_404_NOT_FOUND, {"detail": "Not found."})
+            else:
+                # Normalise so that the serializer finds the instance by str(pk).
+                items[index]["id"] = str(pk)
+        return {str(pk): instance for pk, instance in found.items()}
+
+    def _bulk_write(self, model, written, partial):
+        instances = [instance for _, instance, _ in written]
+        with transaction.atomic():
+            if partial:
+                # Items that change the same fields share one bulk_update() call.
+                groups = {}
+                for _, instance, changed in written:
+                    groups.setdefault(frozenset(changed | {"updated_at"}), []).append(instance)
+                for fields, group in groups.items():
+                    concrete = [field for field in model._meta.concrete_fields if field.name in fields]
+                    for instance in group:
+                        # bulk_update() skips pre_save(): stamp updated_at and store new uploads.
+                        for field in concrete:
+                            setattr(instance, field.attname, field.pre_save(instance, add=False))
+                    model.objects.bulk_update(group, [field.name for field in concrete])
+            else:
+                model.objects.bulk_create(instances)
+            self.finish_bulk_write([(instance, changed) for _, instance, changed in written])
+            # Bulk writes send no post_save, so do the signal handlers' work here.
+            transaction.on_commit(lambda: bump_generation(model))
+            snapshots.schedule(model, instances, created=not partial)
+            if model in images.IMAGE_FIELDS:
+                blobs.track(instances)
+                for instance in instances:
+                    if images.needs_renditions(instance):
+                        images.schedule(model, instance.pk)
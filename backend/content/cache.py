@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .routers import primary_reads
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = "api"
+STORED_HEADERS = ("ETag", "Last-Modified", "Cache-Control")
+
+
+def response_cache_enabled():
+    return getattr(settings, "API_CACHE_ENABLED", False)
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+class CacheStats:
+    """Per-process hit/miss counters for the response cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.waits = 0
+            self.skipped = 0
+
+    def record(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "waits": self.waits, "skipped": self.skipped}
+
+
+stats = CacheStats()
+
+
+def generation_key(model):
+    return f"gen:{model._meta.label_lower}"
+
+
+def get_generations(models):
+    """Return the current generation of each model, creating missing counters.
+
+    A counter that was evicted or expired restarts from the current time, so it
+    can never land back on a value that older cache entries were keyed with.
+    """
+    cache = get_cache()
+    keys = [generation_key(model) for model in models]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            value = time.time_ns()
+            if not cache.add(key, value, timeout=None):
+                value = cache.get(key, value)
+            found[key] = value
+    return [found[key] for key in keys]
+
+
+def bump_generation(*models):
+    """Invalidate every cached response that depends on ``models``."""
+    cache = get_cache()
+    for model in models:
+        key = generation_key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+
+class CachedResponseMixin:
+    """Serve rendered list/retrieve responses from the ``api`` cache.
+
+    Entries are keyed by endpoint, full query string, negotiated media type and
+    the generation counters of ``cache_dependencies``; saving or deleting any of
+    those models bumps its counter, which orphans the old entries. On a miss a
+    short-lived lock lets one request rebuild the entry while concurrent misses
+    wait for it instead of all hitting the database.
+
+    Only JSON is cached: the browsable API's HTML carries the CSRF token and
+    user of the request that rendered it.
+    """
+
+    cache_dependencies = ()
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(super().retrieve, request, *args, **kwargs)
+
+    def _cached_response(self, handler, request, *args, **kwargs):
+        renderer = getattr(request, "accepted_renderer", None)
+        if not response_cache_enabled() or not self.cache_dependencies or getattr(renderer, "format", None) != "json":
+            return handler(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = self._response_cache_key(request)
+        entry = cache.get(key)
+        owns_lock = False
+        if entry is None:
+            owns_lock = cache.add(self._lock_key(key), 1, timeout=settings.API_CACHE_LOCK_TIMEOUT)
+            if not owns_lock:
+                entry = self._wait_for_rebuild(cache, key)
+        if entry is not None:
+            stats.record("hits")
+            return self._response_from_entry(request, entry)
+
+        stats.record("misses")
+        # A lagging replica would store stale data under the new generation,
+        # so entries are always rebuilt from the primary.
+        try:
+            with primary_reads():
+                response = handler(request, *args, **kwargs)
+        except BaseException:
+            # A 404 or 400 raised by the view must not keep identical requests waiting on the lock.
+            self._release(cache, key, owns_lock)
+            raise
+        if response.status_code == 200 and hasattr(response, "add_post_render_callback"):
+            response.add_post_render_callback(lambda rendered: self._store(cache, key, rendered, owns_lock))
+        else:
+            self._release(cache, key, owns_lock)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def _response_cache_key(self, request):
+        renderer = getattr(request, "accepted_renderer", None)
+        generations = get_generations(self.cache_dependencies)
+        fingerprint = "|".join(
+            [
+                request.get_full_path(),
+                getattr(renderer, "media_type", ""),
+                ",".join(str(value) for value in generations),
+            ]
+        )
+        digest = hashlib.sha1(fingerprint.encode()).hexdigest()
+        return f"resp:{self.basename}:{self.action}:{digest}"
+
+    @staticmethod
+    def _lock_key(key):
+        return f"{key}:lock"
+
+    def _release(self, cache, key, owns_lock):
+        # A request that gave up waiting must not free the lock of the one still rebuilding.
+        if owns_lock:
+            cache.delete(self._lock_key(key))
+
+    def _wait_for_rebuild(self, cache, key):
+        """Wait for the request holding the lock to store ``key``; ``None`` after ``API_CACHE_LOCK_WAIT``."""
+        stats.record("waits")
+        deadline = time.monotonic() + settings.API_CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry
+        return None
+
+    def _store(self, cache, key, response, owns_lock):
+        try:
+            content = response.content
+            if len(content) > settings.API_CACHE_MAX_ENTRY_BYTES:
+                stats.record("skipped")
+                return
+            entry = {
+                "content": content,
+                "content_type": response["Content-Type"],
+                "headers": {name: response[name] for name in STORED_HEADERS if name in response},
+            }
+            cache.set(key, entry)
+        except Exception:
+            logger.exception("Failed to store cached response for %s", key)
+        finally:
+            self._release(cache, key, owns_lock)
+
+    @staticmethod
+    def _response_from_entry(request, entry):
+        headers = entry["headers"]
+        last_modified = parse_http_date_safe(headers.get("Last-Modified", ""))
+        not_modified = get_conditional_response(request, etag=headers.get("ETag"), last_modified=last_modified)
+        response = not_modified or HttpResponse(entry["content"], content_type=entry["content_type"])
+        for name, value in headers.items():
+            response[name] = value
+        response["X-Cache"] = "HIT"
+        return response
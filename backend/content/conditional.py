@@ -0,0 +1,113 @@
+import hashlib
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, F, Max
+from django.db.models.functions import Coalesce, Greatest
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import Tombstone
+
+
+def last_change(model):
+    """The time a row of ``model`` last changed, from its ``CHANGE_FIELDS``."""
+    first, *others = model.CHANGE_FIELDS
+    if not others:
+        return F(first)
+    # GREATEST() is NULL on SQLite as soon as one argument is.
+    return Greatest(first, *(Coalesce(name, first) for name in others))
+
+
+class ConditionalGetMixin:
+    """Answer repeat reads with ``304 Not Modified`` before serializing anything.
+
+    Collection validators come from ``MAX(updated_at)`` and ``COUNT(*)`` of the
+    filtered queryset (the count moves on deletes), plus the same aggregate for
+    every model in ``collection_dependencies`` whose data is nested in the
+    response. ``Last-Modified`` also takes the newest tombstone of those models
+    into account, since a delete does not raise ``MAX(updated_at)``. Object
+    validators read ``object_validator_fields`` for one row.
+    """
+
+    collection_dependencies = ()
+    object_validator_fields = ("updated_at",)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        states = [self._table_state(queryset)]
+        states.extend(self._table_state(model._default_manager.all()) for model in self.collection_dependencies)
+        timestamps = [last for _, last in states]
+        timestamps.append(self._last_deleted([queryset.model, *self.collection_dependencies]))
+        not_modified, etag, last_modified = self._check_validators(request, states, timestamps)
+        if not_modified is not None:
+            return not_modified
+        response = super().list(request, *args, **kwargs)
+        return self._add_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            row = (
+                queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+                .values_list(*self.object_validator_fields)
+                .first()
+            )
+        except (TypeError, ValueError, DjangoValidationError):
+            row = None
+        if row is None:
+            # Let the regular code path produce the 404.
+            return super().retrieve(request, *args, **kwargs)
+        not_modified, etag, last_modified = self._check_validators(request, row, row)
+        if not_modified is not None:
+            return not_modified
+        response = super().retrieve(request, *args, **kwargs)
+        return self._add_validators(response, etag, last_modified)
+
+    @staticmethod
+    def _table_state(queryset):
+        state = queryset.order_by().aggregate(total=Count("pk"), last=Max(last_change(queryset.model)))
+        return state["total"], state["last"]
+
+    @staticmethod
+    async def _atable_state(queryset):
+        state = await queryset.order_by().aaggregate(total=Count("pk"), last=Max(last_change(queryset.model)))
+        return state["total"], state["last"]
+
+    @staticmethod
+    def _deleted_rows(models):
+        return Tombstone.objects.filter(model__in=[model._meta.label_lower for model in models])
+
+    @classmethod
+    def _last_deleted(cls, models):
+        return cls._deleted_rows(models).aggregate(last=Max("deleted_at"))["last"]
+
+    @classmethod
+    async def _alast_deleted(cls, models):
+        return (await cls._deleted_rows(models).aaggregate(last=Max("deleted_at")))["last"]
+
+    def _check_validators(self, request, state, timestamps):
+        renderer = getattr(request, "accepted_renderer", None)
+        fingerprint = "|".join(
+            [
+                request.get_full_path(),
+                getattr(renderer, "media_type", ""),
+                repr(state),
+            ]
+        )
+        etag = f'"{hashlib.sha1(fingerprint.encode()).hexdigest()}"'
+        known = [value for value in timestamps if value is not None and hasattr(value, "timestamp")]
+        last_modified = int(max(known).timestamp()) if known else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            self._add_validators(response, etag, last_modified)
+        return response, etag, last_modified
+
+    @staticmethod
+    def _add_validators(response, etag, last_modified):
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        return response
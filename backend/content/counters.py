@@ -0,0 +1,57 @@
+"""Per-category book aggregates: ``Category.book_count`` and ``latest_book_at``.
+
+They are stored on the category row so that listing categories never groups
+books. Saving or deleting a single book adjusts its old and new category
+(``content.signals``); bulk writes, which send no signals, call
+:func:`refresh_categories` for the categories they touched, and
+``manage.py rebuild_category_stats`` recomputes every category.
+
+Both set ``stats_updated_at`` rather than ``updated_at``: books embed their
+category without the counters, so a new book must not change the validators of
+every other book in its category. Category validators and change feeds read
+both timestamps, and category responses are cached per ``Book`` generation too.
+"""
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def _latest_book_at():
+    from .models import Book
+
+    newest = Book.objects.filter(category=OuterRef("pk")).order_by("-created_at").values("created_at")[:1]
+    return Subquery(newest)
+
+
+def _book_count():
+    from .models import Book
+
+    counts = Book.objects.filter(category=OuterRef("pk")).order_by().values("category").annotate(n=Count("pk"))
+    return Coalesce(Subquery(counts.values("n"), output_field=IntegerField()), Value(0))
+
+
+def adjust_category(category_id, delta, using=None):
+    """Add ``delta`` books to a category and re-read its newest book through the (category, created_at) index."""
+    from .models import Category
+
+    if category_id is None:
+        return
+    Category.objects.using(using).filter(pk=category_id).update(
+        book_count=F("book_count") + delta, latest_book_at=_latest_book_at(), stats_updated_at=timezone.now()
+    )
+
+
+def refresh_categories(category_ids=None, using=None):
+    """Recompute the aggregates of ``category_ids`` (every category when ``None``) in one query."""
+    from .models import Category
+
+    categories = Category.objects.using(using)
+    if category_ids is not None:
+        category_ids = {pk for pk in category_ids if pk is not None}
+        if not category_ids:
+            return 0
+        categories = categories.filter(pk__in=category_ids)
+    return categories.update(
+        book_count=_book_count(), latest_book_at=_latest_book_at(), stats_updated_at=timezone.now()
+    )
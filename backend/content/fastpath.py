@@ -0,0 +1,248 @@
+"""List reads that skip model instances and serializer fields.
+
+With ``API_FAST_READS`` on, the list endpoints fetch the columns they render
+with ``.values()`` and build the response dicts directly. The plan for a
+request is derived from its serializer (so ``?fields=`` and later field
+changes are picked up): plain model fields reuse the serializer field's own
+conversion, image fields and their ``*_url``/``*_renditions`` companions are
+built from the storage base URL resolved once per request, and nested
+serializers read joined columns. A serializer with a field the plan cannot
+reproduce, such as the search scores, keeps the regular path. The
+``check_fastpath`` command compares the two paths byte for byte.
+"""
+
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.core.files.storage import FileSystemStorage, storages
+from django.db import models
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
+from rest_framework import relations, serializers
+from rest_framework.fields import ISO_8601
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from . import images, metrics
+
+# Serializer fields whose representation of a database value is the value itself.
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.URLField,
+    serializers.EmailField,
+    serializers.SlugField,
+    serializers.BooleanField,
+)
+
+
+class Unsupported(Exception):
+    """The serializer has a field that the fast path cannot reproduce."""
+
+
+class MediaUrls:
+    """``FileField``-style absolute URLs, with the storage and host prefix looked up once."""
+
+    def __init__(self, request, storage=None):
+        self.request = request
+        # The storage itself, not the default_storage proxy, so that its class can be checked.
+        self.storage = storage = storage or storages["default"]
+        self.base_url = None
+        # FileSystemStorage.url() is urljoin(base_url, quoted name); the plain
+        # concatenation below gives the same result for an ASCII path prefix.
+        base_url = storage.base_url if type(storage).url is FileSystemStorage.url else None
+        if base_url and base_url.isascii() and base_url.startswith("/") and not base_url.startswith("//"):
+            self.base_url = base_url
+        self.host = request.build_absolute_uri("/")[:-1] if request is not None else ""
+
+    def __call__(self, name):
+        # Leave "a:b" (urljoin reads a scheme) and dot segments to the slow path.
+        if self.base_url is None or ":" in name or "/." in f"/{name}":
+            return self.absolute(self.storage.url(name))
+        return self.host + self.base_url + filepath_to_uri(name).lstrip("/")
+
+    def absolute(self, url):
+        return self.request.build_absolute_uri(url) if self.request is not None else url
+
+
+class RowPlan:
+    """Columns to read and how to turn each ``.values()`` row into a response dict."""
+
+    def __init__(self, columns, getters):
+        self.columns = columns
+        self.getters = getters
+
+    def build(self, rows):
+        getters = self.getters
+        return [{key: getter(row) for key, getter in getters} for row in rows]
+
+
+def _converted(column, convert):
+    def get(row):
+        value = row[column]
+        return None if value is None else convert(value)
+
+    return get
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601 or not settings.USE_TZ:
+        return field.to_representation
+    zone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+
+    def convert(value):
+        if timezone.is_aware(value):
+            value = value.astimezone(zone)
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+    return convert
+
+
+def _value_getter(field, column):
+    if isinstance(field, IDENTITY_FIELDS) or (isinstance(field, serializers.JSONField) and not field.binary):
+        return itemgetter(column)
+    if isinstance(field, serializers.UUIDField) and field.uuid_format == "hex_verbose":
+        return _converted(column, str)
+    if type(field) is serializers.DateTimeField:
+        return _converted(column, _datetime_converter(field))
+    return _converted(column, field.to_representation)
+
+
+def _image_getter(column, media_urls):
+    def get(row):
+        name = row[column]
+        return media_urls(name) if name else None
+
+    return get
+
+
+def _image_url_getter(column, legacy_column, media_urls):
+    def get(row):
+        if row[column]:
+            return media_urls(row[column])
+        if row[legacy_column]:
+            return media_urls.absolute(row[legacy_column])
+        return None
+
+    return get
+
+
+def _renditions_getter(column, media_urls):
+    def get(row):
+        return images.describe(row[column], media_urls)
+
+    return get
+
+
+def _nested_getter(plan, pk_column):
+    getters = plan.getters
+
+    def get(row):
+        if row[pk_column] is None:
+            return None
+        return {key: getter(row) for key, getter in getters}
+
+    return get
+
+
+def _concrete_field(model, name):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        raise Unsupported(name)
+    if not field.concrete or getattr(field, "many_to_many", False):
+        raise Unsupported(name)
+    return field
+
+
+def plan_for(serializer, media_urls, prefix=""):
+    """Build the ``RowPlan`` for ``serializer`` or raise ``Unsupported``."""
+    model = serializer.Meta.model
+    image, renditions = images.IMAGE_FIELDS.get(model, (None, None))
+    columns = []
+    getters = []
+
+    def column(name):
+        name = prefix + name
+        if name not in columns:
+            columns.append(name)
+        return name
+
+    for key, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        source = field.source
+        if isinstance(field, serializers.SerializerMethodField):
+            if image and key == f"{image}_url":
+                getter = _image_url_getter(column(image), column(f"legacy_{image}_url"), media_urls)
+            elif image and key == f"{image}_renditions":
+                getter = _renditions_getter(column(renditions), media_urls)
+            else:
+                raise Unsupported(key)
+        elif isinstance(field, serializers.BaseSerializer):
+            model_field = _concrete_field(model, source)
+            if not isinstance(model_field, models.ForeignKey) or isinstance(field, serializers.ListSerializer):
+                raise Unsupported(key)
+            nested = plan_for(field, media_urls, prefix=f"{prefix}{source}__")
+            pk_column = column(f"{source}__{model_field.related_model._meta.pk.name}")
+            columns.extend(name for name in nested.columns if name not in columns)
+            getter = _nested_getter(nested, pk_column)
+        elif isinstance(field, relations.PrimaryKeyRelatedField):
+            model_field = _concrete_field(model, source)
+            if field.pk_field is not None or not isinstance(model_field, models.ForeignKey):
+                raise Unsupported(key)
+            # DRF hands out the related primary key object itself.
+            getter = itemgetter(column(model_field.attname))
+        elif isinstance(field, (relations.RelatedField, relations.ManyRelatedField)):
+            raise Unsupported(key)
+        elif isinstance(field, serializers.FileField):
+            _concrete_field(model, source)
+            if not getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL):
+                raise Unsupported(key)
+            getter = _image_getter(column(source), media_urls)
+        else:
+            if source == "*" or "." in source:
+                raise Unsupported(key)
+            model_field = _concrete_field(model, source)
+            if model_field.is_relation:
+                raise Unsupported(key)
+            getter = _value_getter(field, column(source))
+        getters.append((key, getter))
+    return RowPlan(columns, getters)
+
+
+class FastListMixin:
+    """Serve ``list`` through a ``RowPlan`` when ``API_FAST_READS`` is on.
+
+    Sits between the caching/validator mixins and the DRF viewset, so cached
+    entries, ``304`` answers and pagination work as before.
+    """
+
+    def get_row_plan(self):
+        """Return the ``RowPlan`` for this request, or ``None`` to use the serializer."""
+        if not settings.API_FAST_READS:
+            return None
+        try:
+            plan = plan_for(self.get_serializer(), MediaUrls(self.request))
+        except Unsupported:
+            return None
+        # Keyset pages read their cursor position from the rows.
+        for name in getattr(self.paginator, "ordering", ()):
+            name = name.lstrip("-")
+            if name not in plan.columns:
+                plan.columns.append(name)
+        return plan
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_row_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+        rows = self.filter_queryset(self.get_queryset()).values(*plan.columns)
+        page = self.paginate_queryset(rows)
+        with metrics.stage("serialize"):
+            data = plan.build(rows if page is None else page)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
@@ -0,0 +1,79 @@
+"""Small HTTP helpers shared by the streaming endpoints."""
+
+import re
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class UnsatisfiableRange(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """Parse a single-range ``Range: bytes=...`` header.
+
+    Returns ``(start, end)`` with an inclusive ``end``, or ``None`` when the
+    header is absent, malformed or asks for several ranges (the full body is
+    served in that case). Raises ``UnsatisfiableRange`` for ranges that start
+    beyond the end of the resource.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if size == 0:
+        raise UnsatisfiableRange
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise UnsatisfiableRange
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise UnsatisfiableRange
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def if_range_matches(request, etag, last_modified_header):
+    """Return whether a conditional ``If-Range`` still allows a partial response."""
+    value = request.headers.get("If-Range")
+    if not value:
+        return True
+    if value.startswith("W/"):
+        # If-Range requires a strong comparison.
+        return False
+    if value.startswith('"'):
+        return value == etag
+    return value == last_modified_header
+
+
+def iter_text(text, chunk_chars=STREAM_CHUNK_SIZE):
+    for position in range(0, len(text), chunk_chars):
+        yield text[position : position + chunk_chars].encode()
+
+
+def iter_bytes(data, chunk_size=STREAM_CHUNK_SIZE):
+    for position in range(0, len(data), chunk_size):
+        yield data[position : position + chunk_size]
+
+
+def iter_file_range(fileobj, start, length, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield ``length`` bytes of ``fileobj`` from ``start``, then close it."""
+    try:
+        fileobj.seek(start)
+        while length > 0:
+            chunk = fileobj.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        fileobj.close()
@@ -0,0 +1,175 @@
+"""Resized WebP/JPEG renditions of uploaded covers, logos and photos.
+
+Renditions are generated off the request path: saving a model schedules the
+work on a small thread pool once the transaction commits, and the
+``generate_renditions`` command backfills existing media. The result is kept
+in the model's ``*_renditions`` JSON field, keyed by the source file name so a
+new upload invalidates it.
+"""
+
+import io
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import snapshots
+from .cache import bump_generation
+from .models import Book, Partner, TeamMember
+
+logger = logging.getLogger(__name__)
+
+RENDITION_WIDTHS = {"thumbnail": 160, "card": 480, "full": 1200}
+RENDITION_FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+RENDITION_ROOT = "renditions"
+
+# model -> (image field, renditions field)
+IMAGE_FIELDS = {
+    Book: ("cover_image", "cover_image_renditions"),
+    Partner: ("logo", "logo_renditions"),
+    TeamMember: ("photo", "photo_renditions"),
+}
+
+_executor = None
+
+
+def rendition_name(source_name, width, extension):
+    directory, filename = posixpath.split(source_name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(RENDITION_ROOT, directory, f"{stem}-{width}.{extension}")
+
+
+def _encode(image, pil_format, options):
+    if pil_format == "JPEG" and image.mode != "RGB":
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def render(source_name, storage=default_storage):
+    """Write every rendition of ``source_name`` and return the description to store."""
+    with storage.open(source_name, "rb") as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "P") else "RGB")
+
+    data = {"source": source_name, "width": image.width, "height": image.height}
+    for format_name, (pil_format, extension, options) in RENDITION_FORMATS.items():
+        variants = {}
+        written = {}
+        for size_name, width in RENDITION_WIDTHS.items():
+            # Small originals are never upscaled; several sizes may share a file.
+            target = min(width, image.width)
+            name = rendition_name(source_name, target, extension)
+            if name not in written:
+                resized = image.copy()
+                resized.thumbnail((target, target * 20), Image.LANCZOS)
+                if storage.exists(name):
+                    storage.delete(name)
+                # The storage may rename the file, e.g. to add a content hash.
+                written[name] = storage.save(name, ContentFile(_encode(resized, pil_format, options)))
+            variants[size_name] = {"name": written[name], "width": target}
+        data[format_name] = variants
+    return data
+
+
+def rendition_names(data):
+    data = data or {}
+    return {variant["name"] for format_name in RENDITION_FORMATS for variant in data.get(format_name, {}).values()}
+
+
+def generate_for(model, pk, force=False):
+    """Generate renditions for one row; safe to call from a worker thread."""
+    image_field, renditions_field = IMAGE_FIELDS[model]
+    row = model.objects.filter(pk=pk).values(image_field, renditions_field).first()
+    if row is None:
+        return None
+    source_name = row[image_field]
+    current = row[renditions_field] or {}
+    if not source_name:
+        if current:
+            _store(model, pk, image_field, source_name, {}, current)
+        return {}
+    if not force and current.get("source") == source_name:
+        return current
+    data = render(source_name)
+    _store(model, pk, image_field, source_name, data, current)
+    return data
+
+
+def _store(model, pk, image_field, source_name, data, previous):
+    # Only record the result if the image was not replaced in the meantime.
+    updated = model.objects.filter(pk=pk, **{image_field: source_name}).update(
+        **{IMAGE_FIELDS[model][1]: data, "updated_at": timezone.now()}
+    )
+    if updated:
+        stale = rendition_names(previous) - rendition_names(data)
+        if stale and previous.get("source"):
+            # Identical uploads share a hashed source name and so its renditions.
+            renditions_field = IMAGE_FIELDS[model][1]
+            if model.objects.filter(**{f"{renditions_field}__source": previous["source"]}).exclude(pk=pk).exists():
+                stale = set()
+        for name in stale:
+            default_storage.delete(name)
+        # QuerySet.update() skips post_save, so invalidate cached responses and snapshots here.
+        bump_generation(model)
+        snapshots.schedule(model, model.objects.filter(pk=pk))
+
+
+def _run(model, pk):
+    try:
+        generate_for(model, pk)
+    except Exception:
+        logger.exception("Could not generate renditions for %s %s", model._meta.label, pk)
+    finally:
+        close_old_connections()
+
+
+def schedule(model, pk):
+    """Generate renditions after the current transaction commits."""
+    if not settings.IMAGE_RENDITIONS_ASYNC:
+        transaction.on_commit(lambda: _run(model, pk))
+        return
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.IMAGE_RENDITION_WORKERS, thread_name_prefix="renditions")
+    transaction.on_commit(lambda: _executor.submit(_run, model, pk))
+
+
+def needs_renditions(instance):
+    image_field, renditions_field = IMAGE_FIELDS[type(instance)]
+    source = getattr(instance, image_field)
+    current = getattr(instance, renditions_field) or {}
+    if not source:
+        return bool(current)
+    return current.get("source") != source.name
+
+
+def describe(data, url_for):
+    """Shape stored rendition data for the API, ready for ``srcset``."""
+    if not data or not data.get("source"):
+        return None
+    result = {"width": data["width"], "height": data["height"], "srcset": {}}
+    for format_name in RENDITION_FORMATS:
+        variants = data.get(format_name, {})
+        result[format_name] = {size_name: url_for(variant["name"]) for size_name, variant in variants.items()}
+        widths = {}
+        for variant in variants.values():
+            widths[variant["width"]] = url_for(variant["name"])
+        result["srcset"][format_name] = ", ".join(f"{url} {width}w" for width, url in sorted(widths.items()))
+    return result
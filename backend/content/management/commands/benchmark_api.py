@@ -0,0 +1,340 @@
+import http.client
+import json
+import platform
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+# name -> (weight, path template). "{book}" and "{category}" are filled with ids
+# sampled from the API before the run.
+TRAFFIC_MIX = {
+    "books_list": (20, "/api/books/"),
+    "books_page": (10, "/api/books/?page_size=24&fields=id,title,author,cover_image_url,category"),
+    "books_by_category": (8, "/api/books/?category_id={category}&page_size=24"),
+    "book_detail": (20, "/api/books/{book}/"),
+    "book_page": (15, "/api/books/{book}/content/?page={page}"),
+    "search": (5, "/api/books/?q={term}"),
+    "categories": (8, "/api/categories/"),
+    "bootstrap": (8, "/api/bootstrap/"),
+    "partners": (3, "/api/partners/"),
+    "team_members": (3, "/api/team-members/"),
+}
+SEARCH_TERMS = ("river", "garden", "letter", "storm", "winter harbour", "journey", "silence", "lantern")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def latency_summary(latencies):
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+        "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+    }
+
+
+def peak_rss_mb(pid=None):
+    """Peak resident set size of ``pid`` (Linux ``VmHWM``), or of this process."""
+    if pid is not None:
+        try:
+            for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+        except OSError:
+            return None
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+class InProcessTransport:
+    """Call config.wsgi directly from worker threads, like a threaded WSGI server without the network."""
+
+    def __init__(self, host):
+        from config.wsgi import application
+
+        self.application = application
+        self.host = host
+
+    def get(self, path):
+        parts = urlsplit(path)
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": parts.path,
+            "QUERY_STRING": parts.query,
+            "SERVER_NAME": self.host,
+            "SERVER_PORT": "80",
+            "HTTP_HOST": self.host,
+            "HTTP_ACCEPT": "application/json",
+            "HTTP_ACCEPT_ENCODING": "gzip",
+            "wsgi.url_scheme": "http",
+            "wsgi.input": BytesIO(),
+            "wsgi.errors": sys.stderr,
+        }
+        statuses = []
+        body = self.application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        try:
+            content = b"".join(body)
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+        return int(statuses[0].split()[0]), content
+
+    def close(self):
+        pass
+
+
+class HttpTransport:
+    """Keep-alive HTTP/1.1 connections to a running server, one per worker thread."""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise CommandError("--base-url must be an http:// or https:// URL")
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.local = threading.local()
+        self.opened = []
+        self.lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            factory = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            conn = factory(self.netloc, timeout=self.timeout)
+            self.local.conn = conn
+            with self.lock:
+                self.opened.append(conn)
+        return conn
+
+    def get(self, path):
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                headers = {"Accept": "application/json", "Accept-Encoding": "gzip"}
+                conn.request("GET", self.prefix + path, headers=headers)
+                response = conn.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                self.local.conn = None
+                if attempt:
+                    raise
+
+    def close(self):
+        for conn in self.opened:
+            conn.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a weighted mix of API reads with concurrent clients and report throughput, p50/p95/p99 "
+        "latency and peak RSS. Runs in process by default, or against a live server with --base-url."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", help="Benchmark a running server, e.g. http://localhost:8000.")
+        parser.add_argument("--server-pid", type=int, help="Server process to read peak RSS from (Linux).")
+        parser.add_argument("--concurrency", type=int, default=8, help="Clients sending requests at the same time.")
+        parser.add_argument("--requests", type=int, default=1000, help="Measured requests.")
+        parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests sent first.")
+        parser.add_argument("--mix", help="Override weights, e.g. books_list=0,book_page=40.")
+        parser.add_argument("--seed", type=int, default=1, help="Seed for the request sequence.")
+        parser.add_argument("--timeout", type=float, default=60.0)
+        parser.add_argument("--host", default="localhost", help="Host header for in-process requests.")
+        parser.add_argument("--output", help="Write the results as JSON to this file.")
+        parser.add_argument("--compare", help="Earlier --output file to compare against.")
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["requests"] < 1:
+            raise CommandError("--concurrency and --requests must be positive")
+        mix = self.traffic_mix(options["mix"])
+        if options["base_url"]:
+            transport = HttpTransport(options["base_url"], options["timeout"])
+            target = options["base_url"]
+        else:
+            transport = InProcessTransport(options["host"])
+            target = "in-process WSGI"
+
+        try:
+            samples = self.sample_ids(transport)
+            rng = random.Random(options["seed"])
+            names = list(mix)
+            weights = [mix[name][0] for name in names]
+            plan = []
+            for _ in range(options["warmup"] + options["requests"]):
+                name = rng.choices(names, weights)[0]
+                plan.append((name, self.fill(mix[name][1], samples, rng)))
+            warmup, measured = plan[: options["warmup"]], plan[options["warmup"] :]
+
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+                list(executor.map(lambda item: self.timed(transport, *item), warmup))
+                started = time.perf_counter()
+                results = list(executor.map(lambda item: self.timed(transport, *item), measured))
+                elapsed = time.perf_counter() - started
+        finally:
+            transport.close()
+
+        report = self.build_report(options, target, mix, results, elapsed)
+        self.print_report(report)
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(report, indent=2))
+            self.stdout.write(f"Results written to {options['output']}")
+        if options["compare"]:
+            self.print_comparison(json.loads(Path(options["compare"]).read_text()), report)
+
+    @staticmethod
+    def traffic_mix(raw):
+        mix = dict(TRAFFIC_MIX)
+        for item in (raw or "").split(","):
+            if not item.strip():
+                continue
+            name, _, weight = item.partition("=")
+            name = name.strip()
+            if name not in mix:
+                raise CommandError(f"Unknown request kind {name!r}; choose from {', '.join(TRAFFIC_MIX)}")
+            try:
+                mix[name] = (float(weight), mix[name][1])
+            except ValueError:
+                raise CommandError(f"Invalid weight in {item!r}")
+        mix = {name: value for name, value in mix.items() if value[0] > 0}
+        if not mix:
+            raise CommandError("Every weight in --mix is zero")
+        return mix
+
+    @staticmethod
+    def sample_ids(transport):
+        """Pick the books and categories to request, through the API itself."""
+
+        def fetch(path):
+            status, body = transport.get(path)
+            if status != 200:
+                raise CommandError(f"GET {path} answered {status}")
+            return json.loads(body)
+
+        books = fetch("/api/books/?page_size=200&fields=id")["results"]
+        categories = fetch("/api/categories/?fields=id")
+        if not books:
+            raise CommandError("No books to request; run `python manage.py seed_content` first.")
+        return {
+            "book": [book["id"] for book in books],
+            "category": [category["id"] for category in categories] or [None],
+        }
+
+    @staticmethod
+    def fill(template, samples, rng):
+        return template.format(
+            book=rng.choice(samples["book"]),
+            category=rng.choice(samples["category"]) or "",
+            page=rng.randint(1, 5),
+            term=rng.choice(SEARCH_TERMS).replace(" ", "+"),
+        )
+
+    @staticmethod
+    def timed(transport, name, path):
+        start = time.perf_counter()
+        try:
+            status, body = transport.get(path)
+        except (http.client.HTTPException, OSError):
+            status, body = 0, b""
+        return name, time.perf_counter() - start, status, len(body)
+
+    def build_report(self, options, target, mix, results, elapsed):
+        by_kind = defaultdict(list)
+        errors = defaultdict(int)
+        total_bytes = 0
+        for name, duration, status, size in results:
+            # Missing pages past the end of a short book are expected answers, not failures.
+            if status == 0 or status >= 500 or (status >= 400 and not (status == 404 and name == "book_page")):
+                errors[name] += 1
+            by_kind[name].append(duration)
+            total_bytes += size
+        return {
+            "target": target,
+            "commit": self.git_commit(),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "database": connection.vendor if not options["base_url"] else None,
+            "settings": {
+                "API_FAST_READS": settings.API_FAST_READS,
+                "API_CACHE_BACKEND": settings.API_CACHE_BACKEND,
+                "API_ASYNC_VIEWS": settings.API_ASYNC_VIEWS,
+            },
+            "concurrency": options["concurrency"],
+            "mix": {name: weight for name, (weight, _) in mix.items()},
+            "seed": options["seed"],
+            "duration_s": elapsed,
+            "throughput_rps": len(results) / elapsed if elapsed else 0.0,
+            "transfer_mb": total_bytes / 1024**2,
+            "errors": sum(errors.values()),
+            "peak_rss_mb": peak_rss_mb(options["server_pid"]) if options["base_url"] else peak_rss_mb(),
+            "overall": latency_summary([duration for _, duration, _, _ in results]),
+            "endpoints": {
+                name: {**latency_summary(durations), "errors": errors[name]}
+                for name, durations in sorted(by_kind.items())
+            },
+        }
+
+    @staticmethod
+    def git_commit():
+        try:
+            completed = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                timeout=5,
+            )
+        except (OSError, subprocess.SubprocessError):
+            return None
+        return completed.stdout.strip() or None
+
+    def print_report(self, report):
+        rss = report["peak_rss_mb"]
+        self.stdout.write(
+            f"{report['target']} @ {report['commit'] or 'unknown commit'}, concurrency {report['concurrency']}: "
+            f"{report['throughput_rps']:.1f} req/s, {report['errors']} errors, "
+            f"peak RSS {f'{rss:.0f} MB' if rss is not None else 'n/a'}"
+        )
+        self.stdout.write(f"{'endpoint':<18}  {'reqs':>6}  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  errors")
+        rows = list(report["endpoints"].items()) + [("overall", {**report["overall"], "errors": report["errors"]})]
+        for name, row in rows:
+            self.stdout.write(
+                f"{name:<18}  {row['requests']:>6}  {row['p50_ms']:>8.1f}  {row['p95_ms']:>8.1f}  "
+                f"{row['p99_ms']:>8.1f}  {row['errors']}"
+            )
+
+    def print_comparison(self, before, after):
+        def change(old, new):
+            if not old:
+                return "n/a"
+            return f"{(new - old) / old * 100:+.1f}%"
+
+        self.stdout.write(f"Compared with {before.get('commit') or 'earlier run'}:")
+        self.stdout.write(f"  throughput {change(before['throughput_rps'], after['throughput_rps'])}")
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            self.stdout.write(f"  {key[:-3]} {change(before['overall'][key], after['overall'][key])}")
+        if before.get("peak_rss_mb") and after.get("peak_rss_mb"):
+            self.stdout.write(f"  peak RSS {change(before['peak_rss_mb'], after['peak_rss_mb'])}")
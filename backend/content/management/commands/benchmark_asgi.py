@@ -0,0 +1,183 @@
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+MODES = ("wsgi", "asgi")
+
+
+def _summary(concurrency, latencies, elapsed, errors):
+    latencies = sorted(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def run_wsgi(url, concurrency, total):
+    """Call config.wsgi from a pool of threads, like a threaded WSGI server."""
+    from config.wsgi import application
+
+    parts = urlsplit(url)
+
+    def call():
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": parts.path,
+            "QUERY_STRING": parts.query,
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "HTTP_HOST": "localhost",
+            "HTTP_ACCEPT": "application/json",
+            "wsgi.url_scheme": "http",
+            "wsgi.input": BytesIO(),
+            "wsgi.errors": sys.stderr,
+        }
+        statuses = []
+        start = time.perf_counter()
+        body = application(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        try:
+            for _ in body:
+                pass
+        finally:
+            if hasattr(body, "close"):
+                body.close()
+        return time.perf_counter() - start, statuses[0].startswith(("200", "304"))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        results = list(executor.map(lambda _: call(), range(total)))
+        elapsed = time.perf_counter() - start
+    return _summary(concurrency, [duration for duration, _ in results], elapsed, sum(not ok for _, ok in results))
+
+
+def run_asgi(url, concurrency, total):
+    """Drive config.asgi with ``concurrency`` requests in flight on one event loop."""
+    from config.asgi import application
+
+    parts = urlsplit(url)
+
+    async def call():
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": parts.path,
+            "raw_path": parts.path.encode(),
+            "query_string": parts.query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"localhost"), (b"accept", b"application/json")],
+            "client": ("127.0.0.1", 0),
+            "server": ("localhost", 80),
+        }
+        received = asyncio.Event()
+        finished = asyncio.Event()
+        status = []
+
+        async def receive():
+            if not received.is_set():
+                received.set()
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                finished.set()
+
+        start = time.perf_counter()
+        await application(scope, receive, send)
+        return time.perf_counter() - start, status[0] in (200, 304)
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded():
+            async with semaphore:
+                return await call()
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(bounded() for _ in range(total)))
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(main())
+    return _summary(concurrency, [duration for duration, _ in results], elapsed, sum(not ok for _, ok in results))
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync WSGI stack (config/wsgi.py, DRF viewsets) with the ASGI stack "
+        "(config/asgi.py, async views) at increasing concurrency, in process and without a network."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="/api/books/", help="Path (and query string) to request.")
+        parser.add_argument("--concurrency", default="1,8,32,64", help="Comma-separated in-flight request counts.")
+        parser.add_argument("--requests", type=int, default=400, help="Requests per concurrency level.")
+        parser.add_argument("--json", action="store_true", help="Print the raw results as JSON.")
+        parser.add_argument("--worker", choices=MODES, help="Internal: run one mode in this process.")
+
+    def handle(self, *args, **options):
+        levels = [int(value) for value in options["concurrency"].split(",") if value.strip()]
+        if not levels or min(levels) < 1:
+            raise CommandError("--concurrency needs positive integers")
+
+        if options["worker"]:
+            # The URLconf is chosen at import time, so each mode runs in its own process.
+            runner = run_asgi if options["worker"] == "asgi" else run_wsgi
+            # Warm up connections, URL resolving and imports before measuring.
+            runner(options["url"], 1, 5)
+            results = [runner(options["url"], level, options["requests"]) for level in levels]
+            self.stdout.write(json.dumps(results))
+            return
+
+        results = {}
+        for mode in MODES:
+            env = {**os.environ, "API_ASYNC_VIEWS": "True" if mode == "asgi" else "False", "METRICS_ENABLED": "False"}
+            command = [
+                sys.executable,
+                str(Path(settings.BASE_DIR) / "manage.py"),
+                "benchmark_asgi",
+                "--worker",
+                mode,
+                "--url",
+                options["url"],
+                "--concurrency",
+                options["concurrency"],
+                "--requests",
+                str(options["requests"]),
+            ]
+            completed = subprocess.run(command, env=env, capture_output=True, text=True)
+            if completed.returncode:
+                raise CommandError(f"{mode} run failed:\n{completed.stderr}")
+            results[mode] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{options['url']}, {options['requests']} requests per level")
+        self.stdout.write(f"{'concurrency':>11}  {'mode':<4}  {'req/s':>8}  {'p50 ms':>8}  {'p95 ms':>8}  errors")
+        for index, level in enumerate(levels):
+            for mode in MODES:
+                row = results[mode][index]
+                self.stdout.write(
+                    f"{level:>11}  {mode:<4}  {row['rps']:>8.1f}  {row['p50_ms']:>8.1f}  {row['p95_ms']:>8.1f}  {row['errors']}"
+                )
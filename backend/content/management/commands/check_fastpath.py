@@ -0,0 +1,95 @@
+import json
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+from rest_framework.renderers import JSONRenderer
+
+from content.models import Category
+from content.renderers import FastJSONRenderer
+from content.views import BookViewSet, CategoryViewSet, PartnerViewSet, TeamMemberViewSet
+
+ENDPOINTS = (
+    ("/api/categories/", CategoryViewSet, "category", ["", "?fields=id,name", "?fields=updated_at,nope"]),
+    (
+        "/api/books/",
+        BookViewSet,
+        "book",
+        ["", "?fields=id,title,cover_image_url,category", "?fields=category_id,cover_image_renditions", "?page_size=2"],
+    ),
+    ("/api/partners/", PartnerViewSet, "partner", ["", "?fields=id,logo,logo_url", "?page_size=2"]),
+    ("/api/team-members/", TeamMemberViewSet, "team-member", ["", "?fields=name,photo_renditions", "?page_size=2"]),
+)
+
+
+def compare(factory, viewset, basename, url):
+    """Render ``url`` through the serializers and the fast path; return both bodies and whether the fast path ran."""
+    bodies = []
+    for fast, renderer in ((False, JSONRenderer), (True, FastJSONRenderer)):
+        view = viewset.as_view({"get": "list"}, basename=basename, renderer_classes=[renderer])
+        with override_settings(API_FAST_READS=fast):
+            response = view(factory.get(url, HTTP_ACCEPT="application/json"))
+            response.render()
+            if fast:
+                # The view tells whether it built the response from .values() rows.
+                used_fast_path = response.renderer_context["view"].get_row_plan() is not None
+        if response.status_code != 200:
+            raise CommandError(f"{url} answered {response.status_code}: {response.content[:300]!r}")
+        bodies.append(response.content)
+    return bodies[0], bodies[1], used_fast_path
+
+
+def compare_all(factory, pages=3):
+    """Yield ``(url, serializer body, fast path body, used fast path)`` for every query of ``ENDPOINTS``.
+
+    ``?page_size=`` queries follow up to ``pages`` keyset pages, as long as the bodies match.
+    """
+    for path, viewset, basename, queries in ENDPOINTS:
+        queries = list(queries)
+        if basename == "book":
+            category_id = Category.objects.values_list("id", flat=True).first()
+            if category_id:
+                queries.append(f"?category_id={category_id}")
+        for query in queries:
+            url = path + query
+            for _ in range(pages if "page_size" in query else 1):
+                expected, actual, used_fast_path = compare(factory, viewset, basename, url)
+                yield url, expected, actual, used_fast_path
+                if expected != actual:
+                    break
+                next_url = json.loads(actual).get("next") if actual.startswith(b"{") else None
+                if not next_url:
+                    break
+                parts = urlsplit(next_url)
+                url = f"{parts.path}?{parts.query}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every list endpoint through the serializers with DRF's JSONRenderer and through the "
+        "API_FAST_READS path with FastJSONRenderer, and fail unless the bodies are byte-for-byte identical."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="localhost", help="Host the requests are made for (absolute URLs).")
+        parser.add_argument("--pages", type=int, default=3, help="Keyset pages to follow for ?page_size= queries.")
+
+    def handle(self, *args, **options):
+        factory = RequestFactory(SERVER_NAME=options["host"])
+        checked = 0
+        failures = []
+        with override_settings(ALLOWED_HOSTS=[options["host"]], API_CACHE_ENABLED=False):
+            for url, expected, actual, used_fast_path in compare_all(factory, options["pages"]):
+                checked += 1
+                if expected != actual:
+                    failures.append(url)
+                    self.stderr.write(f"MISMATCH {url}")
+                    self.stderr.write(f"  serializer: {expected[:300]!r}")
+                    self.stderr.write(f"  fast path:  {actual[:300]!r}")
+                    continue
+                path_used = "fast path" if used_fast_path else "serializer fallback"
+                self.stdout.write(f"ok {url} ({len(actual)} bytes, {path_used})")
+
+        if failures:
+            raise CommandError(f"{len(failures)} of {checked} responses differ: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS(f"{checked} responses are identical."))
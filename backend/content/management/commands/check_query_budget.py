@@ -0,0 +1,236 @@
+import json
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from content.counters import refresh_categories
+from content.models import Book, BookBody, Category, Partner, TeamMember
+from content.sync import encode_token
+
+# (label, method, path, expected queries). "{book}", "{category}", "{partner}"
+# and "{member}" are replaced with ids of seeded rows, "{since}" with a time
+# after the seeding and "{token}" with the matching sync token; a dict budget depends on
+# the database vendor. List budgets include the validator aggregates
+# (COUNT + MAX(updated_at)) that ConditionalGetMixin runs for the queryset and
+# every collection dependency, plus one for their newest tombstone. Writes run inside the command's transaction, so
+# their atomic blocks show up as a SAVEPOINT/RELEASE pair.
+BUDGETS = [
+    ("categories list", "get", "/api/categories/", 3),
+    ("category detail", "get", "/api/categories/{category}/", 2),
+    ("books list", "get", "/api/books/", 4),
+    ("books list, category filter", "get", "/api/books/?category_id={category}", 4),
+    ("books list, keyset page", "get", "/api/books/?page_size=50", 4),
+    ("books list, sparse fields", "get", "/api/books/?fields=id,title,category", 4),
+    # SQLite checks that the FTS5 table exists before searching.
+    ("books search", "get", "/api/books/?q=budget", {"postgresql": 5, "sqlite": 6}),
+    ("book detail", "get", "/api/books/{book}/", 2),
+    ("book content page", "get", "/api/books/{book}/content/?page=1", 2),
+    ("partners list", "get", "/api/partners/", 3),
+    ("partners list, keyset page", "get", "/api/partners/?page_size=50", 3),
+    ("partner detail", "get", "/api/partners/{partner}/", 2),
+    ("team members list", "get", "/api/team-members/", 3),
+    ("team member detail", "get", "/api/team-members/{member}/", 2),
+    ("bootstrap", "get", "/api/bootstrap/", 9),
+    ("books list, changed since", "get", "/api/books/?updated_since={since}", 4),
+    # MAX(updated_at) per table and of the tombstones, then the changes themselves.
+    ("sync, nothing changed", "get", "/api/sync/?updated_since={token}", 10),
+    # Adding a book to a category also updates the category's counters.
+    ("book create", "post", "/api/books/", 3),
+    ("book update", "patch", "/api/books/{book}/", 2),
+    # The text goes to content_bookbody and, from there, to the search index.
+    ("book text update", "patch", "/api/books/{book}/", {"postgresql": 6, "sqlite": 7}),
+    ("books bulk create", "post", "/api/books/bulk/", 5),
+    ("partners bulk update", "patch", "/api/partners/bulk/", 4),
+]
+
+# (label, queryset factory, index the plan must use). Neither may need a sort step.
+PLANS = [
+    (
+        "books by category, newest first",
+        lambda ids: Book.objects.filter(category_id=ids["category"]).order_by("-created_at", "-id")[:50],
+        "book_category_created_idx",
+    ),
+    ("books, newest first", lambda ids: Book.objects.order_by("-created_at", "-id")[:50], "book_created_at_id_idx"),
+    (
+        "books changed since",
+        lambda ids: Book.objects.filter(updated_at__gt=ids["since"]).order_by("updated_at", "id")[:50],
+        "book_updated_at_id_idx",
+    ),
+]
+SORT_MARKERS = ("USE TEMP B-TREE FOR ORDER BY", "Sort Key")
+
+
+def seed(books=2000, categories=20, partners=200, team_members=200):
+    """Create the rows the budgets and plans are checked against and return the ids to format ``BUDGETS`` with."""
+    now = timezone.now()
+    created = Category.objects.bulk_create(
+        Category(name=f"Budget category {uuid.uuid4().hex[:12]}") for _ in range(max(categories, 1))
+    )
+    rows = [
+        Book(
+            title=f"Budget book {index}",
+            author="Query Budget",
+            description="Seeded by check_query_budget",
+            content="budget " * 50,
+            category=created[index % len(created)] if index % 7 else None,
+            created_at=now - timedelta(seconds=index),
+        )
+        for index in range(books)
+    ]
+    for book in rows:
+        book.derive_text_fields()
+    Book.objects.bulk_create(rows, batch_size=500)
+    BookBody.objects.store(rows)
+    refresh_categories([category.pk for category in created])
+    Partner.objects.bulk_create((Partner(name=f"Budget partner {index}") for index in range(partners)), batch_size=500)
+    TeamMember.objects.bulk_create(
+        (TeamMember(name=f"Budget member {index}", role="Tester") for index in range(team_members)),
+        batch_size=500,
+    )
+    # Refresh planner statistics so that EXPLAIN reflects the seeded sizes.
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    since = timezone.now()
+    return {
+        "since": since.isoformat().replace("+00:00", "Z"),
+        "token": encode_token(since),
+        "category": created[0].pk,
+        "book": Book.objects.filter(category=created[0]).values_list("pk", flat=True).first(),
+        "partner": Partner.objects.values_list("pk", flat=True).first(),
+        "member": TeamMember.objects.values_list("pk", flat=True).first(),
+    }
+
+
+def vendor_budget(budget):
+    """The budget for the current database, or ``None`` if there is none for it."""
+    if isinstance(budget, dict):
+        return budget.get(connection.vendor)
+    return budget
+
+
+def send(client, method, url, body):
+    if method == "get":
+        return client.get(url, HTTP_ACCEPT="application/json")
+    return getattr(client, method)(url, json.dumps(body), content_type="application/json")
+
+
+def request_body(label, ids):
+    if label == "book create":
+        return {"title": "Budget create", "author": "Query Budget", "category_id": str(ids["category"])}
+    if label == "book update":
+        return {"description": "Updated by check_query_budget"}
+    if label == "book text update":
+        return {"content": "<h2>Budget</h2><p>" + "updated " * 500 + "</p>"}
+    if label == "books bulk create":
+        return [
+            {"title": f"Budget bulk {index}", "author": "Query Budget", "category_id": str(ids["category"])}
+            for index in range(min(settings.BULK_MAX_ITEMS, 50))
+        ]
+    if label == "partners bulk update":
+        partners = Partner.objects.values_list("pk", flat=True)[: min(settings.BULK_MAX_ITEMS, 50)]
+        return [{"id": str(pk), "website_url": "https://example.com/"} for pk in partners]
+    return None
+
+
+def explain_plans(ids):
+    """Return ``(label, index, plan, problems)`` for every entry of ``PLANS``."""
+    results = []
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            # Make a sequential scan look as bad as it is on a production-sized table.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        for label, build, index in PLANS:
+            plan = build(ids).explain()
+            problems = []
+            if index not in plan:
+                problems.append(f"does not use {index}")
+            if any(marker in plan for marker in SORT_MARKERS):
+                problems.append("sorts instead of reading the index in order")
+            results.append((label, index, plan, problems))
+    return results
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large data set inside a transaction that is rolled back, request every API endpoint and "
+        "fail if any of them runs more SQL queries than its budget, or if the book list queries stop using "
+        "their indexes. content/tests/test_query_budget.py runs the same checks under the test runner."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=2000, help="Books to seed (spread over the categories).")
+        parser.add_argument("--categories", type=int, default=20)
+        parser.add_argument("--partners", type=int, default=200)
+        parser.add_argument("--team-members", type=int, default=200)
+        parser.add_argument("--host", default="localhost", help="Host the requests are made for.")
+        parser.add_argument("--verbose-sql", action="store_true", help="Print the queries of over-budget requests.")
+
+    def handle(self, *args, **options):
+        self.failures = []
+        overrides = {
+            "ALLOWED_HOSTS": [options["host"]],
+            "API_CACHE_ENABLED": False,
+            "IMAGE_RENDITIONS_ASYNC": False,
+            # The second variant would read the book text from the first one's cache.
+            "BOOK_TEXT_CACHE_CHARS": 0,
+        }
+        try:
+            with override_settings(**overrides), transaction.atomic():
+                ids = seed(
+                    books=options["books"],
+                    categories=options["categories"],
+                    partners=options["partners"],
+                    team_members=options["team_members"],
+                )
+                self.check_plans(ids)
+                client = Client(SERVER_NAME=options["host"])
+                for fast in (False, True):
+                    with override_settings(API_FAST_READS=fast):
+                        self.check_budgets(client, ids, options, "fast path" if fast else "serializers")
+                raise Rollback
+        except Rollback:
+            pass
+
+        if self.failures:
+            raise CommandError(f"{len(self.failures)} check(s) failed:\n  " + "\n  ".join(self.failures))
+        self.stdout.write(self.style.SUCCESS("Every endpoint is within its query budget."))
+
+    def check_plans(self, ids):
+        for label, index, plan, problems in explain_plans(ids):
+            if problems:
+                self.failures.append(f"plan for {label}: {', '.join(problems)}\n{plan}")
+            else:
+                self.stdout.write(f"ok plan: {label} uses {index}")
+
+    def check_budgets(self, client, ids, options, variant):
+        for label, method, path, budget in BUDGETS:
+            budget = vendor_budget(budget)
+            if budget is None:
+                self.stdout.write(f"skipped {label}: no budget for {connection.vendor}")
+                continue
+            url = path.format(**ids)
+            body = request_body(label, ids)
+            with CaptureQueriesContext(connection) as queries:
+                response = send(client, method, url, body)
+            used = len(queries)
+            if response.status_code >= 400:
+                self.failures.append(f"{label} ({variant}): {url} answered {response.status_code}")
+                continue
+            if used != budget:
+                self.failures.append(f"{label} ({variant}): {used} queries, budget {budget}")
+                if options["verbose_sql"]:
+                    for query in queries.captured_queries:
+                        self.stderr.write(f"    {query['sql'][:200]}")
+                continue
+            self.stdout.write(f"ok {label} ({variant}): {used} queries")
@@ -0,0 +1,108 @@
+import time
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+from django.db.models import Max
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from content import routers
+from content.models import Book, Category, Partner, TeamMember
+
+MODELS = (Category, Book, Partner, TeamMember)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the health and lag of every DATABASE_REPLICA_URLS database and check the request routing: "
+        "API reads go to a replica, a client that wrote reads from the primary, and an unavailable replica "
+        "is skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="localhost", help="Host the requests are made for.")
+        parser.add_argument("--skip-routing", action="store_true", help="Only report health and lag.")
+
+    def handle(self, *args, **options):
+        aliases = routers.replica_aliases()
+        if not aliases:
+            raise CommandError("No replicas configured; set DATABASE_REPLICA_URLS.")
+        self.failures = []
+        for alias in aliases:
+            self.report(alias)
+        if not options["skip_routing"]:
+            self.check_routing(aliases, options["host"])
+        if self.failures:
+            raise CommandError(f"{len(self.failures)} check(s) failed:\n  " + "\n  ".join(self.failures))
+        self.stdout.write(self.style.SUCCESS("Replica routing works."))
+
+    def report(self, alias):
+        started = time.perf_counter()
+        if not routers.is_healthy(alias):
+            self.failures.append(f"{alias}: unavailable")
+            return
+        latency = (time.perf_counter() - started) * 1000
+        self.stdout.write(f"{alias}: healthy ({latency:.1f} ms to check)")
+        for model in MODELS:
+            try:
+                primary = model.objects.using(DEFAULT_DB_ALIAS).aggregate(last=Max("updated_at"))["last"]
+                replica = model.objects.using(alias).aggregate(last=Max("updated_at"))["last"]
+                counts = [model.objects.using(db).count() for db in (DEFAULT_DB_ALIAS, alias)]
+            except DatabaseError as exc:
+                self.failures.append(f"{alias}: cannot read {model._meta.db_table}: {exc}")
+                continue
+            lag = (primary - replica).total_seconds() if primary and replica else 0.0
+            self.stdout.write(
+                f"  {model._meta.db_table}: {counts[1]} rows (primary {counts[0]}), newest change {lag:.1f}s behind"
+            )
+
+    def check_routing(self, aliases, host):
+        client = Client(SERVER_NAME=host)
+        with override_settings(ALLOWED_HOSTS=[host], API_CACHE_ENABLED=False):
+            used = self.databases_used(client, "get", "/api/categories/")
+            self.expect("list without a recent write", used, set(aliases))
+
+            try:
+                with transaction.atomic():
+                    response = client.post("/api/partners/", {"name": "Replica check"}, content_type="application/json")
+                    if response.status_code != 201:
+                        self.failures.append(f"write answered {response.status_code}")
+                    raise Rollback
+            except Rollback:
+                pass
+            if routers.STICKY_COOKIE not in client.cookies:
+                self.failures.append("a write did not set the sticky cookie")
+            used = self.databases_used(client, "get", "/api/categories/")
+            self.expect("list right after a write", used, {DEFAULT_DB_ALIAS})
+
+            client.cookies.pop(routers.STICKY_COOKIE, None)
+            down_until = dict(routers._down_until)
+            try:
+                for alias in aliases:
+                    routers.mark_down(alias, "check_replicas")
+                used = self.databases_used(client, "get", "/api/categories/")
+                self.expect("list with every replica down", used, {DEFAULT_DB_ALIAS})
+            finally:
+                routers._down_until.clear()
+                routers._down_until.update(down_until)
+
+    def databases_used(self, client, method, path):
+        # Capturing opens a connection, which an unavailable replica cannot do.
+        databases = [DEFAULT_DB_ALIAS, *filter(routers.is_healthy, routers.replica_aliases())]
+        with ExitStack() as stack:
+            captured = {alias: stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in databases}
+            response = getattr(client, method)(path, HTTP_ACCEPT="application/json")
+        if response.status_code != 200:
+            self.failures.append(f"{method.upper()} {path} answered {response.status_code}")
+        return {alias for alias, queries in captured.items() if len(queries)}
+
+    def expect(self, label, used, allowed):
+        if not used or not used <= allowed:
+            self.failures.append(f"{label}: read from {sorted(used)}, expected {sorted(allowed)}")
+        else:
+            self.stdout.write(f"ok {label}: read from {', '.join(sorted(used))}")
@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from content.cache import bump_generation
+from content.models import Book, BookBody
+from content.text import decompress_text, derive_text
+
+
+def _derive(job):
+    # Runs in a worker process: no database access, only the text pipeline.
+    pk, codec, data, page_chars, words_per_minute = job
+    return pk, derive_text(decompress_text(data, codec), page_chars, words_per_minute)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the book text pipeline (sanitized HTML, plain text, word count, reading time, table of contents, "
+        "content hash) over stored books, in parallel batches. By default only books never processed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Process every book with text.")
+        parser.add_argument("--batch-size", type=int, default=50, help="Books read and written per transaction.")
+        parser.add_argument(
+            "--workers", type=int, default=os.cpu_count() or 1, help="Worker processes; 1 runs inline."
+        )
+
+    def handle(self, *args, **options):
+        bodies = BookBody.objects.order_by("book_id")
+        if not options["force"]:
+            bodies = bodies.filter(book__content_hash="")
+        total = bodies.count()
+        self.stdout.write(f"{total} books to process")
+        started = time.monotonic()
+        done = 0
+        workers = max(options["workers"], 1)
+        if workers == 1:
+            for jobs in self.batches(bodies, options["batch_size"]):
+                done += self.write([_derive(job) for job in jobs])
+                self.report(done, total, started)
+        else:
+            # Workers are forked and must not inherit open database connections.
+            connections.close_all()
+            context = multiprocessing.get_context("fork")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                pending = []
+                for jobs in self.batches(bodies, options["batch_size"]):
+                    # Derive the next batch while this one is written.
+                    futures = [executor.submit(_derive, job) for job in jobs]
+                    if pending:
+                        done += self.write([future.result() for future in pending])
+                        self.report(done, total, started)
+                    pending = futures
+                if pending:
+                    done += self.write([future.result() for future in pending])
+                    self.report(done, total, started)
+        self.stdout.write(self.style.SUCCESS(f"Processed {done} books in {time.monotonic() - started:.1f}s."))
+
+    @staticmethod
+    def batches(bodies, size):
+        """Yield jobs for ``size`` books at a time, paging by primary key."""
+        last = None
+        while True:
+            page = bodies if last is None else bodies.filter(book_id__gt=last)
+            # Derive from the text as written, so that sanitizer fixes apply to text stored before them.
+            rows = list(page.values_list("book_id", "codec", Coalesce("source_data", "data"))[:size])
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [
+                (pk, codec, bytes(data), settings.BOOK_PAGE_CHARS, settings.BOOK_READING_WPM)
+                for pk, codec, data in rows
+            ]
+
+    @staticmethod
+    def write(results):
+        now = timezone.now()
+        books = []
+        for pk, derived in results:
+            book = Book(pk=pk, updated_at=now)
+            book.apply_derived_text(derived)
+            books.append(book)
+        with transaction.atomic():
+            # The representation gains the derived fields, so the change feeds must see it.
+            Book.objects.bulk_update(books, [*Book.TEXT_FIELDS, "updated_at"])
+            BookBody.objects.store(books)
+            transaction.on_commit(lambda: bump_generation(Book))
+        return len(books)
+
+    def report(self, done, total, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(f"Progress: {done}/{total} books ({done / elapsed:.1f} books/s)")
@@ -0,0 +1,148 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import storages
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from content.blobs import UPLOAD_MODELS, refresh_blobs
+from content.cache import bump_generation
+from content.images import RENDITION_ROOT
+from content.models import Blob
+from content.storage import BLOB_ROOT, INCOMING_DIR, BlobStorage, blob_digest
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the references to every uploaded blob, then delete the blobs (and their renditions) that no "
+        "book, partner or team member references and nobody uploaded again for MEDIA_BLOB_GRACE_HOURS, along "
+        "with stray files under blobs/. Run it daily, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace-hours",
+            type=int,
+            default=None,
+            help="Keep unreferenced blobs this many hours; at least MEDIA_BLOB_GRACE_HOURS.",
+        )
+        parser.add_argument(
+            "--adopt-existing",
+            action="store_true",
+            help="First move uploads saved before blob storage into blobs, so that duplicates are stored once.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be changed.")
+
+    def handle(self, *args, **options):
+        storage = storages["default"]
+        if not isinstance(storage, BlobStorage):
+            self.stdout.write("The default storage does not store blobs; nothing to do.")
+            return
+        hours = options["grace_hours"] if options["grace_hours"] is not None else settings.MEDIA_BLOB_GRACE_HOURS
+        # Uploads become references only when their row commits; don't delete them in between.
+        hours = max(hours, settings.MEDIA_BLOB_GRACE_HOURS)
+        cutoff = timezone.now() - timedelta(hours=hours)
+        dry_run = options["dry_run"]
+
+        if options["adopt_existing"]:
+            self.adopt_existing(storage, dry_run)
+        with transaction.atomic():
+            drifted = refresh_blobs()
+            orphans = list(
+                Blob.objects.filter(ref_count=0, last_saved_at__lt=cutoff).values_list("digest", "name", "size")
+            )
+            if dry_run:
+                transaction.set_rollback(True)
+        self.stdout.write(f"Recounted blob references; {drifted} counts had drifted.")
+
+        deleted = freed = 0
+        for digest, name, size in orphans:
+            # Re-check in the DELETE itself: the blob may have been referenced or uploaded since.
+            if dry_run or Blob.objects.filter(digest=digest, ref_count=0, last_saved_at__lt=cutoff).delete()[0]:
+                if not dry_run:
+                    self.delete_files(storage, name)
+                deleted += 1
+                freed += size
+
+        stray = self.delete_stray_files(storage, cutoff.timestamp(), dry_run)
+        verb = "Would delete" if dry_run else "Deleted"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {deleted} unreferenced blobs ({freed / 1024**2:.1f} MB) and {stray} stray files "
+                f"older than {hours} hours."
+            )
+        )
+
+    def adopt_existing(self, storage, dry_run):
+        """Store the files under MEDIA_BLOB_DIRS that rows reference as blobs and repoint the rows at them."""
+        files = rows = 0
+        for model in UPLOAD_MODELS:
+            field = model.UPLOAD_FIELD
+            names = (
+                model.objects.filter(**{f"{field}__gt": ""})
+                .exclude(**{f"{field}__startswith": f"{BLOB_ROOT}/"})
+                .order_by()
+                .values_list(field, flat=True)
+                .distinct()
+            )
+            adopted = 0
+            for name in list(names):
+                if name.split("/")[0] not in settings.MEDIA_BLOB_DIRS or not storage.exists(name):
+                    continue
+                files += 1
+                if dry_run:
+                    continue
+                with storage.open(name, "rb") as source:
+                    blob = storage.save(name, source)
+                # Renditions follow on the next generate_renditions run.
+                updated = model.objects.filter(**{field: name})
+                adopted += updated.update(**{field: blob, "updated_at": timezone.now()})
+                storage.delete(name)
+            if adopted:
+                rows += adopted
+                bump_generation(model)
+        verb = "Would move" if dry_run else "Moved"
+        self.stdout.write(f"{verb} {files} existing uploads into blobs ({rows} rows updated).")
+        if rows:
+            self.stdout.write("Run `python manage.py generate_renditions` to rebuild their renditions.")
+
+    @staticmethod
+    def delete_files(storage, name):
+        """Delete a blob and the renditions generated from it."""
+        storage.delete(name)
+        directory, filename = os.path.split(storage.path(os.path.join(RENDITION_ROOT, name)))
+        stem = os.path.splitext(filename)[0]
+        if os.path.isdir(directory):
+            for entry in os.scandir(directory):
+                if entry.name.startswith(f"{stem}-"):
+                    os.remove(entry.path)
+
+    @staticmethod
+    def delete_stray_files(storage, cutoff, dry_run):
+        """Delete old files under blobs/ without a Blob row, e.g. left by rolled back or interrupted uploads."""
+        root = storage.path(BLOB_ROOT)
+        incoming = storage.path(INCOMING_DIR)
+        candidates = []
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                if os.stat(path).st_mtime < cutoff:
+                    candidates.append(path)
+        known = set()
+        named = {}
+        for path in candidates:
+            if os.path.dirname(path) != incoming:
+                named[path] = blob_digest(os.path.relpath(path, storage.location).replace(os.sep, "/"))
+        digests = [digest for digest in named.values() if digest is not None]
+        for start in range(0, len(digests), 500):
+            known.update(Blob.objects.filter(digest__in=digests[start : start + 500]).values_list("digest", flat=True))
+        stray = [path for path in candidates if named.get(path) not in known]
+        if not dry_run:
+            for path in stray:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        return len(stray)
@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from content import images
+from content.models import Book, Partner, TeamMember
+
+MODELS = {"books": Book, "partners": Partner, "team": TeamMember}
+
+
+def _generate(model, pk, force):
+    try:
+        return images.generate_for(model, pk, force=force)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/JPEG renditions for existing covers, logos and photos."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", choices=sorted(MODELS), action="append", help="Limit to these models.")
+        parser.add_argument("--force", action="store_true", help="Regenerate renditions that are up to date.")
+        parser.add_argument("--workers", type=int, default=4, help="Number of images processed in parallel.")
+
+    def handle(self, *args, **options):
+        selected = options["model"] or sorted(MODELS)
+        for key in selected:
+            model = MODELS[key]
+            image_field, _ = images.IMAGE_FIELDS[model]
+            pks = list(
+                model.objects.exclude(**{f"{image_field}__isnull": True})
+                .exclude(**{image_field: ""})
+                .values_list("pk", flat=True)
+            )
+            done = failed = 0
+            with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+                futures = {executor.submit(_generate, model, pk, options["force"]): pk for pk in pks}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                        done += 1
+                    except Exception as exc:
+                        failed += 1
+                        self.stderr.write(f"  {key} {futures[future]}: {exc}")
+            self.stdout.write(f"{key}: {done} processed, {failed} failed")
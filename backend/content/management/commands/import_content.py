@@ -0,0 +1,247 @@
+import csv
+import json
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from content import snapshots
+from content.blobs import track
+from content.cache import bump_generation
+from content.counters import refresh_categories
+from content.models import Book, BookBody, Category, Partner, TeamMember
+
+# Columns that used to hold remote image URLs (e.g. in a Supabase export).
+LEGACY_IMAGE_COLUMNS = {
+    Book: ("cover_image", "legacy_cover_image_url"),
+    Partner: ("logo", "legacy_logo_url"),
+    TeamMember: ("photo", "legacy_photo_url"),
+}
+RESOURCES = {
+    "categories": Category,
+    "books": Book,
+    "partners": Partner,
+    "team-members": TeamMember,
+}
+
+
+def iter_csv(path, skip):
+    csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        for index, row in enumerate(csv.DictReader(handle)):
+            if index >= skip:
+                yield row, None
+
+
+def iter_jsonl(path, offset):
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        while True:
+            line = handle.readline()
+            if not line:
+                break
+            offset += len(line)
+            if line.strip():
+                yield json.loads(line), offset
+
+
+@contextmanager
+def preserve_timestamps(model):
+    """Let imported created_at/updated_at values through auto_now(_add)."""
+    fields = [
+        field
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = "Stream categories, books, partners or team members from CSV/JSONL into the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("resource", choices=sorted(RESOURCES))
+        parser.add_argument("path", help="CSV file with a header row, or JSON Lines (.jsonl).")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--checkpoint",
+            help="Progress file used to resume an interrupted import (default: <path>.checkpoint).",
+        )
+        parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint.")
+        parser.add_argument(
+            "--keep-timestamps",
+            action="store_true",
+            help="Keep updated_at from the file for new rows, e.g. for the initial migration into an empty "
+            "database. Rows that already exist are always stamped with the time of the import.",
+        )
+
+    def handle(self, *args, **options):
+        self.model = RESOURCES[options["resource"]]
+        self.keep_timestamps = options["keep_timestamps"]
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError(f"{path} does not exist")
+        file_format = options["format"] or ("jsonl" if path.suffix in (".jsonl", ".ndjson") else "csv")
+        checkpoint_path = Path(options["checkpoint"] or f"{path}.checkpoint")
+        checkpoint = {"rows": 0, "offset": 0}
+        if checkpoint_path.exists() and not options["restart"]:
+            checkpoint = json.loads(checkpoint_path.read_text())
+            self.stdout.write(f"Resuming after {checkpoint['rows']} rows")
+
+        self.fields = {
+            field.name: field
+            for field in self.model._meta.concrete_fields
+            if field.editable or field.primary_key or field.name in ("created_at", "updated_at")
+        }
+        self.category_ids_by_name = {}
+        if file_format == "jsonl":
+            rows = iter_jsonl(path, checkpoint["offset"])
+        else:
+            rows = iter_csv(path, checkpoint["rows"])
+
+        started = time.monotonic()
+        imported = 0
+        batch = []
+        offset = checkpoint["offset"]
+        with preserve_timestamps(self.model):
+            for row, row_offset in rows:
+                batch.append(self.build(row, checkpoint["rows"] + imported + len(batch) + 1))
+                offset = row_offset if row_offset is not None else offset
+                if len(batch) >= options["batch_size"]:
+                    imported += self.write(batch)
+                    batch = []
+                    self.save_checkpoint(checkpoint_path, checkpoint["rows"] + imported, offset)
+                    self.report(imported, started)
+            if batch:
+                imported += self.write(batch)
+                self.save_checkpoint(checkpoint_path, checkpoint["rows"] + imported, offset)
+
+        checkpoint_path.unlink(missing_ok=True)
+        self.report(imported, started, final=True)
+
+    def build(self, row, line):
+        values = {}
+        legacy = LEGACY_IMAGE_COLUMNS.get(self.model)
+        for column, raw in row.items():
+            if column in ("category", "category_name") and self.model is Book:
+                values["category_id"] = self.category_for_name(raw)
+                continue
+            if column == "content" and self.model is Book:
+                values["content"] = raw if raw != "" else None
+                continue
+            name = column[:-3] if column.endswith("_id") and column[:-3] in self.fields else column
+            if name not in self.fields:
+                continue
+            field = self.fields[name]
+            if raw == "" and (field.null or not field.empty_strings_allowed):
+                raw = None
+            elif raw is None and not field.null and field.empty_strings_allowed:
+                raw = ""
+            if legacy and name == legacy[0] and raw and str(raw).startswith(("http://", "https://")):
+                values[legacy[1]] = raw
+                continue
+            try:
+                if name == "category":
+                    values["category_id"] = Category._meta.pk.to_python(raw) if raw else None
+                else:
+                    values[name] = field.to_python(raw)
+            except ValidationError as exc:
+                raise CommandError(f"Row {line}: invalid {column!r}: {'; '.join(exc.messages)}")
+        if values.get("id") is None:
+            raise CommandError(f"Row {line}: missing id")
+        now = timezone.now()
+        values["created_at"] = values.get("created_at") or now
+        values["updated_at"] = values.get("updated_at") or now
+        instance = self.model(**values)
+        if self.model is Book and instance.content_changed:
+            instance.derive_text_fields()
+        return instance
+
+    def category_for_name(self, name):
+        if not name:
+            return None
+        if name not in self.category_ids_by_name:
+            self.category_ids_by_name[name] = Category.objects.filter(name=name).values_list("id", flat=True).first()
+        return self.category_ids_by_name[name]
+
+    def write(self, batch):
+        if self.model is Book:
+            # Resolve every category reference of the batch in one query.
+            wanted = {book.category_id for book in batch if book.category_id}
+            known = set(Category.objects.filter(id__in=wanted).values_list("id", flat=True))
+            for book in batch:
+                if book.category_id and book.category_id not in known:
+                    self.stderr.write(f"Book {book.id}: unknown category {book.category_id}, left empty")
+                    book.category_id = None
+
+        update_fields = [name for name in self.fields if name != "id"]
+        for legacy_field in LEGACY_IMAGE_COLUMNS.get(self.model, ())[1:]:
+            if legacy_field not in update_fields:
+                update_fields.append(legacy_field)
+        groups = [(batch, update_fields)]
+        if self.model is Book:
+            # A row without a content column leaves the stored text and everything derived from it alone.
+            with_text = [book for book in batch if book.content_changed]
+            groups = [
+                (with_text, [*update_fields, *Book.TEXT_FIELDS]),
+                ([book for book in batch if not book.content_changed], update_fields),
+            ]
+        with transaction.atomic():
+            existing = self.model.objects.filter(pk__in=[obj.pk for obj in batch])
+            if self.model is Book:
+                # Rows that already exist may move out of their current category.
+                loaded = dict(existing.values_list("pk", "category_id"))
+                categories = set(loaded.values())
+            else:
+                loaded = set(existing.values_list("pk", flat=True)) if self.keep_timestamps else set()
+            now = timezone.now()
+            for obj in batch:
+                # An older updated_at from the file would hide the change from validators and
+                # ?updated_since= feeds; created_at is kept as it is.
+                if not self.keep_timestamps or obj.pk in loaded:
+                    obj.updated_at = now
+            for rows, fields in groups:
+                if rows:
+                    self.model.objects.bulk_create(
+                        rows, update_conflicts=True, unique_fields=["id"], update_fields=fields
+                    )
+            if self.model is Book:
+                if with_text:
+                    BookBody.objects.store(with_text)
+                refresh_categories(categories | {book.category_id for book in batch})
+            if self.model in LEGACY_IMAGE_COLUMNS:
+                track(batch)
+            transaction.on_commit(lambda: bump_generation(self.model))
+            if self.model is Book:
+                # New books have no previous category list to leave.
+                for book in batch:
+                    book._loaded_category_id = loaded.get(book.pk, book.category_id)
+            # bulk_create() sends no post_save either.
+            snapshots.schedule(self.model, batch)
+        return len(batch)
+
+    @staticmethod
+    def save_checkpoint(path, rows, offset):
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"rows": rows, "offset": offset}))
+        tmp.replace(path)
+
+    def report(self, imported, started, final=False):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        label = "Imported" if final else "Progress:"
+        self.stdout.write(
+            f"{label} {imported} {self.model._meta.verbose_name_plural} ({imported / elapsed:.0f} rows/s)"
+        )
@@ -0,0 +1,242 @@
+import http.client
+import json
+import mimetypes
+import posixpath
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from urllib.parse import unquote, urljoin, urlsplit
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from content import snapshots
+from content.blobs import track
+from content.cache import bump_generation
+from content.models import Book, Partner, TeamMember
+
+# --model value -> (model, image field, legacy URL field)
+LEGACY_FIELDS = {
+    "books": (Book, "cover_image", "legacy_cover_image_url"),
+    "partners": (Partner, "logo", "legacy_logo_url"),
+    "team": (TeamMember, "photo", "legacy_photo_url"),
+}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_REDIRECTS = 5
+USER_AGENT = "spark-legacy-images/1.0"
+
+
+class DownloadError(Exception):
+    pass
+
+
+class Downloader:
+    """Fetch URLs over keep-alive connections, one pool of connections per thread."""
+
+    def __init__(self, timeout, retries, max_bytes):
+        self.timeout = timeout
+        self.retries = retries
+        self.max_bytes = max_bytes
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.opened = []
+
+    def _connection(self, scheme, netloc):
+        connections = getattr(self.local, "connections", None)
+        if connections is None:
+            connections = self.local.connections = {}
+        key = (scheme, netloc)
+        if key not in connections:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            connections[key] = cls(netloc, timeout=self.timeout)
+            with self.lock:
+                self.opened.append(connections[key])
+        return connections[key]
+
+    def _drop(self, scheme, netloc):
+        connection = self.local.connections.pop((scheme, netloc), None)
+        if connection is not None:
+            connection.close()
+
+    def fetch(self, url):
+        """Return ``(body, content_type, final_url)`` for an image URL, following redirects."""
+        for _ in range(MAX_REDIRECTS + 1):
+            status, headers, body = self._request(url)
+            if status in (301, 302, 303, 307, 308) and headers.get("location"):
+                url = urljoin(url, headers["location"])
+                continue
+            if status != 200:
+                raise DownloadError(f"HTTP {status}")
+            content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+            if not content_type.startswith("image/"):
+                raise DownloadError(f"unexpected content type {content_type or 'none'!r}")
+            return body, content_type, url
+        raise DownloadError("too many redirects")
+
+    def _request(self, url):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.netloc:
+            raise DownloadError("not an http(s) URL")
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        for attempt in range(self.retries + 1):
+            connection = self._connection(parts.scheme, parts.netloc)
+            try:
+                connection.request("GET", path, headers={"User-Agent": USER_AGENT, "Accept": "image/*"})
+                response = connection.getresponse()
+                length = response.getheader("Content-Length")
+                if length and length.isdigit() and int(length) > self.max_bytes:
+                    self._drop(parts.scheme, parts.netloc)
+                    raise DownloadError(f"file larger than {self.max_bytes} bytes")
+                body = response.read(self.max_bytes + 1)
+                if len(body) > self.max_bytes:
+                    self._drop(parts.scheme, parts.netloc)
+                    raise DownloadError(f"file larger than {self.max_bytes} bytes")
+                if response.will_close:
+                    self._drop(parts.scheme, parts.netloc)
+                headers = {key.lower(): value for key, value in response.getheaders()}
+            except (OSError, http.client.HTTPException) as exc:
+                self._drop(parts.scheme, parts.netloc)
+                if attempt == self.retries:
+                    raise DownloadError(str(exc) or type(exc).__name__)
+            else:
+                if response.status not in RETRY_STATUSES or attempt == self.retries:
+                    return response.status, headers, body
+            time.sleep(min(0.5 * 2**attempt, 8))
+        raise DownloadError("retries exhausted")
+
+    def close(self):
+        with self.lock:
+            for connection in self.opened:
+                connection.close()
+            self.opened = []
+
+
+def filename_for(url, content_type):
+    name = posixpath.basename(unquote(urlsplit(url).path)) or "image"
+    stem, extension = posixpath.splitext(name)
+    if not extension or mimetypes.guess_type(name)[0] != content_type:
+        extension = mimetypes.guess_extension(content_type) or ".img"
+    return f"{stem or 'image'}{extension}"
+
+
+class Command(BaseCommand):
+    help = "Download legacy_*_url images into local media and attach them to their rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", choices=sorted(LEGACY_FIELDS), action="append", help="Limit to these models.")
+        parser.add_argument("--workers", type=int, default=8, help="Concurrent downloads.")
+        parser.add_argument("--batch-size", type=int, default=100, help="Rows saved per transaction.")
+        parser.add_argument("--timeout", type=float, default=15, help="Socket timeout in seconds.")
+        parser.add_argument("--retries", type=int, default=2, help="Retries for connection errors and 429/5xx.")
+        parser.add_argument("--max-bytes", type=int, default=20 * 1024 * 1024, help="Largest accepted file.")
+        parser.add_argument(
+            "--checkpoint",
+            default="legacy_images.checkpoint.json",
+            help="File remembering downloaded and failed URLs between runs.",
+        )
+        parser.add_argument("--retry-failed", action="store_true", help="Try URLs that failed in a previous run.")
+        parser.add_argument("--clear-legacy", action="store_true", help="Clear the legacy URL once attached.")
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.checkpoint_path = Path(options["checkpoint"])
+        self.checkpoint = {"downloaded": {}, "failed": {}}
+        if self.checkpoint_path.exists():
+            self.checkpoint.update(json.loads(self.checkpoint_path.read_text()))
+        if options["retry_failed"]:
+            self.checkpoint["failed"] = {}
+        self.downloader = Downloader(options["timeout"], options["retries"], options["max_bytes"])
+        try:
+            for key in options["model"] or sorted(LEGACY_FIELDS):
+                self.migrate(key, *LEGACY_FIELDS[key])
+        finally:
+            self.downloader.close()
+            self.save_checkpoint()
+        self.stdout.write("Run `manage.py generate_renditions` to create renditions for the attached images.")
+
+    def migrate(self, key, model, image_field, legacy_field):
+        rows = (
+            model.objects.filter(Q(**{f"{image_field}__isnull": True}) | Q(**{image_field: ""}))
+            .exclude(**{f"{legacy_field}__isnull": True})
+            .exclude(**{legacy_field: ""})
+            .values_list("pk", legacy_field)
+            .iterator(chunk_size=2000)
+        )
+        by_url = {}
+        for pk, url in rows:
+            by_url.setdefault(url.strip(), []).append(pk)
+        field = model._meta.get_field(image_field)
+        downloaded = self.checkpoint["downloaded"]
+        failed = self.checkpoint["failed"]
+        pending = [url for url in by_url if url not in downloaded and url not in failed]
+        skipped = sum(1 for url in by_url if url in failed)
+        self.stdout.write(
+            f"{key}: {sum(map(len, by_url.values()))} rows, {len(by_url)} distinct URLs, "
+            f"{len(pending)} to download, {skipped} previously failed"
+        )
+
+        started = time.monotonic()
+        ready = [(url, downloaded[url]) for url in by_url if url in downloaded]
+        attached = errors = 0
+        with ThreadPoolExecutor(max_workers=self.options["workers"], thread_name_prefix="legacy-images") as executor:
+            futures = {executor.submit(self.download, field, url): url for url in pending}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    downloaded[url] = future.result()
+                    ready.append((url, downloaded[url]))
+                except DownloadError as exc:
+                    failed[url] = str(exc)
+                    errors += 1
+                    self.stderr.write(f"  {url}: {exc}")
+                if len(ready) >= self.options["batch_size"]:
+                    attached += self.attach(model, image_field, legacy_field, by_url, ready)
+                    ready = []
+                    self.save_checkpoint()
+        if ready:
+            attached += self.attach(model, image_field, legacy_field, by_url, ready)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(f"{key}: {attached} rows attached, {errors} failed ({len(pending) / elapsed:.1f} downloads/s)")
+
+    def download(self, field, url):
+        body, content_type, final_url = self.downloader.fetch(url)
+        name = field.generate_filename(None, filename_for(final_url, content_type))
+        return field.storage.save(name, ContentFile(body))
+
+    def attach(self, model, image_field, legacy_field, by_url, ready):
+        now = timezone.now()
+        objs = []
+        for url, name in ready:
+            for pk in by_url[url]:
+                obj = model(pk=pk, updated_at=now)
+                setattr(obj, image_field, name)
+                setattr(obj, legacy_field, None if self.options["clear_legacy"] else url)
+                objs.append(obj)
+        with transaction.atomic():
+            # Only fill rows that still have no image; an upload made in Admin
+            # while the command runs wins.
+            pks = set(
+                model.objects.filter(pk__in=[obj.pk for obj in objs])
+                .filter(Q(**{f"{image_field}__isnull": True}) | Q(**{image_field: ""}))
+                .select_for_update()
+                .values_list("pk", flat=True)
+            )
+            objs = [obj for obj in objs if obj.pk in pks]
+            model.objects.bulk_update(objs, [image_field, legacy_field, "updated_at"])
+            # bulk_update() skips post_save, so count the new references, invalidate cached responses and
+            # republish the snapshots that show these images here.
+            track(objs)
+            transaction.on_commit(lambda: bump_generation(model))
+            snapshots.schedule(model, model.objects.filter(pk__in=pks))
+        return len(objs)
+
+    def save_checkpoint(self):
+        tmp = self.checkpoint_path.with_suffix(self.checkpoint_path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.checkpoint, indent=1))
+        tmp.replace(self.checkpoint_path)
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from content.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the tombstones of deleted content rows older than SYNC_TOMBSTONE_DAYS; /api/sync/ tells "
+        "clients with older tokens to refetch the full lists. Run it daily, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=None, help="Keep this many days; at least SYNC_TOMBSTONE_DAYS."
+        )
+
+    def handle(self, *args, **options):
+        days = options["days"] if options["days"] is not None else settings.SYNC_TOMBSTONE_DAYS
+        # Never keep fewer days than the feed promises, or clients would miss deletes.
+        days = max(days, settings.SYNC_TOMBSTONE_DAYS)
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days)).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} tombstones older than {days} days."))
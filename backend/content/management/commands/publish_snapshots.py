@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from content import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the public API reads (lists, bootstrap, books per category and every book) to static, "
+        "pre-compressed JSON files under API_SNAPSHOT_ROOT, and remove the files of rows that no longer exist."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=None, help="Directory to publish to; default API_SNAPSHOT_ROOT.")
+        parser.add_argument(
+            "--base-url", default=None, help="Scheme and host the absolute URLs use; default API_SNAPSHOT_BASE_URL."
+        )
+        parser.add_argument(
+            "urls", nargs="*", help="Only republish these URLs, such as /api/books/ or /api/books/<id>/."
+        )
+
+    def handle(self, *args, **options):
+        if snapshots.brotli is None:
+            self.stderr.write("The brotli package is not installed; only gzip copies are written.")
+        started = time.monotonic()
+        publisher = snapshots.Publisher(root=options["output"], base_url=options["base_url"])
+        urls = options["urls"]
+        if urls:
+            written, unchanged, removed = publisher.publish(urls)
+        else:
+            written, unchanged, removed = publisher.publish(snapshots.all_urls(), prune=True)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Published {written} snapshots, {unchanged} unchanged, {removed} removed, to "
+                f"{options['output'] or settings.API_SNAPSHOT_ROOT} in {time.monotonic() - started:.1f}s."
+            )
+        )
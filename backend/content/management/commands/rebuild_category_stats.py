@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from content.cache import bump_generation
+from content.counters import refresh_categories
+from content.models import Category
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Category.book_count and latest_book_at from the books table, e.g. after writes that "
+        "bypassed the model (raw SQL, QuerySet.update() of book categories, loaddata)."
+    )
+
+    def handle(self, *args, **options):
+        before = dict(Category.objects.values_list("pk", "book_count"))
+        with transaction.atomic():
+            updated = refresh_categories()
+            # No book changed, so the Book generation that category responses follow stays the same.
+            transaction.on_commit(lambda: bump_generation(Category))
+        after = dict(Category.objects.values_list("pk", "book_count"))
+        drifted = sum(1 for pk, count in after.items() if before.get(pk) != count)
+        self.stdout.write(self.style.SUCCESS(f"Recomputed {updated} categories; {drifted} counts had drifted."))
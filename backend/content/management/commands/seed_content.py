@@ -0,0 +1,246 @@
+import io
+import random
+import re
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from content.blobs import track
+from content.cache import bump_generation
+from content.counters import refresh_categories
+from content.images import IMAGE_FIELDS
+from content.management.commands.import_content import preserve_timestamps
+from content.models import Book, BookBody, Category, Partner, TeamMember
+
+SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmg]?)b?\s*$", re.IGNORECASE)
+SIZE_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3}
+WORDS = (
+    "the a of and to in was he she it his her that with as for on at by had from they were but not this "
+    "which said one all would there their been when who will more no if out so up what about into than "
+    "them can only other new some could time these two may then do first any my now such like our over "
+    "man me even most made after also did many before must through back years where much your way well "
+    "down should because each just those people how too little state good very make world still own see "
+    "men work long get here between both life being under never day same another know while last might us "
+    "great old year off come since against go came right used take three light river stone garden letter "
+    "window morning silence voice city winter harbour lantern forest promise shadow journey memory storm"
+).split()
+# (image size, colour palette) of the placeholder images per model.
+IMAGE_SPECS = {
+    Book: ((600, 900), ((38, 70, 83), (42, 157, 143), (233, 196, 106), (244, 162, 97), (231, 111, 81))),
+    Partner: ((480, 240), ((29, 53, 87), (69, 123, 157), (168, 218, 220), (230, 57, 70))),
+    TeamMember: ((400, 400), ((94, 80, 63), (234, 224, 213), (198, 172, 143), (34, 51, 59))),
+}
+ROLES = ("Editor", "Illustrator", "Translator", "Librarian", "Community lead", "Developer", "Designer")
+
+
+def parse_size(value):
+    match = SIZE_RE.match(value)
+    if not match:
+        raise CommandError(f"Invalid size {value!r}; use e.g. 500KB or 2MB")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def placeholder_image(size, colour, label):
+    """A flat PNG with a frame and a label, enough to exercise uploads and renditions."""
+    image = Image.new("RGB", size, colour)
+    draw = ImageDraw.Draw(image)
+    inset = min(size) // 12
+    accent = tuple(255 - channel for channel in colour)
+    draw.rectangle((inset, inset, size[0] - inset, size[1] - inset), outline=accent, width=max(inset // 4, 2))
+    draw.text((inset * 2, inset * 2), label, fill=accent)
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+
+class TextGenerator:
+    """Book-like text assembled from a pool of generated paragraphs, so megabytes cost little."""
+
+    def __init__(self, rng, html, pool_size=400):
+        self.rng = rng
+        self.html = html
+        self.paragraphs = [self._paragraph() for _ in range(pool_size)]
+
+    def _sentence(self):
+        words = self.rng.choices(WORDS, k=self.rng.randint(6, 22))
+        return " ".join(words).capitalize() + self.rng.choice((".", ".", ".", "?", "!"))
+
+    def _paragraph(self):
+        return " ".join(self._sentence() for _ in range(self.rng.randint(3, 9)))
+
+    def title(self):
+        return " ".join(self.rng.choices(WORDS[-40:], k=self.rng.randint(2, 4))).title()
+
+    def book(self, size, chapter_chars):
+        parts = []
+        length = 0
+        chapter = 0
+        chapter_length = chapter_chars
+        while length < size:
+            if chapter_length >= chapter_chars:
+                chapter += 1
+                chapter_length = 0
+                heading = f"Chapter {chapter}: {self.title()}"
+                parts.append(f"<h2>{heading}</h2>\n" if self.html else f"{heading}\n\n")
+            paragraph = self.rng.choice(self.paragraphs)
+            parts.append(f"<p>{paragraph}</p>\n" if self.html else f"{paragraph}\n\n")
+            length += len(paragraph) + 8
+            chapter_length += len(paragraph) + 8
+        return "".join(parts)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate synthetic categories, books (with long text), partners and team members, plus placeholder "
+        "images, for load tests and capacity planning."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--categories", type=int, default=12)
+        parser.add_argument("--books", type=int, default=500)
+        parser.add_argument("--partners", type=int, default=40)
+        parser.add_argument("--team-members", type=int, default=20)
+        parser.add_argument("--content-size", default="1MB", help="Average book text size, e.g. 200KB or 3MB.")
+        parser.add_argument(
+            "--content-spread", type=float, default=0.5, help="Relative spread of text sizes around the average."
+        )
+        parser.add_argument("--chapter-size", default="60KB", help="Average chapter length.")
+        parser.add_argument("--text", action="store_true", help="Write plain text instead of HTML.")
+        parser.add_argument(
+            "--images",
+            type=int,
+            default=24,
+            help="Distinct placeholder images per kind (covers, logos, photos); 0 leaves images empty.",
+        )
+        parser.add_argument("--batch-size", type=int, default=50, help="Books per INSERT batch.")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed; the same seed gives the same data.")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.now = timezone.now()
+        # Names must stay unique when the command runs again with the same seed.
+        self.run_id = uuid.uuid4().hex[:6]
+        content_size = parse_size(options["content_size"])
+        chapter_chars = max(parse_size(options["chapter_size"]), 1)
+        spread = min(max(options["content_spread"], 0.0), 0.95)
+        started = time.monotonic()
+
+        self.images = {model: self.write_images(model, options["images"]) for model in IMAGE_SPECS}
+        categories = self.create(Category, [self.category(index) for index in range(options["categories"])])
+        category_ids = [category.pk for category in categories]
+
+        generator = TextGenerator(self.rng, html=not options["text"])
+        written = 0
+        total_bytes = 0
+        batch = []
+        for index in range(options["books"]):
+            size = int(content_size * self.rng.uniform(1 - spread, 1 + spread))
+            book = self.book(index, generator, size, chapter_chars, category_ids)
+            total_bytes += len(book.content.encode())
+            batch.append(book)
+            if len(batch) >= options["batch_size"]:
+                written += len(self.create(Book, batch))
+                batch = []
+                self.report("books", written, started, total_bytes)
+        if batch:
+            written += len(self.create(Book, batch))
+            self.report("books", written, started, total_bytes)
+
+        self.create(Partner, [self.partner(index) for index in range(options["partners"])])
+        self.create(TeamMember, [self.team_member(index) for index in range(options["team_members"])])
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {len(categories)} categories, {written} books ({total_bytes / 1024**2:.1f} MB of text), "
+                f"{options['partners']} partners and {options['team_members']} team members in {elapsed:.1f}s."
+            )
+        )
+        if options["images"]:
+            self.stdout.write("Run `python manage.py generate_renditions` to build the image renditions.")
+
+    def write_images(self, model, count):
+        field = model._meta.get_field(IMAGE_FIELDS[model][0])
+        size, palette = IMAGE_SPECS[model]
+        names = []
+        for index in range(count):
+            body = placeholder_image(size, palette[index % len(palette)], f"{model._meta.model_name} {index + 1}")
+            name = field.generate_filename(None, f"seed-{model._meta.model_name}-{index + 1}.png")
+            # Blob storage keeps one file per content, so reseeding reuses it.
+            names.append(field.storage.save(name, ContentFile(body)))
+        return names
+
+    def timestamp(self):
+        created = self.now - timedelta(seconds=self.rng.randint(0, 365 * 24 * 3600))
+        return created, created + timedelta(seconds=self.rng.randint(0, int((self.now - created).total_seconds())))
+
+    def image(self, model):
+        return self.rng.choice(self.images[model]) if self.images[model] else ""
+
+    def category(self, index):
+        created, updated = self.timestamp()
+        return Category(
+            name=f"Seed genre {self.run_id}-{index + 1}",
+            description=f"Synthetic category {index + 1} generated by seed_content.",
+            created_at=created,
+            updated_at=updated,
+        )
+
+    def book(self, index, generator, size, chapter_chars, category_ids):
+        created, updated = self.timestamp()
+        book = Book(
+            title=generator.title(),
+            author=f"{generator.title()} {self.rng.choice(WORDS[-40:]).title()}",
+            description=generator.paragraphs[index % len(generator.paragraphs)][:400],
+            content=generator.book(size, chapter_chars),
+            cover_image=self.image(Book),
+            category_id=self.rng.choice(category_ids) if category_ids and self.rng.random() > 0.1 else None,
+            created_at=created,
+            updated_at=updated,
+        )
+        book.derive_text_fields()
+        return book
+
+    def partner(self, index):
+        created, updated = self.timestamp()
+        return Partner(
+            name=f"Seed partner {self.run_id}-{index + 1}",
+            logo=self.image(Partner),
+            website_url=f"https://partner-{index + 1}.example.com/",
+            created_at=created,
+            updated_at=updated,
+        )
+
+    def team_member(self, index):
+        created, updated = self.timestamp()
+        return TeamMember(
+            name=f"Seed member {self.run_id}-{index + 1}",
+            role=self.rng.choice(ROLES),
+            photo=self.image(TeamMember),
+            created_at=created,
+            updated_at=updated,
+        )
+
+    def create(self, model, instances):
+        if not instances:
+            return []
+        with preserve_timestamps(model), transaction.atomic():
+            created = model.objects.bulk_create(instances)
+            if model is Book:
+                BookBody.objects.store(created)
+                refresh_categories({book.category_id for book in created})
+            if model in IMAGE_FIELDS:
+                track(created)
+            transaction.on_commit(lambda: bump_generation(model))
+        return created
+
+    def report(self, label, written, started, total_bytes):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f"Progress: {written} {label} ({written / elapsed:.1f} rows/s, {total_bytes / elapsed / 1024**2:.1f} MB/s)"
+        )
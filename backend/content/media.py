@@ -0,0 +1,108 @@
+"""Serve uploaded covers, logos and photos outside of ``DEBUG``.
+
+``/media/<name>`` looks the file up under ``MEDIA_ROOT`` (only in the folders
+listed in ``MEDIA_PUBLIC_DIRS``) and answers conditional requests. How the
+bytes are sent depends on ``MEDIA_SERVE_MODE``:
+
+- ``django``: ``FileResponse``, which WSGI servers such as gunicorn hand to
+  ``os.sendfile``; ``Range`` requests are answered with ``206``.
+- ``x-accel-redirect``: nginx sends the file from the internal location
+  ``MEDIA_ACCEL_REDIRECT_PREFIX``.
+- ``x-sendfile``: Apache (mod_xsendfile) or lighttpd send the file.
+
+Names that carry a content hash (see ``storage.py``) never change and are
+marked ``immutable``.
+"""
+
+import mimetypes
+import os
+import posixpath
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from .http import UnsatisfiableRange, if_range_matches, iter_file_range, parse_range
+from .storage import is_hashed_name
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def resolve(name):
+    """Return ``(name, absolute path)`` of a servable media file, or raise ``Http404``."""
+    name = posixpath.normpath(name).lstrip("/")
+    parts = name.split("/")
+    if any(part.startswith(".") for part in parts) or parts[0] not in settings.MEDIA_PUBLIC_DIRS:
+        raise Http404("No such file.")
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404("No such file.")
+    if not os.path.isfile(path):
+        raise Http404("No such file.")
+    return name, path
+
+
+@require_safe
+def serve_media(request, path):
+    name, full_path = resolve(path)
+    stat = os.stat(full_path)
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    last_modified = int(stat.st_mtime)
+    content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return _with_media_headers(not_modified, name, etag, last_modified)
+
+    mode = settings.MEDIA_SERVE_MODE
+    if mode == "x-accel-redirect":
+        # The proxy answers Range and sends the bytes; Django only did the lookup.
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = f"{settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{quote(name)}"
+    elif mode == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        # Pass the raw file system bytes through; header values are latin-1 on the wire.
+        response["X-Sendfile"] = os.fsencode(full_path).decode("latin-1")
+    else:
+        response = _file_response(request, full_path, stat.st_size, content_type, etag, last_modified)
+    return _with_media_headers(response, name, etag, last_modified)
+
+
+def _file_response(request, full_path, size, content_type, etag, last_modified):
+    byte_range = None
+    if "Range" in request.headers and if_range_matches(request, etag, http_date(last_modified)):
+        try:
+            byte_range = parse_range(request.headers["Range"], size)
+        except UnsatisfiableRange:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            response["Accept-Ranges"] = "bytes"
+            return response
+    if byte_range is None:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    else:
+        first, last = byte_range
+        length = last - first + 1
+        response = StreamingHttpResponse(
+            iter_file_range(open(full_path, "rb"), first, length), status=206, content_type=content_type
+        )
+        response["Content-Range"] = f"bytes {first}-{last}/{size}"
+        response["Content-Length"] = str(length)
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def _with_media_headers(response, name, etag, last_modified):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    if is_hashed_name(name):
+        patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_MAX_AGE)
+    return response
@@ -0,0 +1,281 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger("content.metrics.slow")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_LOG_MAX_QUERIES = 50
+SLOW_LOG_MAX_SQL_CHARS = 500
+
+_current = contextvars.ContextVar("content_metrics_request", default=None)
+
+
+class RequestTimings:
+    """Measurements collected while a single request is being handled."""
+
+    def __init__(self, capture_sql=False):
+        self.capture_sql = capture_sql
+        self.queries = 0
+        self.db_time = 0.0
+        self.stages = defaultdict(float)
+        self.statements = []
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += duration
+            if self.capture_sql and len(self.statements) < SLOW_LOG_MAX_QUERIES:
+                self.statements.append((duration, sql[:SLOW_LOG_MAX_SQL_CHARS]))
+
+
+@contextmanager
+def stage(name):
+    """Time a block of work (minus the SQL it runs) for the current request."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    db_before = timings.db_time
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start - (timings.db_time - db_before)
+        timings.stages[name] += max(elapsed, 0.0)
+
+
+class Registry:
+    """Counters and latency histograms for this process.
+
+    When ``METRICS_DIR`` is set each process periodically writes its snapshot
+    there, and ``/metrics`` adds up the snapshots of every worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = defaultdict(float)
+            self.histograms = {}
+
+    def observe_request(self, labels, status, duration, timings, response_bytes):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.counters[("spark_http_requests_total", key + (("status", str(status)),))] += 1
+            self.counters[("spark_db_queries_total", key)] += timings.queries
+            self.counters[("spark_db_query_seconds_total", key)] += timings.db_time
+            self.counters[("spark_serializer_seconds_total", key)] += timings.stages.get("serialize", 0.0)
+            self.counters[("spark_http_response_bytes_total", key)] += response_bytes
+            histogram = self.histograms.setdefault(
+                ("spark_http_request_duration_seconds", key), [0] * (len(LATENCY_BUCKETS) + 2)
+            )
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    histogram[index] += 1
+            histogram[-2] += duration
+            histogram[-1] += 1
+
+    def snapshot(self):
+        from .cache import stats as cache_stats
+
+        with self._lock:
+            counters = [[name, list(labels), value] for (name, labels), value in self.counters.items()]
+            histograms = [[name, list(labels), list(values)] for (name, labels), values in self.histograms.items()]
+        for outcome, value in cache_stats.snapshot().items():
+            counters.append(["spark_api_cache_requests_total", [["outcome", outcome]], value])
+        return {"counters": counters, "histograms": histograms}
+
+    def maybe_flush(self, force=False):
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self._last_flush = now
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        target = path / f"metrics-{os.getpid()}.json"
+        tmp = target.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(self.snapshot()))
+            os.replace(tmp, target)
+        except OSError:
+            logger.exception("Could not write metrics snapshot to %s", target)
+
+    def collect(self):
+        """Merge the snapshots of every worker process."""
+        snapshots = []
+        if settings.METRICS_DIR:
+            self.maybe_flush(force=True)
+            for file in Path(settings.METRICS_DIR).glob("metrics-*.json"):
+                try:
+                    snapshots.append(json.loads(file.read_text()))
+                except (OSError, ValueError):
+                    continue
+        else:
+            snapshots.append(self.snapshot())
+
+        counters = defaultdict(float)
+        histograms = {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot["counters"]:
+                counters[(name, tuple(tuple(pair) for pair in labels))] += value
+            for name, labels, values in snapshot["histograms"]:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                merged = histograms.setdefault(key, [0] * len(values))
+                for index, value in enumerate(values):
+                    merged[index] += value
+        return counters, histograms
+
+
+registry = Registry()
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus():
+    counters, histograms = registry.collect()
+    lines = []
+    seen = set()
+    for (name, labels), value in sorted(counters.items()):
+        if name not in seen:
+            lines.append(f"# TYPE {name} counter")
+            seen.add(name)
+        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+    for (name, labels), values in sorted(histograms.items()):
+        if name not in seen:
+            lines.append(f"# TYPE {name} histogram")
+            seen.add(name)
+        for bound, count in zip(LATENCY_BUCKETS, values):
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', f'{bound:g}')])} {count:g}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {values[-1]:g}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {values[-2]:g}")
+        lines.append(f"{name}_count{_format_labels(labels)} {values[-1]:g}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _record_sql(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings.db_wrapper(execute, sql, params, many, context)
+
+
+def _install_sql_timer(sender=None, connection=None, **kwargs):
+    if _record_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_sql)
+
+
+class MetricsMiddleware:
+    """Record latency, SQL and serializer cost per route.
+
+    Adds a ``Server-Timing`` header to every response and logs the captured SQL
+    of requests slower than ``METRICS_SLOW_REQUEST_MS``. Works under WSGI and
+    ASGI: SQL is timed by a wrapper on every database connection that reports
+    to the request found in a context variable, which also reaches the threads
+    async views run their queries in.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(_install_sql_timer, dispatch_uid="content.metrics.sql_timer")
+        for connection in connections.all(initialized_only=True):
+            _install_sql_timer(connection=connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings(capture_sql=settings.METRICS_SLOW_REQUEST_MS > 0)
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings(capture_sql=settings.METRICS_SLOW_REQUEST_MS > 0)
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - start)
+
+    def _finish(self, request, response, timings, duration):
+        slow_ms = settings.METRICS_SLOW_REQUEST_MS
+        match = getattr(request, "resolver_match", None)
+        route = (match.view_name or match.route) if match else "unmatched"
+        response_bytes = 0 if response.streaming else len(response.content)
+        registry.observe_request(
+            {"route": route, "method": request.method}, response.status_code, duration, timings, response_bytes
+        )
+        registry.maybe_flush()
+
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={timings.db_time * 1000:.1f};desc="{timings.queries} queries"',
+                *(f"{name};dur={value * 1000:.1f}" for name, value in timings.stages.items()),
+                f"total;dur={duration * 1000:.1f}",
+            ]
+        )
+
+        if slow_ms and duration * 1000 >= slow_ms:
+            slow_logger.warning(
+                "Slow request %s %s (%s) took %.1fms with %s queries (%.1fms in SQL):\n%s",
+                request.method,
+                request.get_full_path(),
+                route,
+                duration * 1000,
+                timings.queries,
+                timings.db_time * 1000,
+                "\n".join(f"  [{sql_time * 1000:.1f}ms] {sql}" for sql_time, sql in timings.statements),
+            )
+        return response
@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0002_media_file_fields"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["created_at", "id"], name="book_created_at_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="partner",
+            index=models.Index(fields=["name", "id"], name="partner_name_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="teammember",
+            index=models.Index(fields=["name", "id"], name="teammember_name_id_idx"),
+        ),
+    ]
@@ -0,0 +1,98 @@
+from django.db import migrations
+
+# Book text is stripped of positions and capped before indexing so that a very
+# long book cannot exceed PostgreSQL's 1MB tsvector limit.
+POSTGRES_VECTOR = """
+    setweight(to_tsvector('simple', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce({row}author, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce({row}description, '')), 'B') ||
+    strip(to_tsvector('simple', left(coalesce({row}content, ''), 2000000)))
+"""
+
+POSTGRES_FORWARD = [
+    "ALTER TABLE content_book ADD COLUMN search_vector tsvector",
+    f"""
+    CREATE FUNCTION content_book_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {POSTGRES_VECTOR.format(row="NEW.")};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER content_book_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, author, description, content ON content_book
+    FOR EACH ROW EXECUTE FUNCTION content_book_search_vector_update()
+    """,
+    f"UPDATE content_book SET search_vector = {POSTGRES_VECTOR.format(row='')}",
+    "CREATE INDEX content_book_search_vector_idx ON content_book USING gin (search_vector)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP TRIGGER IF EXISTS content_book_search_vector_trigger ON content_book",
+    "DROP FUNCTION IF EXISTS content_book_search_vector_update()",
+    "ALTER TABLE content_book DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE content_book_fts USING fts5(
+        book_id UNINDEXED, title, author, description, content,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO content_book_fts (book_id, title, author, description, content)
+    SELECT id, title, author, coalesce(description, ''), coalesce(content, '') FROM content_book
+    """,
+    """
+    CREATE TRIGGER content_book_fts_insert AFTER INSERT ON content_book BEGIN
+        INSERT INTO content_book_fts (book_id, title, author, description, content)
+        VALUES (new.id, new.title, new.author, coalesce(new.description, ''), coalesce(new.content, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER content_book_fts_update AFTER UPDATE OF title, author, description, content ON content_book
+    BEGIN
+        UPDATE content_book_fts
+        SET title = new.title, author = new.author,
+            description = coalesce(new.description, ''), content = coalesce(new.content, '')
+        WHERE book_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER content_book_fts_delete AFTER DELETE ON content_book BEGIN
+        DELETE FROM content_book_fts WHERE book_id = old.id;
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS content_book_fts_insert",
+    "DROP TRIGGER IF EXISTS content_book_fts_update",
+    "DROP TRIGGER IF EXISTS content_book_fts_delete",
+    "DROP TABLE IF EXISTS content_book_fts",
+]
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        statements = {"postgresql": postgres, "sqlite": sqlite}.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0003_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRES_BACKWARD, SQLITE_BACKWARD),
+        ),
+    ]
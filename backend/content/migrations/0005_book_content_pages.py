@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db import migrations, models
+
+from content.text import split_pages
+
+BATCH_SIZE = 200
+
+
+def compute_pages(apps, schema_editor):
+    Book = apps.get_model("content", "Book")
+    batch = []
+    for book in Book.objects.only("id", "content").iterator(chunk_size=BATCH_SIZE):
+        book.content_pages = split_pages(book.content, settings.BOOK_PAGE_CHARS)
+        batch.append(book)
+        if len(batch) >= BATCH_SIZE:
+            Book.objects.bulk_update(batch, ["content_pages"])
+            batch = []
+    if batch:
+        Book.objects.bulk_update(batch, ["content_pages"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0004_book_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="content_pages",
+            field=models.JSONField(
+                blank=True, default=list, editable=False, help_text="Page boundaries of content, computed on save"
+            ),
+        ),
+        migrations.RunPython(compute_pages, migrations.RunPython.noop),
+    ]
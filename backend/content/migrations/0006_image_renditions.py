@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0005_book_content_pages"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="cover_image_renditions",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="partner",
+            name="logo_renditions",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name="teammember",
+            name="photo_renditions",
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
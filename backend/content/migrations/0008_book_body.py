@@ -0,0 +1,200 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from content.text import compress_text, decompress_text
+
+BATCH_SIZE = 200
+
+SEARCH_META = """
+    setweight(to_tsvector('simple', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce({row}author, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce({row}description, '')), 'B')
+"""
+
+# The book trigger now only watches the metadata and takes the text lexemes
+# from content_bookbody.search_vector, which the application fills in; the body
+# trigger pushes them to the book whenever they change.
+POSTGRES_FORWARD = [
+    "ALTER TABLE content_bookbody ADD COLUMN search_vector tsvector",
+    # The data is compressed already; keep PostgreSQL from compressing it again
+    # and let substring() read a prefix without fetching the whole value.
+    "ALTER TABLE content_bookbody ALTER COLUMN data SET STORAGE EXTERNAL",
+    """
+    UPDATE content_bookbody AS body
+    SET search_vector = strip(to_tsvector('simple', left(coalesce(book.content, ''), 2000000)))
+    FROM content_book AS book
+    WHERE book.id = body.book_id
+    """,
+    "DROP TRIGGER IF EXISTS content_book_search_vector_trigger ON content_book",
+    f"""
+    CREATE OR REPLACE FUNCTION content_book_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {SEARCH_META.format(row="NEW.")} || coalesce(
+            (SELECT search_vector FROM content_bookbody WHERE book_id = NEW.id), ''::tsvector
+        );
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER content_book_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, author, description ON content_book
+    FOR EACH ROW EXECUTE FUNCTION content_book_search_vector_update()
+    """,
+    f"""
+    CREATE FUNCTION content_bookbody_search_vector_sync() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            UPDATE content_book SET search_vector = {SEARCH_META.format(row="")} WHERE id = OLD.book_id;
+            RETURN OLD;
+        END IF;
+        UPDATE content_book
+        SET search_vector = {SEARCH_META.format(row="")} || coalesce(NEW.search_vector, ''::tsvector)
+        WHERE id = NEW.book_id;
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER content_bookbody_search_vector_trigger
+    AFTER UPDATE OF search_vector OR DELETE ON content_bookbody
+    FOR EACH ROW EXECUTE FUNCTION content_bookbody_search_vector_sync()
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    "DROP TRIGGER IF EXISTS content_bookbody_search_vector_trigger ON content_bookbody",
+    "DROP FUNCTION IF EXISTS content_bookbody_search_vector_sync()",
+    "DROP TRIGGER IF EXISTS content_book_search_vector_trigger ON content_book",
+    f"""
+    CREATE OR REPLACE FUNCTION content_book_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {SEARCH_META.format(row="NEW.")} ||
+            strip(to_tsvector('simple', left(coalesce(NEW.content, ''), 2000000)));
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER content_book_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, author, description, content ON content_book
+    FOR EACH ROW EXECUTE FUNCTION content_book_search_vector_update()
+    """,
+]
+
+# The FTS table keeps the text it already has; from now on it is written by
+# content.search.index_book_text().
+SQLITE_FORWARD = [
+    "DROP TRIGGER IF EXISTS content_book_fts_insert",
+    "DROP TRIGGER IF EXISTS content_book_fts_update",
+    """
+    CREATE TRIGGER content_book_fts_insert AFTER INSERT ON content_book BEGIN
+        INSERT INTO content_book_fts (book_id, title, author, description, content)
+        VALUES (new.id, new.title, new.author, coalesce(new.description, ''), '');
+    END
+    """,
+    """
+    CREATE TRIGGER content_book_fts_update AFTER UPDATE OF title, author, description ON content_book
+    BEGIN
+        UPDATE content_book_fts
+        SET title = new.title, author = new.author, description = coalesce(new.description, '')
+        WHERE book_id = old.id;
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS content_book_fts_insert",
+    "DROP TRIGGER IF EXISTS content_book_fts_update",
+    """
+    CREATE TRIGGER content_book_fts_insert AFTER INSERT ON content_book BEGIN
+        INSERT INTO content_book_fts (book_id, title, author, description, content)
+        VALUES (new.id, new.title, new.author, coalesce(new.description, ''), coalesce(new.content, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER content_book_fts_update AFTER UPDATE OF title, author, description, content ON content_book
+    BEGIN
+        UPDATE content_book_fts
+        SET title = new.title, author = new.author,
+            description = coalesce(new.description, ''), content = coalesce(new.content, '')
+        WHERE book_id = old.id;
+    END
+    """,
+]
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        statements = {"postgresql": postgres, "sqlite": sqlite}.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+def move_text_to_bodies(apps, schema_editor):
+    Book = apps.get_model("content", "Book")
+    BookBody = apps.get_model("content", "BookBody")
+    codec = settings.BOOK_BODY_CODEC
+    batch = []
+    books = Book.objects.exclude(content=None).only("id", "content").order_by("pk")
+    for book in books.iterator(chunk_size=BATCH_SIZE):
+        data = compress_text(book.content, codec)
+        batch.append(BookBody(book_id=book.pk, codec=codec, data=data, length=len(book.content)))
+        if len(batch) >= BATCH_SIZE:
+            BookBody.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        BookBody.objects.bulk_create(batch)
+
+
+def move_text_to_books(apps, schema_editor):
+    Book = apps.get_model("content", "Book")
+    BookBody = apps.get_model("content", "BookBody")
+    batch = []
+    for body in BookBody.objects.order_by("pk").iterator(chunk_size=BATCH_SIZE):
+        batch.append(Book(id=body.book_id, content=decompress_text(body.data, body.codec)))
+        if len(batch) >= BATCH_SIZE:
+            Book.objects.bulk_update(batch, ["content"])
+            batch = []
+    if batch:
+        Book.objects.bulk_update(batch, ["content"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0007_book_category_created_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookBody",
+            fields=[
+                (
+                    "book",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="body",
+                        serialize=False,
+                        to="content.book",
+                    ),
+                ),
+                ("codec", models.CharField(max_length=16)),
+                ("data", models.BinaryField()),
+                ("length", models.PositiveIntegerField(help_text="Length of the text in characters")),
+            ],
+        ),
+        migrations.RunPython(move_text_to_bodies, move_text_to_books),
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRES_BACKWARD, SQLITE_BACKWARD),
+        ),
+        migrations.RemoveField(
+            model_name="book",
+            name="content",
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def compute_stats(apps, schema_editor):
+    Book = apps.get_model("content", "Book")
+    Category = apps.get_model("content", "Category")
+    books = Book.objects.filter(category=OuterRef("pk"))
+    counts = books.order_by().values("category").annotate(n=Count("pk")).values("n")
+    Category.objects.update(
+        book_count=Coalesce(Subquery(counts, output_field=IntegerField()), Value(0)),
+        latest_book_at=Subquery(books.order_by("-created_at").values("created_at")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0008_book_body"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="book_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="latest_book_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(compute_stats, migrations.RunPython.noop),
+    ]
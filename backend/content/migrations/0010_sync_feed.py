@@ -0,0 +1,41 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0009_category_book_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("model", models.CharField(help_text="Model label, such as content.book", max_length=100)),
+                ("object_id", models.UUIDField()),
+                ("deleted_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "ordering": ["deleted_at"],
+                "indexes": [models.Index(fields=["model", "deleted_at"], name="tombstone_model_deleted_idx")],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=models.Index(fields=["updated_at", "id"], name="book_updated_at_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(fields=["updated_at", "id"], name="category_updated_at_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="partner",
+            index=models.Index(fields=["updated_at", "id"], name="partner_updated_at_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="teammember",
+            index=models.Index(fields=["updated_at", "id"], name="teammember_updated_at_id_idx"),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations, models
+
+
+def store_plain_data_external(apps, schema_editor):
+    # Like data: already compressed, and search snippets read a prefix of it.
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("ALTER TABLE content_bookbody ALTER COLUMN plain_data SET STORAGE EXTERNAL")
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0010_sync_feed"),
+    ]
+
+    # Existing books keep the defaults until `manage.py derive_book_text` fills them in.
+    operations = [
+        migrations.AddField(
+            model_name="book",
+            name="content_format",
+            field=models.CharField(
+                blank=True, choices=[("html", "HTML"), ("text", "Plain text")], editable=False, max_length=8
+            ),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="word_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="reading_minutes",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="table_of_contents",
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name="book",
+            name="content_hash",
+            field=models.CharField(blank=True, editable=False, help_text="SHA-256 of the stored text", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="bookbody",
+            name="plain_data",
+            field=models.BinaryField(blank=True, help_text="Plain text of HTML books, same codec", null=True),
+        ),
+        migrations.RunPython(store_plain_data_external, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0011_book_text_derivatives"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Blob",
+            fields=[
+                (
+                    "digest",
+                    models.CharField(
+                        help_text="SHA-256 of the file", max_length=64, primary_key=True, serialize=False
+                    ),
+                ),
+                ("name", models.CharField(help_text="Storage name, such as blobs/ab/ab12…ef.png", max_length=100)),
+                ("size", models.PositiveBigIntegerField()),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "last_saved_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, help_text="Last time these bytes were uploaded"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [models.Index(fields=["ref_count", "last_saved_at"], name="blob_ref_count_saved_idx")],
+            },
+        ),
+    ]
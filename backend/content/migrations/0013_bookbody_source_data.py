@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0012_blob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bookbody",
+            name="source_data",
+            field=models.BinaryField(
+                blank=True, help_text="Text as written, when sanitizing changed it, same codec", null=True
+            ),
+        ),
+    ]
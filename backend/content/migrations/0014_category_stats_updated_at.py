@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("content", "0013_bookbody_source_data"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="category",
+            name="stats_updated_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -1,6 +1,11 @@
 import uuid
 
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from .search import index_book_text
+from .text import compress_text, decompress_text, derive_text
 
 
 class TimeStampedModel(models.Model):
@@ -8,29 +13,67 @@ class TimeStampedModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # The ImageField whose blob (content.storage.BlobStorage) the row references.
+    UPLOAD_FIELD = None
+    # Timestamps that move when the row's representation changes (validators and change feeds).
+    CHANGE_FIELDS = ("updated_at",)
+
     class Meta:
         abstract = True
         ordering = ["-created_at"]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the save signal release the blob the row referenced when it was loaded.
+        if cls.UPLOAD_FIELD in instance.__dict__:
+            instance._loaded_upload_name = instance.__dict__[cls.UPLOAD_FIELD] or ""
+        return instance
+
 
 class Category(TimeStampedModel):
     name = models.CharField(max_length=255, unique=True)
     description = models.TextField(blank=True, null=True)
+    # Maintained by content.counters; rebuild with `manage.py rebuild_category_stats`.
+    book_count = models.PositiveIntegerField(default=0, editable=False)
+    latest_book_at = models.DateTimeField(blank=True, null=True, editable=False)
+    # Moves with the two counters instead of updated_at, which books embedding the category depend on.
+    stats_updated_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    CHANGE_FIELDS = ("updated_at", "stats_updated_at")
 
     class Meta(TimeStampedModel.Meta):
         verbose_name_plural = "Categories"
         ordering = ["name"]
+        indexes = [models.Index(fields=["updated_at", "id"], name="category_updated_at_id_idx")]
 
     def __str__(self):
         return self.name
 
 
+class BookQuerySet(models.QuerySet):
+    def with_content(self):
+        """Fetch the compressed book text in the same query; only detail views need it."""
+        return self.select_related("body")
+
+
 class Book(TimeStampedModel):
     title = models.CharField(max_length=255)
     author = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
-    content = models.TextField(blank=True, null=True)
+    # Derived from the text on save (see derive_text_fields()).
+    content_pages = models.JSONField(
+        default=list, blank=True, editable=False, help_text="Page boundaries of content, computed on save"
+    )
+    content_format = models.CharField(
+        max_length=8, blank=True, editable=False, choices=[("html", "HTML"), ("text", "Plain text")]
+    )
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_minutes = models.PositiveIntegerField(default=0, editable=False)
+    table_of_contents = models.JSONField(default=list, blank=True, editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, editable=False, help_text="SHA-256 of the stored text")
     cover_image = models.ImageField(upload_to="books/", blank=True, null=True)
+    cover_image_renditions = models.JSONField(default=dict, blank=True, editable=False)
     legacy_cover_image_url = models.URLField(blank=True, null=True, help_text="Previous URL-based cover image")
     category = models.ForeignKey(
         Category,
@@ -40,21 +83,197 @@ class Book(TimeStampedModel):
         null=True,
     )
 
+    objects = BookQuerySet.as_manager()
+
+    UPLOAD_FIELD = "cover_image"
+    TEXT_FIELDS = (
+        "content_pages",
+        "content_format",
+        "word_count",
+        "reading_minutes",
+        "table_of_contents",
+        "content_hash",
+    )
+
     class Meta(TimeStampedModel.Meta):
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="book_created_at_id_idx"),
+            # ?category_id= lists: filter and keyset ordering from one index.
+            models.Index(fields=["category", "created_at", "id"], name="book_category_created_idx"),
+            # ?updated_since= change feeds.
+            models.Index(fields=["updated_at", "id"], name="book_updated_at_id_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the save signal move the book between category counters.
+        if "category_id" in instance.__dict__:
+            instance._loaded_category_id = instance.category_id
+        return instance
+
+    @property
+    def content(self):
+        """The book text, stored compressed in :class:`BookBody` and decompressed on first access."""
+        if "_content" not in self.__dict__:
+            body = None
+            if not self._state.adding:
+                try:
+                    body = self.body
+                except BookBody.DoesNotExist:
+                    pass
+            self._content = body.text if body is not None else None
+        return self._content
+
+    @content.setter
+    def content(self, value):
+        self._content = value
+        self._content_changed = True
+
+    @property
+    def content_changed(self):
+        return self.__dict__.get("_content_changed", False)
+
+    def derive_text_fields(self):
+        """Run the text pipeline: sanitize ``content`` and fill ``TEXT_FIELDS`` from it.
+
+        Keeps the plain text for ``BookBody.objects.store()``; returns ``TEXT_FIELDS``.
+        """
+        derived = derive_text(self.content, settings.BOOK_PAGE_CHARS, settings.BOOK_READING_WPM)
+        return self.apply_derived_text(derived)
+
+    def apply_derived_text(self, derived):
+        """Set the text and ``TEXT_FIELDS`` from a :class:`~content.text.DerivedText`."""
+        self._content = derived.text
+        self._plain_text = derived.plain
+        self._source_text = derived.source
+        self.content_pages = derived.pages
+        self.content_format = derived.format
+        self.word_count = derived.word_count
+        self.reading_minutes = derived.reading_minutes
+        self.table_of_contents = derived.table_of_contents
+        self.content_hash = derived.content_hash
+        return self.TEXT_FIELDS
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "content" in update_fields:
+            kwargs["update_fields"] = {*update_fields, *self.TEXT_FIELDS} - {"content"}
+        elif update_fields is not None or not self.content_changed:
+            if self._state.adding:
+                # A new book without text has no body; don't look for one later.
+                self.__dict__.setdefault("_content", None)
+            return super().save(*args, **kwargs)
+        self.derive_text_fields()
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            BookBody.objects.store([self], using=self._state.db)
+        self._content_changed = False
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if not fields:
+            self.__dict__.pop("_content", None)
+            self.__dict__.pop("_content_changed", None)
+            self.__dict__.pop("_plain_text", None)
+            self.__dict__.pop("_source_text", None)
+
+
+class BookBodyQuerySet(models.QuerySet):
+    def store(self, books, using=None):
+        """Write the text of several books at once, after ``Book.derive_text_fields()``.
+
+        Compresses the text (and the plain text of HTML books, and the text as
+        written when sanitizing changed it) with ``BOOK_BODY_CODEC``, upserts the bodies, deletes those of books without
+        text and indexes the plain text, in three queries at most.
+        """
+        using = using or self.db
+        codec = settings.BOOK_BODY_CODEC
+        bodies = []
+        cleared = []
+        plain_texts = {}
+        for book in books:
+            plain_texts[book.pk] = book._plain_text
+            if book.content is None:
+                cleared.append(book.pk)
+                continue
+            # Plain-text books store their text once; plain_data stays NULL.
+            plain = compress_text(book._plain_text, codec) if book.content_format == "html" else None
+            data = compress_text(book.content, codec)
+            source = book.__dict__.get("_source_text")
+            bodies.append(
+                BookBody(
+                    book_id=book.pk,
+                    codec=codec,
+                    data=data,
+                    plain_data=plain,
+                    source_data=compress_text(source, codec) if source is not None else None,
+                    length=len(book.content),
+                )
+            )
+        with transaction.atomic(using=using, savepoint=False):
+            if bodies:
+                self.using(using).bulk_create(
+                    bodies,
+                    update_conflicts=True,
+                    unique_fields=["book"],
+                    update_fields=["codec", "data", "plain_data", "source_data", "length"],
+                )
+            if cleared:
+                self.using(using).filter(book_id__in=cleared).delete()
+            index_book_text(plain_texts, using)
+
+
+class BookBody(models.Model):
+    """Compressed text of a book, kept off ``content_book`` so metadata rows stay small."""
+
+    book = models.OneToOneField(Book, primary_key=True, related_name="body", on_delete=models.CASCADE)
+    codec = models.CharField(max_length=16)
+    data = models.BinaryField()
+    plain_data = models.BinaryField(blank=True, null=True, help_text="Plain text of HTML books, same codec")
+    # Kept so that a later fix to the sanitizer can derive the text again from what was written.
+    source_data = models.BinaryField(
+        blank=True, null=True, help_text="Text as written, when sanitizing changed it, same codec"
+    )
+    length = models.PositiveIntegerField(help_text="Length of the text in characters")
+
+    objects = BookBodyQuerySet.as_manager()
+
+    def __str__(self):
+        return f"Text of {self.book_id}"
+
+    @property
+    def text(self):
+        return decompress_text(self.data, self.codec)
+
+    @property
+    def plain_text(self):
+        return decompress_text(self.plain_data, self.codec) if self.plain_data is not None else self.text
+
+    @property
+    def source_text(self):
+        return decompress_text(self.source_data, self.codec) if self.source_data is not None else self.text
+
 
 class Partner(TimeStampedModel):
     name = models.CharField(max_length=255)
     logo = models.ImageField(upload_to="partners/", blank=True, null=True)
+    logo_renditions = models.JSONField(default=dict, blank=True, editable=False)
     legacy_logo_url = models.URLField(blank=True, null=True, help_text="Previous URL-based logo")
     website_url = models.URLField(blank=True, null=True)
 
+    UPLOAD_FIELD = "logo"
+
     class Meta(TimeStampedModel.Meta):
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["name", "id"], name="partner_name_id_idx"),
+            models.Index(fields=["updated_at", "id"], name="partner_updated_at_id_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -64,10 +283,60 @@ class TeamMember(TimeStampedModel):
     name = models.CharField(max_length=255)
     role = models.CharField(max_length=255)
     photo = models.ImageField(upload_to="team/", blank=True, null=True)
+    photo_renditions = models.JSONField(default=dict, blank=True, editable=False)
     legacy_photo_url = models.URLField(blank=True, null=True, help_text="Previous URL-based photo")
 
+    UPLOAD_FIELD = "photo"
+
     class Meta(TimeStampedModel.Meta):
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["name", "id"], name="teammember_name_id_idx"),
+            models.Index(fields=["updated_at", "id"], name="teammember_updated_at_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.role})"
+
+
+class Tombstone(models.Model):
+    """A deleted content row, kept so that ``/api/sync/`` can tell clients to drop it.
+
+    Written by a ``post_delete`` signal; ``manage.py prune_tombstones`` removes
+    entries older than ``SYNC_TOMBSTONE_DAYS``.
+    """
+
+    model = models.CharField(max_length=100, help_text="Model label, such as content.book")
+    object_id = models.UUIDField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["deleted_at"]
+        indexes = [models.Index(fields=["model", "deleted_at"], name="tombstone_model_deleted_idx")]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted at {self.deleted_at:%Y-%m-%d %H:%M:%S}"
+
+
+class Blob(models.Model):
+    """An uploaded file, stored once under its SHA-256 by :class:`~content.storage.BlobStorage`.
+
+    ``ref_count`` is the number of books, partners and team members whose
+    image is this file, maintained by ``content.blobs``. ``manage.py
+    gc_blobs`` recounts it and deletes blobs nobody has referenced or
+    re-uploaded for ``MEDIA_BLOB_GRACE_HOURS``.
+    """
+
+    digest = models.CharField(max_length=64, primary_key=True, help_text="SHA-256 of the file")
+    name = models.CharField(max_length=100, help_text="Storage name, such as blobs/ab/ab12…ef.png")
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    last_saved_at = models.DateTimeField(default=timezone.now, help_text="Last time these bytes were uploaded")
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["ref_count", "last_saved_at"], name="blob_ref_count_saved_idx")]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
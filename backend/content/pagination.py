@@ -0,0 +1,162 @@
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Opt-in cursor pagination over a unique ordering.
+
+    Pages are only produced when the client sends ``cursor`` or ``page_size``;
+    everyone else keeps getting the plain, unpaginated list. The last field of
+    ``ordering`` must be unique so that every row has a distinct position.
+    """
+
+    ordering = ("-created_at", "-id")
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    page_size = 50
+    max_page_size = 200
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.limit = self.get_page_size(request)
+        self.position, self.reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = self._reversed_ordering() if self.reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._after(self.position, ordering))
+
+        rows = list(queryset[: self.limit + 1])
+        has_more = len(rows) > self.limit
+        rows = rows[: self.limit]
+        if self.reverse:
+            rows.reverse()
+
+        has_marker = self.position is not None
+        self.has_next = has_marker if self.reverse else has_more
+        self.has_previous = has_more if self.reverse else has_marker
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.page_size
+        try:
+            size = int(raw)
+        except ValueError:
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self._position_of(self.page[-1])
+        else:
+            position = self.position
+        return self.encode_cursor(position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.page:
+            position = self._position_of(self.page[0])
+        else:
+            position = self.position
+        return self.encode_cursor(position, reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        payload = {"p": position}
+        if reverse:
+            payload["r"] = 1
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+        url = replace_query_param(self.base_url, self.cursor_query_param, token)
+        return replace_query_param(url, self.page_size_query_param, self.limit)
+
+    def decode_cursor(self, request, model):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            values = payload["p"]
+            reverse = bool(payload.get("r"))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                model._meta.get_field(name.lstrip("-")).to_python(value)
+                for name, value in zip(self.ordering, values)
+            ]
+        except (binascii.Error, DjangoValidationError, KeyError, TypeError, ValueError):
+            raise ValidationError({self.cursor_query_param: [self.invalid_cursor_message]})
+        if any(value is None for value in position):
+            raise ValidationError({self.cursor_query_param: [self.invalid_cursor_message]})
+        return position, reverse
+
+    def _position_of(self, obj):
+        position = []
+        for name in self.ordering:
+            # Rows are model instances or, on the fast read path, .values() dicts.
+            value = obj[name.lstrip("-")] if isinstance(obj, dict) else getattr(obj, name.lstrip("-"))
+            position.append(value.isoformat() if hasattr(value, "isoformat") else str(value))
+        return position
+
+    def _reversed_ordering(self):
+        return tuple(name[1:] if name.startswith("-") else f"-{name}" for name in self.ordering)
+
+    @staticmethod
+    def _after(position, ordering):
+        # (a, b) after (x, y) means a > x OR (a = x AND b > y), with the
+        # comparison flipped for descending fields.
+        condition = Q()
+        equal = Q()
+        for name, value in zip(ordering, position):
+            field = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            condition |= equal & Q(**{f"{field}__{lookup}": value})
+            equal &= Q(**{field: value})
+        return condition
+
+
+class NameKeysetPagination(KeysetPagination):
+    ordering = ("name", "id")
@@ -0,0 +1,192 @@
+"""Read replicas for the content API.
+
+With ``DATABASE_REPLICA_URLS`` set, ``GET``/``HEAD`` requests that a viewset
+answers with ``list`` or ``retrieve`` read the ``content`` tables from one of
+the replica aliases; everything else, including the admin, sessions and every
+write, uses ``default``. :class:`ReplicaRoutingMiddleware` decides per request
+and keeps clients that just wrote on the primary for ``REPLICA_STICKY_SECONDS``
+through a cookie, so they read their own writes despite replication lag.
+
+A replica is checked before use at most every ``REPLICA_HEALTH_CHECK_INTERVAL``
+seconds; one that cannot be reached, or whose queries fail with a connection
+error, is skipped for ``REPLICA_RETRY_SECONDS``. When no replica is healthy,
+reads go to the primary.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DEFAULT_DB_ALIAS, InterfaceError, OperationalError, connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+STICKY_COOKIE = "spark_primary_until"
+REPLICA_ACTIONS = ("list", "retrieve")
+ROUTED_APPS = ("content",)
+
+# True while the current request may read from a replica.
+_replica_reads = ContextVar("replica_reads", default=False)
+_round_robin = itertools.count()
+# alias -> time.monotonic() until which the replica is skipped / trusted.
+_down_until = {}
+_checked_until = {}
+
+
+def replica_aliases():
+    return getattr(settings, "DATABASE_REPLICAS", [])
+
+
+def mark_down(alias, reason):
+    if _down_until.get(alias, 0) <= time.monotonic():
+        logger.warning("Replica %s is unavailable (%s); reading from other databases", alias, reason)
+    _down_until[alias] = time.monotonic() + settings.REPLICA_RETRY_SECONDS
+    _checked_until.pop(alias, None)
+
+
+def is_healthy(alias):
+    now = time.monotonic()
+    if _down_until.get(alias, 0) > now:
+        return False
+    if _in_event_loop():
+        # Connecting is not allowed here; async queries run in a thread, where
+        # failures still mark the replica down.
+        return True
+    connection = connections[alias]
+    # Connections are per thread: a thread without one connects (and so checks) first.
+    if connection.connection is None or _checked_until.get(alias, 0) <= now:
+        try:
+            connection.ensure_connection()
+            if not connection.is_usable():
+                raise OperationalError("connection is not usable")
+        except (OperationalError, InterfaceError) as exc:
+            connection.close()
+            mark_down(alias, exc)
+            return False
+        _checked_until[alias] = now + settings.REPLICA_HEALTH_CHECK_INTERVAL
+    return True
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def pick_replica():
+    """Return the next healthy replica alias in round-robin order, or ``None``."""
+    aliases = replica_aliases()
+    if not aliases:
+        return None
+    start = next(_round_robin)
+    for offset in range(len(aliases)):
+        alias = aliases[(start + offset) % len(aliases)]
+        if is_healthy(alias):
+            return alias
+    return None
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside the block, whatever the request allows."""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def _mark_down_on_failure(execute, sql, params, many, context):
+    try:
+        return execute(sql, params, many, context)
+    except (OperationalError, InterfaceError) as exc:
+        mark_down(context["connection"].alias, exc)
+        raise
+
+
+def _install_failure_detector(sender=None, connection=None, **kwargs):
+    if connection.alias in replica_aliases() and _mark_down_on_failure not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_mark_down_on_failure)
+
+
+def _end_replica_reads(sender=None, **kwargs):
+    # Streaming responses still query after the middleware returns, so the
+    # flag is cleared when the response is closed rather than right away.
+    _replica_reads.set(False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and model._meta.app_label in ROUTED_APPS:
+            return pick_replica()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Without this, saving an object read from a replica would write there.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
+
+
+def is_sticky(request):
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRoutingMiddleware:
+    """Allow replica reads for API list/retrieve requests and make writers sticky."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(_install_failure_detector, dispatch_uid="content.routers.failure_detector")
+        request_finished.connect(_end_replica_reads, dispatch_uid="content.routers.end_replica_reads")
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        _replica_reads.set(False)
+        return self._finish(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        _replica_reads.set(False)
+        return self._finish(request, await self.get_response(request))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # DRF viewset views (and the async endpoints) expose their method -> action map.
+        actions = getattr(view_func, "actions", None) or {}
+        method = "get" if request.method == "HEAD" else request.method.lower()
+        if actions.get(method) in REPLICA_ACTIONS and not is_sticky(request):
+            _replica_reads.set(True)
+
+    def _finish(self, request, response):
+        if request.method not in ("GET", "HEAD", "OPTIONS", "TRACE") and response.status_code < 400:
+            window = settings.REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                STICKY_COOKIE, str(int(time.time() + window)), max_age=window, httponly=True, samesite="Lax"
+            )
+        return response
@@ -0,0 +1,244 @@
+"""Full-text search over books.
+
+PostgreSQL keeps a weighted ``tsvector`` column with a GIN index on
+``content_book``; SQLite keeps an FTS5 shadow table. Database triggers keep
+the title, author and description in sync no matter how rows are written.
+Book text is stored compressed (see ``BookBody``), so the database cannot read
+it: :func:`index_book_text` feeds its plain text to the index whenever it is
+written, which ``BookBody.objects.store()`` does. Other databases fall back to
+``icontains`` lookups on the metadata.
+"""
+
+import html
+import re
+import uuid
+from dataclasses import dataclass
+
+from django.db import connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .text import decompress_text
+
+SNIPPET_START = "\x02"
+SNIPPET_STOP = "\x03"
+# Only the beginning of the text is searched for highlights; ts_headline
+# re-parses its input, so handing it a whole book would be expensive.
+SNIPPET_SOURCE_CHARS = 20000
+# Book text is capped before indexing so that a very long book cannot exceed
+# PostgreSQL's 1MB tsvector limit.
+INDEXED_CONTENT_CHARS = 2000000
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    book_id: uuid.UUID
+    rank: float
+    snippet: str | None
+
+
+def format_snippet(raw):
+    """Escape a snippet and turn the backend's match markers into ``<mark>`` tags."""
+    if not raw:
+        return None
+    escaped = html.escape(raw, quote=False)
+    return escaped.replace(SNIPPET_START, "<mark>").replace(SNIPPET_STOP, "</mark>")
+
+
+class IndexedBookSearch:
+    def filter(self, queryset, query):
+        sql, params = self.match_sql(query)
+        return queryset.filter(pk__in=RawSQL(sql, params))
+
+    def match_sql(self, query):
+        raise NotImplementedError
+
+
+class PostgresBookSearch(IndexedBookSearch):
+    def match_sql(self, query):
+        return (
+            "SELECT id FROM content_book WHERE search_vector @@ websearch_to_tsquery('simple', %s)",
+            [query],
+        )
+
+    def rank(self, query, limit):
+        # Only a prefix of each compressed plain text is read (the columns are
+        # stored uncompressed by PostgreSQL, so substring() fetches just those chunks).
+        sql = """
+            SELECT ranked.id, ranked.rank, coalesce(book.description, ''), body.codec,
+                   substring(coalesce(body.plain_data, body.data) from 1 for %s)
+            FROM (
+                SELECT id, ts_rank(search_vector, query) AS rank
+                FROM content_book, websearch_to_tsquery('simple', %s) AS query
+                WHERE search_vector @@ query
+                ORDER BY rank DESC
+                LIMIT %s
+            ) AS ranked
+            JOIN content_book AS book ON book.id = ranked.id
+            LEFT JOIN content_bookbody AS body ON body.book_id = ranked.id
+            ORDER BY ranked.rank DESC
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [SNIPPET_SOURCE_CHARS, query, limit])
+            rows = cursor.fetchall()
+            if not rows:
+                return []
+            documents = [
+                f"{description} {decompress_text(head, codec, SNIPPET_SOURCE_CHARS) if head is not None else ''}"
+                for _, _, description, codec, head in rows
+            ]
+            options = f"StartSel={SNIPPET_START}, StopSel={SNIPPET_STOP}, MaxWords=35, MinWords=15"
+            cursor.execute(
+                """
+                SELECT ts_headline('simple', document, websearch_to_tsquery('simple', %s), %s)
+                FROM unnest(%s::text[]) WITH ORDINALITY AS documents(document, position)
+                ORDER BY position
+                """,
+                [query, options, documents],
+            )
+            snippets = [row[0] for row in cursor.fetchall()]
+        return [SearchHit(row[0], float(row[1]), format_snippet(snippet)) for row, snippet in zip(rows, snippets)]
+
+
+class SqliteBookSearch(IndexedBookSearch):
+    # bm25() weights for book_id, title, author, description, content.
+    weights = "0.0, 10.0, 10.0, 4.0, 1.0"
+
+    @staticmethod
+    def to_match_expression(query):
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return None
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += "*"
+        return " ".join(quoted)
+
+    def match_sql(self, query):
+        expression = self.to_match_expression(query)
+        if expression is None:
+            return "SELECT NULL WHERE 0", []
+        return "SELECT book_id FROM content_book_fts WHERE content_book_fts MATCH %s", [expression]
+
+    def rank(self, query, limit):
+        expression = self.to_match_expression(query)
+        if expression is None:
+            return []
+        sql = f"""
+            SELECT book_id, -bm25(content_book_fts, {self.weights}) AS rank,
+                   snippet(content_book_fts, -1, %s, %s, '…', 24)
+            FROM content_book_fts
+            WHERE content_book_fts MATCH %s
+            ORDER BY rank DESC
+            LIMIT %s
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [SNIPPET_START, SNIPPET_STOP, expression, limit])
+            return [SearchHit(uuid.UUID(row[0]), float(row[1]), format_snippet(row[2])) for row in cursor.fetchall()]
+
+
+class FallbackBookSearch:
+    def filter(self, queryset, query):
+        return queryset.filter(
+            Q(title__icontains=query) | Q(author__icontains=query) | Q(description__icontains=query)
+        )
+
+    def rank(self, query, limit):
+        from .models import Book
+
+        ids = self.filter(Book.objects.all(), query).values_list("id", flat=True)[:limit]
+        return [SearchHit(book_id, 0.0, None) for book_id in ids]
+
+
+# SQLite drops a table's triggers whenever a migration rebuilds the table, so
+# they are recreated after every migrate run (see content.signals). The text
+# column of the FTS table is written by index_book_text().
+SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS content_book_fts_insert AFTER INSERT ON content_book BEGIN
+        INSERT INTO content_book_fts (book_id, title, author, description, content)
+        VALUES (new.id, new.title, new.author, coalesce(new.description, ''), '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS content_book_fts_update
+    AFTER UPDATE OF title, author, description ON content_book BEGIN
+        UPDATE content_book_fts
+        SET title = new.title, author = new.author, description = coalesce(new.description, '')
+        WHERE book_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS content_book_fts_delete AFTER DELETE ON content_book BEGIN
+        DELETE FROM content_book_fts WHERE book_id = old.id;
+    END
+    """,
+]
+
+
+def index_book_text(texts, using):
+    """Index new book text; ``texts`` maps book ids to the plain text, or ``None`` once removed.
+
+    On PostgreSQL the lexemes go to ``content_bookbody.search_vector``, which a
+    trigger merges into the book's ``search_vector``.
+    """
+    if not texts:
+        return
+    target = connections[using]
+    if target.vendor == "postgresql":
+        ids = [str(book_id) for book_id in texts]
+        documents = [text or "" for text in texts.values()]
+        with target.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE content_bookbody AS body
+                SET search_vector = strip(to_tsvector('simple', left(texts.text, %s)))
+                FROM unnest(%s::uuid[], %s::text[]) AS texts(book_id, text)
+                WHERE body.book_id = texts.book_id
+                """,
+                [INDEXED_CONTENT_CHARS, ids, documents],
+            )
+    elif target.vendor == "sqlite":
+        with target.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'content_book_fts'")
+            if cursor.fetchone() is None:
+                return
+            cursor.executemany(
+                "UPDATE content_book_fts SET content = %s WHERE book_id = %s",
+                [(text or "", uuid.UUID(str(book_id)).hex) for book_id, text in texts.items()],
+            )
+
+
+def ensure_sqlite_triggers(using):
+    target = connections[using]
+    if target.vendor != "sqlite":
+        return
+    with target.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'content_book_fts'")
+        if cursor.fetchone() is None:
+            return
+        for statement in SQLITE_TRIGGERS:
+            cursor.execute(statement)
+
+
+def get_backend():
+    if connection.vendor == "postgresql":
+        return PostgresBookSearch()
+    if connection.vendor == "sqlite" and _sqlite_index_exists():
+        return SqliteBookSearch()
+    return FallbackBookSearch()
+
+
+def _sqlite_index_exists():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'content_book_fts'")
+        return cursor.fetchone() is not None
+
+
+def filter_books(queryset, query):
+    """Restrict ``queryset`` to books matching ``query`` through the search index."""
+    return get_backend().filter(queryset, query)
+
+
+def rank_books(query, limit):
+    """Return up to ``limit`` best matches for ``query``, best first."""
+    return get_backend().rank(query, limit)
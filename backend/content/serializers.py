@@ -1,32 +1,163 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 
+from . import images, metrics
 from .models import Book, Category, Partner, TeamMember
 
 
-class CategorySerializer(serializers.ModelSerializer):
+def requested_fields(request):
+    """Return the set of names from ``?fields=a,b`` or ``None`` when not given."""
+    if request is None or request.method not in ("GET", "HEAD"):
+        return None
+    raw = request.query_params.get("fields")
+    if not raw:
+        return None
+    return {name.strip() for name in raw.split(",") if name.strip()}
+
+
+def describe_renditions(data, request):
+    def url_for(name):
+        url = default_storage.url(name)
+        return request.build_absolute_uri(url) if request else url
+
+    return images.describe(data, url_for)
+
+
+class TimedSerializerMixin:
+    """Report the time spent producing ``.data`` to the metrics middleware.
+
+    Pair it with ``Meta.list_serializer_class = TimedListSerializer`` so that
+    ``many=True`` serializers are timed as well.
+    """
+
+    @property
+    def data(self):
+        with metrics.stage("serialize"):
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class BulkListSerializer(TimedListSerializer):
+    """List serializer used by the ``bulk/`` endpoints.
+
+    Unlike ``is_valid()``, ``validate_items()`` keeps going past invalid
+    items so that the valid ones can still be written. Related rows referenced
+    through ``PrefetchedPrimaryKeyRelatedField`` are loaded once for the whole
+    list. For updates, pass ``instance`` as a ``{str(pk): object}`` mapping.
+    """
+
+    def validate_items(self):
+        """Return ``(validated_data, errors)`` per item; exactly one of them is ``None``."""
+        self._prefetch_related()
+        results = []
+        for item in self.initial_data:
+            try:
+                results.append((self.run_child_validation(item), None))
+            except serializers.ValidationError as exc:
+                results.append((None, exc.detail))
+        return results
+
+    def run_child_validation(self, data):
+        if isinstance(self.instance, dict):
+            self.child.instance = self.instance.get(str(data.get("id"))) if isinstance(data, dict) else None
+            self.child.initial_data = data
+        return super().run_child_validation(data)
+
+    def _prefetch_related(self):
+        prefetched = self._context.setdefault("prefetched", {})
+        for name, field in self.child.fields.items():
+            if not isinstance(field, PrefetchedPrimaryKeyRelatedField) or field.read_only:
+                continue
+            model = field.queryset.model
+            keys = set()
+            for item in self.initial_data:
+                value = item.get(name) if isinstance(item, dict) else None
+                try:
+                    keys.add(model._meta.pk.to_python(value))
+                except (DjangoValidationError, TypeError, ValueError):
+                    continue
+            keys.discard(None)
+            prefetched.setdefault(model, {}).update(field.queryset.in_bulk(keys) if keys else {})
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Look related rows up in ``context["prefetched"]`` when a bulk request loaded them."""
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get("prefetched", {}).get(self.queryset.model)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        try:
+            pk = self.queryset.model._meta.pk.to_python(data)
+        except (DjangoValidationError, TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in prefetched:
+            self.fail("does_not_exist", pk_value=data)
+        return prefetched[pk]
+
+
+class SparseFieldsetMixin:
+    """Drop any fields not listed in the ``?fields=`` query parameter on reads."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        allowed = requested_fields(self.context.get("request"))
+        if allowed is None:
+            return
+        for name in set(self.fields) - allowed:
+            self.fields.pop(name)
+
+
+class CategorySerializer(SparseFieldsetMixin, TimedSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        list_serializer_class = TimedListSerializer
+        fields = ["id", "name", "description", "book_count", "latest_book_at", "created_at", "updated_at"]
+
+
+class BookCategorySerializer(serializers.ModelSerializer):
+    """The category embedded in a book, without the counters that change with every book in it."""
+
     class Meta:
         model = Category
         fields = ["id", "name", "description", "created_at", "updated_at"]
 
 
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(SparseFieldsetMixin, TimedSerializerMixin, serializers.ModelSerializer):
+    # Stored compressed in BookBody; Book.content reads and writes it.
+    content = serializers.CharField(
+        required=False, allow_null=True, allow_blank=True, style={"base_template": "textarea.html"}
+    )
     cover_image = serializers.ImageField(required=False, allow_null=True)
     cover_image_url = serializers.SerializerMethodField()
-    category = CategorySerializer(read_only=True)
-    category_id = serializers.PrimaryKeyRelatedField(
+    cover_image_renditions = serializers.SerializerMethodField()
+    category = BookCategorySerializer(read_only=True)
+    category_id = PrefetchedPrimaryKeyRelatedField(
         queryset=Category.objects.all(), source="category", required=False, allow_null=True
     )
 
     class Meta:
         model = Book
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "title",
             "author",
             "description",
             "content",
+            "content_pages",
+            "content_format",
+            "word_count",
+            "reading_minutes",
+            "table_of_contents",
+            "content_hash",
             "cover_image",
             "cover_image_url",
+            "cover_image_renditions",
             "legacy_cover_image_url",
             "category_id",
             "category",
@@ -46,18 +177,53 @@ class BookSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(url)
         return url
 
+    def get_cover_image_renditions(self, obj):
+        return describe_renditions(obj.cover_image_renditions, self.context.get("request"))
+
+
+class BookSummarySerializer(BookSerializer):
+    """Card-sized representation of a book used by the list endpoint."""
 
-class PartnerSerializer(serializers.ModelSerializer):
+    class Meta(BookSerializer.Meta):
+        fields = [
+            name
+            for name in BookSerializer.Meta.fields
+            if name not in ("content", "content_pages", "table_of_contents")
+        ]
+
+
+class BookSearchResultSerializer(BookSummarySerializer):
+    """Book summary plus the relevance score and highlighted snippet of a search hit."""
+
+    search_rank = serializers.SerializerMethodField()
+    search_snippet = serializers.SerializerMethodField()
+
+    class Meta(BookSummarySerializer.Meta):
+        fields = BookSummarySerializer.Meta.fields + ["search_rank", "search_snippet"]
+
+    def get_search_rank(self, obj):
+        hit = self.context.get("search_hits", {}).get(obj.pk)
+        return hit.rank if hit else None
+
+    def get_search_snippet(self, obj):
+        hit = self.context.get("search_hits", {}).get(obj.pk)
+        return hit.snippet if hit else None
+
+
+class PartnerSerializer(SparseFieldsetMixin, TimedSerializerMixin, serializers.ModelSerializer):
     logo = serializers.ImageField(required=False, allow_null=True)
     logo_url = serializers.SerializerMethodField()
+    logo_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = Partner
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "name",
             "logo",
             "logo_url",
+            "logo_renditions",
             "legacy_logo_url",
             "website_url",
             "created_at",
@@ -76,19 +242,25 @@ class PartnerSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(url)
         return url
 
+    def get_logo_renditions(self, obj):
+        return describe_renditions(obj.logo_renditions, self.context.get("request"))
 
-class TeamMemberSerializer(serializers.ModelSerializer):
+
+class TeamMemberSerializer(SparseFieldsetMixin, TimedSerializerMixin, serializers.ModelSerializer):
     photo = serializers.ImageField(required=False, allow_null=True)
     photo_url = serializers.SerializerMethodField()
+    photo_renditions = serializers.SerializerMethodField()
 
     class Meta:
         model = TeamMember
+        list_serializer_class = TimedListSerializer
         fields = [
             "id",
             "name",
             "role",
             "photo",
             "photo_url",
+            "photo_renditions",
             "legacy_photo_url",
             "created_at",
             "updated_at",
@@ -105,3 +277,6 @@ class TeamMemberSerializer(serializers.ModelSerializer):
         if request:
             return request.build_absolute_uri(url)
         return url
+
+    def get_photo_renditions(self, obj):
+        return describe_renditions(obj.photo_renditions, self.context.get("request"))
@@ -0,0 +1,114 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import blobs, counters, images, snapshots
+from .cache import bump_generation
+from .models import Book, Category, Partner, TeamMember, Tombstone
+from .search import ensure_sqlite_triggers
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Partner)
+@receiver(post_delete, sender=Partner)
+@receiver(post_save, sender=TeamMember)
+@receiver(post_delete, sender=TeamMember)
+def invalidate_cached_responses(sender, **kwargs):
+    # Book responses depend on the Category generation too, which also covers
+    # the SET_NULL update Django issues on books when a category is deleted.
+    transaction.on_commit(lambda: bump_generation(sender))
+
+
+# Connected before count_saved_book, which forgets the category a book was loaded with.
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Partner)
+@receiver(post_save, sender=TeamMember)
+def publish_saved_snapshots(sender, instance, created=False, raw=False, using=None, **kwargs):
+    if not raw:
+        snapshots.schedule(sender, [instance], using=using, created=created)
+
+
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Partner)
+@receiver(post_delete, sender=TeamMember)
+def publish_deleted_snapshots(sender, instance, using=None, **kwargs):
+    snapshots.schedule(sender, [instance], using=using, deleted=True)
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_books(sender, instance, using=None, **kwargs):
+    # After the delete the books no longer point at the category, but their snapshots embed it.
+    if settings.API_SNAPSHOTS_ON_COMMIT:
+        instance._book_ids = list(Book.objects.using(using).filter(category=instance).values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Book)
+def count_saved_book(sender, instance, created, raw=False, using=None, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and "category" not in update_fields):
+        return
+    if created:
+        counters.adjust_category(instance.category_id, 1, using=using)
+    elif "_loaded_category_id" not in instance.__dict__:
+        # Not loaded with its category: recount the category it has now.
+        counters.refresh_categories([instance.category_id], using=using)
+    elif instance._loaded_category_id != instance.category_id:
+        counters.adjust_category(instance._loaded_category_id, -1, using=using)
+        counters.adjust_category(instance.category_id, 1, using=using)
+    instance._loaded_category_id = instance.category_id
+
+
+@receiver(post_delete, sender=Book)
+def count_deleted_book(sender, instance, using=None, **kwargs):
+    counters.adjust_category(instance.__dict__.get("_loaded_category_id", instance.category_id), -1, using=using)
+
+
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Partner)
+@receiver(post_delete, sender=TeamMember)
+def record_tombstone(sender, instance, using=None, **kwargs):
+    Tombstone.objects.using(using).create(model=sender._meta.label_lower, object_id=instance.pk)
+
+
+@receiver(pre_delete, sender=Category)
+def touch_category_books(sender, instance, using=None, **kwargs):
+    # SET_NULL clears category_id without touching updated_at, which would keep
+    # the books out of the ?updated_since= feeds.
+    Book.objects.using(using).filter(category=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Partner)
+@receiver(post_save, sender=TeamMember)
+def count_blob_references(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and sender.UPLOAD_FIELD not in update_fields):
+        return
+    blobs.track([instance], using=using)
+
+
+@receiver(post_delete, sender=Book)
+@receiver(post_delete, sender=Partner)
+@receiver(post_delete, sender=TeamMember)
+def release_blob_references(sender, instance, using=None, **kwargs):
+    blobs.track([instance], using=using, deleted=True)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_save, sender=Partner)
+@receiver(post_save, sender=TeamMember)
+def schedule_renditions(sender, instance, raw=False, **kwargs):
+    if not raw and images.needs_renditions(instance):
+        images.schedule(sender, instance.pk)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    if sender.name == "content":
+        ensure_sqlite_triggers(using)
@@ -0,0 +1,323 @@
+"""Static JSON snapshots of the public read API.
+
+``manage.py publish_snapshots`` renders every public read through the real
+views: the four lists, bootstrap, ``/api/books/?category_id=`` for each
+category and each book detail. Each body is written under
+``API_SNAPSHOT_ROOT`` along with its gzip copy and, when the ``brotli``
+package is installed, its brotli copy, so that a static web server can answer
+these reads on its own:
+
+- ``api/books/index.json`` for ``/api/books/``,
+- ``api/books/category_id/<id>.json`` for ``/api/books/?category_id=<id>``,
+- ``api/books/<id>/index.json`` for ``/api/books/<id>/``.
+
+Every body is first stored under a content-hashed name such as
+``index.3f2a9c0d1b7e.json``, which never changes and can be cached forever.
+The plain name is then swapped to a hard link of it with an atomic rename, so
+readers never see a partial file. ``manifest.json`` maps each URL to its
+hashed file. A body whose hash is already published is not written again.
+
+With ``API_SNAPSHOTS_ON_COMMIT`` on, saving or deleting a row republishes
+only the snapshots that row appears in, once the transaction commits, on one
+background thread.
+"""
+
+import fcntl
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.test import RequestFactory
+
+from .models import Book, Category, Partner, TeamMember
+
+try:
+    import brotli
+except ImportError:  # optional, only needed for the .br copies
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+BOOKS_URL = "/api/books/"
+CATEGORIES_URL = "/api/categories/"
+BOOTSTRAP_URL = "/api/bootstrap/"
+LIST_URLS = {
+    Book: BOOKS_URL,
+    Category: CATEGORIES_URL,
+    Partner: "/api/partners/",
+    TeamMember: "/api/team-members/",
+}
+BOOK_URL_RE = re.compile(r"^/api/books/(?P<pk>[0-9a-f-]{36})/$")
+CATEGORY_BOOKS_URL_RE = re.compile(r"^/api/books/\?category_id=(?P<pk>[0-9a-f-]{36})$")
+HASHED_FILE_RE = re.compile(r"\.[0-9a-f]{12}\.json(\.gz|\.br)?$")
+MANIFEST = "manifest.json"
+GZIP_LEVEL = 9
+# Quality 11 is several times slower on book-sized bodies for a few percent.
+BROTLI_QUALITY = 9
+# Hashed files replaced by a newer body stay this long for clients that still hold the old manifest.
+SUPERSEDED_KEEP_SECONDS = 3600
+
+
+def book_url(pk):
+    return f"{BOOKS_URL}{pk}/"
+
+
+def category_books_url(pk):
+    return f"{BOOKS_URL}?category_id={pk}"
+
+
+def snapshot_name(url):
+    """The file, relative to ``API_SNAPSHOT_ROOT``, that holds the body of ``url``."""
+    path, _, query = url.partition("?")
+    directory = path.strip("/")
+    if query:
+        key, _, value = query.partition("=")
+        return f"{directory}/{key}/{value}.json"
+    return f"{directory}/index.json"
+
+
+def all_urls():
+    urls = [*LIST_URLS.values(), BOOTSTRAP_URL]
+    urls.extend(category_books_url(pk) for pk in Category.objects.values_list("pk", flat=True))
+    urls.extend(book_url(pk) for pk in Book.objects.order_by().values_list("pk", flat=True).iterator())
+    return urls
+
+
+def affected_urls(model, instances, created=False, deleted=False):
+    """The snapshots that change when ``instances`` of ``model`` are saved or deleted."""
+    urls = {LIST_URLS[model], BOOTSTRAP_URL}
+    if model is Book:
+        # The counters of their categories are in the categories list; books embed their category without them.
+        urls.add(CATEGORIES_URL)
+        category_ids = set()
+        unknown_origin = False
+        for book in instances:
+            urls.add(book_url(book.pk))
+            category_ids.add(book.category_id)
+            if "_loaded_category_id" in book.__dict__:
+                category_ids.add(book._loaded_category_id)
+            elif not (created or deleted):
+                unknown_origin = True
+        if unknown_origin:
+            # A book not loaded with its category may have left any category list.
+            category_ids.update(Category.objects.values_list("pk", flat=True))
+        category_ids.discard(None)
+        urls.update(category_books_url(pk) for pk in category_ids)
+    elif model is Category:
+        urls.add(BOOKS_URL)
+        for category in instances:
+            urls.add(category_books_url(category.pk))
+            # Collected before the delete, while the books still point at the category.
+            book_ids = category.__dict__.get("_book_ids")
+            if book_ids is None:
+                book_ids = Book.objects.filter(category=category).values_list("pk", flat=True)
+            urls.update(book_url(pk) for pk in book_ids)
+    return urls
+
+
+class Publisher:
+    """Render API URLs through their views and publish the bodies under ``root``."""
+
+    def __init__(self, root=None, base_url=None):
+        from .bootstrap import BootstrapView
+        from .views import BookViewSet, CategoryViewSet, PartnerViewSet, TeamMemberViewSet
+
+        self.root = Path(root or settings.API_SNAPSHOT_ROOT)
+        parts = urlsplit(base_url or settings.API_SNAPSHOT_BASE_URL)
+        self.factory = RequestFactory(HTTP_HOST=parts.netloc, HTTP_ACCEPT="application/json")
+        self.secure = parts.scheme == "https"
+        self.views = {
+            BOOKS_URL: BookViewSet.as_view({"get": "list"}, basename="book"),
+            CATEGORIES_URL: CategoryViewSet.as_view({"get": "list"}, basename="category"),
+            LIST_URLS[Partner]: PartnerViewSet.as_view({"get": "list"}, basename="partner"),
+            LIST_URLS[TeamMember]: TeamMemberViewSet.as_view({"get": "list"}, basename="team-member"),
+            BOOTSTRAP_URL: BootstrapView.as_view(),
+        }
+        self.book_view = BookViewSet.as_view({"get": "retrieve"}, basename="book")
+        self.manifest = {}
+
+    def render(self, url):
+        """Return the body of ``url``, or ``None`` if it does not exist (any longer)."""
+        request = self.factory.get(url, secure=self.secure)
+        path = url.partition("?")[0]
+        match = BOOK_URL_RE.match(url)
+        if match:
+            response = self.book_view(request, pk=match["pk"])
+        elif path in self.views and (path == url or CATEGORY_BOOKS_URL_RE.match(url)):
+            response = self.views[path](request)
+        else:
+            raise ValueError(f"{url} is not a published API read")
+        if response.status_code == 404:
+            return None
+        if hasattr(response, "render"):
+            response.render()
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} answered {response.status_code}: {response.content[:300]!r}")
+        return response.content
+
+    def publish(self, urls, prune=False):
+        """Render and publish ``urls``; with ``prune``, ``urls`` is everything and the rest is removed.
+
+        Returns ``(written, unchanged, removed)`` counts.
+        """
+        written = unchanged = removed = 0
+        with self.locked():
+            self.manifest = self.read_manifest()
+            for url in urls:
+                body = self.render(url)
+                if body is None:
+                    removed += self.remove(url)
+                elif self.write(url, body):
+                    written += 1
+                else:
+                    unchanged += 1
+            if prune:
+                for url in set(self.manifest) - set(urls):
+                    removed += self.remove(url)
+                self.prune()
+            self.write_file(self.root / MANIFEST, json.dumps(self.manifest, indent=1, sort_keys=True).encode())
+        return written, unchanged, removed
+
+    def encodings(self, body):
+        yield "", body
+        yield ".gz", gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        if brotli is not None:
+            yield ".br", brotli.compress(body, quality=BROTLI_QUALITY)
+
+    def write(self, url, body):
+        name = snapshot_name(url)
+        digest = hashlib.sha256(body).hexdigest()
+        entry = self.manifest.get(url)
+        if entry is not None and entry["sha256"] == digest and (self.root / name).exists():
+            return False
+        stem, extension = os.path.splitext(name)
+        hashed = f"{stem}.{digest[:12]}{extension}"
+        suffixes = []
+        for suffix, data in self.encodings(body):
+            path = self.root / f"{hashed}{suffix}"
+            if not path.exists():
+                self.write_file(path, data)
+            suffixes.append(suffix)
+        for suffix in suffixes:
+            self.link(self.root / f"{hashed}{suffix}", self.root / f"{name}{suffix}")
+        if ".br" not in suffixes:
+            # Don't let a server with brotli_static send an older body.
+            (self.root / f"{name}.br").unlink(missing_ok=True)
+        self.manifest[url] = {"file": hashed, "sha256": digest, "bytes": len(body)}
+        return True
+
+    def remove(self, url):
+        name = snapshot_name(url)
+        for suffix in ("", ".gz", ".br"):
+            (self.root / f"{name}{suffix}").unlink(missing_ok=True)
+        return 1 if self.manifest.pop(url, None) is not None else 0
+
+    def prune(self):
+        """Delete superseded hashed files and directories left empty by removed books."""
+        current = {entry["file"] for entry in self.manifest.values()}
+        cutoff = time.time() - SUPERSEDED_KEEP_SECONDS
+        for directory, _, filenames in os.walk(self.root / "api", topdown=False):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, "/")
+                match = HASHED_FILE_RE.search(name)
+                if match and name.removesuffix(match[1] or "") not in current and os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+            if not os.listdir(directory):
+                os.rmdir(directory)
+
+    def read_manifest(self):
+        try:
+            return json.loads((self.root / MANIFEST).read_text())
+        except FileNotFoundError:
+            return {}
+
+    @contextmanager
+    def locked(self):
+        """Serialize publishers, e.g. the command and the on-commit hook of several processes."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def write_file(path, data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as output:
+                output.write(data)
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    @staticmethod
+    def link(source, path):
+        """Point ``path`` at the bytes of ``source``, replacing it in one rename."""
+        temporary = path.with_name(f".tmp-{path.name}-{os.getpid()}-{threading.get_ident()}")
+        temporary.unlink(missing_ok=True)
+        try:
+            os.link(source, temporary)
+        except OSError:
+            # No hard links on this file system: copy instead.
+            Publisher.write_file(temporary, source.read_bytes())
+        os.replace(temporary, path)
+
+
+_executor = None
+_pending = set()
+_pending_lock = threading.Lock()
+_queued = False
+
+
+def schedule(model, instances, using=None, **changes):
+    """Republish the snapshots ``instances`` appear in after the current transaction commits."""
+    if not settings.API_SNAPSHOTS_ON_COMMIT:
+        return
+    urls = affected_urls(model, instances, **changes)
+    transaction.on_commit(lambda: _enqueue(urls), using=using)
+
+
+def _enqueue(urls):
+    global _executor, _queued
+    with _pending_lock:
+        _pending.update(urls)
+        if _queued:
+            return
+        _queued = True
+        if _executor is None:
+            # One thread, so an older render never lands after a newer one.
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshots")
+    _executor.submit(_drain)
+
+
+def _drain():
+    global _queued
+    # Everything queued while the previous run rendered is published in one go.
+    with _pending_lock:
+        urls = sorted(_pending)
+        _pending.clear()
+        _queued = False
+    try:
+        Publisher().publish(urls)
+    except Exception:
+        logger.exception("Could not publish %d API snapshots", len(urls))
+    finally:
+        close_old_connections()
@@ -0,0 +1,18 @@
+'use strict';
+// Apply an AutocompleteListFilter as soon as a value is picked.
+{
+    const $ = django.jQuery;
+
+    $(function() {
+        $('select[data-autocomplete-filter]').on('change', function() {
+            const url = new URL(window.location.href);
+            url.searchParams.delete(this.name);
+            url.searchParams.delete(this.dataset.isnullParam);
+            url.searchParams.delete('p');
+            if (this.value) {
+                url.searchParams.set(this.name, this.value);
+            }
+            window.location.href = url.toString();
+        });
+    });
+}
@@ -0,0 +1,168 @@
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+
+HASH_LENGTH = 12
+HASHED_NAME_RE = re.compile(rf"\.[0-9a-f]{{{HASH_LENGTH}}}(\.[^./]+)?$")
+BLOB_ROOT = "blobs"
+BLOB_NAME_RE = re.compile(rf"^{BLOB_ROOT}/[0-9a-f]{{2}}/(?P<digest>[0-9a-f]{{64}})(\.[^./]+)?$")
+# Uploads are written here first, so that moving them into place is a rename.
+INCOMING_DIR = posixpath.join(BLOB_ROOT, ".incoming")
+
+
+def is_hashed_name(name):
+    """Whether ``name`` carries a content hash, so its bytes can never change."""
+    return bool(HASHED_NAME_RE.search(name) or BLOB_NAME_RE.match(name))
+
+
+def blob_digest(name):
+    """The SHA-256 of a blob name such as ``blobs/ab/ab12…ef.png``, or ``None`` for other names."""
+    match = BLOB_NAME_RE.match(name or "")
+    return match["digest"] if match else None
+
+
+def blob_name(digest, extension):
+    return f"{BLOB_ROOT}/{digest[:2]}/{digest}{extension.lower()}"
+
+
+class HashedFileSystemStorage(FileSystemStorage):
+    """Store uploads as ``<dir>/<stem>.<sha256 prefix><ext>``.
+
+    The name changes whenever the content does, so media URLs can be cached
+    forever. Saving the same bytes twice yields the same name; the file
+    already on disk is reused.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Leave room for the ".<hash>" that _save() adds.
+        if max_length is not None:
+            max_length -= HASH_LENGTH + 1
+        return super().get_available_name(name, max_length=max_length)
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        if hasattr(content, "seek"):
+            content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, "seek"):
+            content.seek(0)
+
+        directory, filename = posixpath.split(name)
+        # Re-saving "cover.0123456789ab.png" must not stack a second hash.
+        stem, extension = posixpath.splitext(HASHED_NAME_RE.sub(r"\1", filename))
+        hashed = posixpath.join(directory, f"{stem}.{digest.hexdigest()[:HASH_LENGTH]}{extension}")
+        if self.exists(hashed):
+            return hashed
+        return super()._save(hashed, content)
+
+
+class BlobStorage(HashedFileSystemStorage):
+    """Store each distinct upload once, as ``blobs/<d[:2]>/<sha256><ext>``.
+
+    Files saved under ``MEDIA_BLOB_DIRS`` (the ``upload_to`` folders of the
+    covers, logos and photos) are hashed while they are streamed to a
+    temporary file, never held in memory, and recorded as a
+    :class:`~content.models.Blob`. Saving bytes that are already stored
+    returns the existing name, whatever the file was called, so every model
+    shares one copy. ``content.blobs`` counts the rows that reference each
+    blob and ``manage.py gc_blobs`` removes the unreferenced ones.
+
+    Everything else, such as renditions, keeps the hashed names of
+    :class:`HashedFileSystemStorage`.
+    """
+
+    def _save(self, name, content):
+        if posixpath.normpath(name).split("/")[0] not in settings.MEDIA_BLOB_DIRS:
+            return super()._save(name, content)
+        if hasattr(content, "temporary_file_path"):
+            # A large upload Django already streamed to disk: hash it there and move it into place.
+            source, spooled = content.temporary_file_path(), False
+            digest, size = self._hash(content)
+        else:
+            source, (digest, size) = self._spool(content)
+            spooled = True
+        try:
+            name = self._record(digest, posixpath.splitext(name)[1], size)
+            path = self.path(name)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                try:
+                    file_move_safe(source, path, allow_overwrite=False)
+                except FileExistsError:
+                    # Another worker stored the same bytes first.
+                    pass
+                else:
+                    if self.file_permissions_mode is not None:
+                        os.chmod(path, self.file_permissions_mode)
+        finally:
+            if spooled and os.path.exists(source):
+                os.remove(source)
+        return name
+
+    def delete(self, name):
+        digest = blob_digest(name)
+        if digest is None:
+            return super().delete(name)
+        from .models import Blob
+
+        # Never pull shared bytes from under another row; gc_blobs removes the rest.
+        if Blob.objects.filter(digest=digest, ref_count__gt=0).exists():
+            return
+        super().delete(name)
+        Blob.objects.filter(digest=digest).delete()
+
+    @staticmethod
+    def _hash(content):
+        digest = hashlib.sha256()
+        size = 0
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+        content.seek(0)
+        return digest.hexdigest(), size
+
+    def _spool(self, content):
+        """Copy ``content`` to a file in ``INCOMING_DIR`` chunk by chunk; return its path and ``(digest, size)``."""
+        directory = self.path(INCOMING_DIR)
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, path = tempfile.mkstemp(dir=directory, prefix="upload-")
+        try:
+            with os.fdopen(fd, "wb") as spool:
+                if hasattr(content, "seek"):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    spool.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path, (digest.hexdigest(), size)
+
+    @staticmethod
+    def _record(digest, extension, size):
+        """Create or touch the :class:`Blob` row of ``digest`` and return its name.
+
+        Touching ``last_saved_at`` before the file is written keeps
+        ``gc_blobs`` from removing a blob that is being uploaded again.
+        """
+        from .models import Blob
+
+        now = timezone.now()
+        if Blob.objects.filter(digest=digest).update(last_saved_at=now):
+            return Blob.objects.filter(digest=digest).values_list("name", flat=True).get()
+        blob, _ = Blob.objects.get_or_create(
+            digest=digest, defaults={"name": blob_name(digest, extension), "size": size, "last_saved_at": now}
+        )
+        return blob.name
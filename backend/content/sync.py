@@ -0,0 +1,178 @@
+"""Change feeds for clients that keep a copy of the content lists.
+
+``?updated_since=`` on the list endpoints narrows the response to rows whose
+``updated_at`` is later than the given ISO-8601 timestamp or sync token.
+``GET /api/sync/`` reports, per collection, the rows changed and the ids
+deleted (from :class:`~content.models.Tombstone`) since a token, together with
+the token to send next time. Both read through the ``(updated_at, id)``
+indexes, so a refresh costs a few index lookups when little has changed.
+
+A token is the newest ``updated_at``/``deleted_at`` the server had seen, so the
+same data always yields the same token, ``ETag`` and body, which lets shared
+caches answer repeat polls. ``updated_at`` is stamped when a row is saved, not
+when its transaction commits, so feeds read from ``SYNC_TOKEN_OVERLAP_SECONDS``
+before the token: clients get a few rows twice rather than miss a late commit.
+A collection comes back with ``"reset": true`` when the client has to fetch
+the full list instead: no token, a token older than the retained tombstones
+(``SYNC_TOMBSTONE_DAYS``) or more than ``SYNC_MAX_CHANGES`` changes.
+
+Books embed their category as it was when the book last changed; clients that
+apply book deltas should take category data from the ``categories`` feed.
+"""
+
+import base64
+import binascii
+import json
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .conditional import ConditionalGetMixin, last_change
+from .fastpath import MediaUrls, plan_for
+from .models import Book, Category, Partner, TeamMember, Tombstone
+from .renderers import FastJSONRenderer
+from .serializers import BookSummarySerializer, CategorySerializer, PartnerSerializer, TeamMemberSerializer
+
+SINCE_PARAM = "updated_since"
+# Collection name -> (model, serializer of its list representation).
+COLLECTIONS = {
+    "books": (Book, BookSummarySerializer),
+    "categories": (Category, CategorySerializer),
+    "partners": (Partner, PartnerSerializer),
+    "team_members": (TeamMember, TeamMemberSerializer),
+}
+INVALID_SINCE = "Must be an ISO-8601 timestamp or a sync token."
+
+
+def encode_token(moment):
+    payload = {"t": moment.isoformat() if moment is not None else None}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode()
+
+
+def parse_since(value):
+    """Return the ``updated_at`` bound for ``?updated_since=``, or ``None`` for "everything".
+
+    Timestamps are used as given; tokens are moved back by ``SYNC_TOKEN_OVERLAP_SECONDS``.
+    """
+    # A "+" in an unencoded query string arrives as a space.
+    moment = _parse_timestamp(value.strip().replace(" ", "+"))
+    if moment is not None:
+        return moment
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(value.encode()))["t"]
+    except (binascii.Error, KeyError, TypeError, ValueError):
+        raise ValidationError({SINCE_PARAM: [INVALID_SINCE]})
+    if raw is None:
+        return None
+    moment = _parse_timestamp(raw) if isinstance(raw, str) else None
+    if moment is None:
+        raise ValidationError({SINCE_PARAM: [INVALID_SINCE]})
+    return moment - timedelta(seconds=settings.SYNC_TOKEN_OVERLAP_SECONDS)
+
+
+def changed_since(model, since):
+    """Rows of ``model`` changed after ``since``, by any of its ``CHANGE_FIELDS``."""
+    condition = Q()
+    for name in model.CHANGE_FIELDS:
+        condition |= Q(**{f"{name}__gt": since})
+    return condition
+
+
+def _parse_timestamp(value):
+    try:
+        moment = parse_datetime(value)
+    except ValueError:
+        raise ValidationError({SINCE_PARAM: [INVALID_SINCE]})
+    if moment is not None and timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, dt_timezone.utc)
+    return moment
+
+
+class ChangeFeedMixin:
+    """Apply ``?updated_since=`` to the ``list`` action."""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        raw = self.request.query_params.get(SINCE_PARAM) if self.action == "list" else None
+        if raw:
+            since = parse_since(raw)
+            if since is not None:
+                queryset = queryset.filter(changed_since(queryset.model, since))
+        return queryset
+
+
+class SyncView(ConditionalGetMixin, APIView):
+    renderer_classes = [FastJSONRenderer]
+
+    def get(self, request):
+        collections = self._collections(request)
+        raw = request.query_params.get(SINCE_PARAM)
+        since = parse_since(raw) if raw else None
+        models = [COLLECTIONS[name][0] for name in collections]
+
+        latest = [model._default_manager.order_by().aggregate(last=Max(last_change(model)))["last"] for model in models]
+        labels = [model._meta.label_lower for model in models]
+        latest.append(Tombstone.objects.filter(model__in=labels).aggregate(last=Max("deleted_at"))["last"])
+        known = [moment for moment in latest if moment is not None]
+        token = encode_token(max(known) if known else None)
+        host = request.build_absolute_uri("/")
+        not_modified, etag, last_modified = self._check_validators(request, (host, token), known)
+        if not_modified is not None:
+            return not_modified
+
+        payload = {"token": token}
+        horizon = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+        if since is None or since < horizon:
+            payload.update((name, self._reset()) for name in collections)
+        else:
+            deleted = self._deleted_since(labels, since)
+            media_urls = MediaUrls(request)
+            for name, model in zip(collections, models):
+                payload[name] = self._changes(model, COLLECTIONS[name][1], since, deleted[model], media_urls)
+        return self._add_validators(Response(payload), etag, last_modified)
+
+    @staticmethod
+    def _collections(request):
+        raw = request.query_params.get("collections")
+        if not raw:
+            return list(COLLECTIONS)
+        names = [name.strip() for name in raw.split(",") if name.strip()]
+        unknown = [name for name in names if name not in COLLECTIONS]
+        if unknown or not names:
+            raise ValidationError({"collections": [f"Choose from {', '.join(COLLECTIONS)}."]})
+        return list(dict.fromkeys(names))
+
+    @staticmethod
+    def _reset():
+        return {"reset": True, "changed": [], "deleted": []}
+
+    @staticmethod
+    def _deleted_since(labels, since):
+        rows = (
+            Tombstone.objects.filter(model__in=labels, deleted_at__gt=since)
+            .order_by("deleted_at")
+            .values_list("model", "object_id")
+        )
+        deleted = {COLLECTIONS[name][0]: [] for name in COLLECTIONS}
+        by_label = {model._meta.label_lower: model for model in deleted}
+        for label, object_id in rows:
+            deleted[by_label[label]].append(str(object_id))
+        return deleted
+
+    def _changes(self, model, serializer_class, since, deleted, media_urls):
+        limit = settings.SYNC_MAX_CHANGES
+        if len(deleted) > limit:
+            return self._reset()
+        # Without a request, ?fields= cannot shape the feed.
+        plan = plan_for(serializer_class(), media_urls)
+        rows = model._default_manager.filter(changed_since(model, since)).order_by("updated_at", "id")
+        changed = plan.build(rows.values(*plan.columns)[: limit + 1])
+        if len(changed) > limit:
+            return self._reset()
+        return {"reset": False, "changed": changed, "deleted": deleted}
@@ -0,0 +1,140 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.utils import timezone
+from PIL import Image
+
+from content import blobs
+from content.images import RENDITION_ROOT
+from content.models import Blob, Book, Partner, TeamMember
+from content.storage import BLOB_ROOT, blob_digest
+
+
+def png(color):
+    output = io.BytesIO()
+    Image.new("RGB", (4, 3), color).save(output, "PNG")
+    return SimpleUploadedFile("logo.png", output.getvalue(), content_type="image/png")
+
+
+@override_settings(API_CACHE_ENABLED=False, IMAGE_RENDITIONS_ASYNC=False, MEDIA_BLOB_GRACE_HOURS=1)
+class BlobReferenceTests(TestCase):
+    """``Blob.ref_count`` follows the rows that reference each blob, and ``gc_blobs`` only removes orphans."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        media = override_settings(MEDIA_ROOT=directory)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def refs(self, instance_or_name):
+        name = instance_or_name if isinstance(instance_or_name, str) else instance_or_name.logo.name
+        return Blob.objects.get(digest=blob_digest(name)).ref_count
+
+    def test_counts_follow_saves_replacements_and_deletes(self):
+        first = Partner.objects.create(name="First", logo=png("red"))
+        second = Partner.objects.create(name="Second", logo=png("red"))
+        red = first.logo.name
+        # The same bytes are stored once, whatever the upload was called.
+        self.assertEqual(second.logo.name, red)
+        self.assertTrue(red.startswith(f"{BLOB_ROOT}/"))
+        self.assertEqual(self.refs(red), 2)
+
+        member = TeamMember.objects.create(name="Member", role="Editor", photo=png("red"))
+        self.assertEqual(self.refs(red), 3)
+
+        first.logo = png("blue")
+        first.save()
+        blue = first.logo.name
+        self.assertEqual((self.refs(red), self.refs(blue)), (2, 1))
+
+        # Saving other fields leaves the counts alone.
+        first.name = "Renamed"
+        first.save(update_fields=["name"])
+        first = Partner.objects.get(pk=first.pk)
+        first.save()
+        self.assertEqual((self.refs(red), self.refs(blue)), (2, 1))
+
+        second.delete()
+        member.delete()
+        self.assertEqual(self.refs(red), 0)
+        first.logo = None
+        first.save()
+        self.assertEqual(self.refs(blue), 0)
+
+    def test_bulk_writes_track_references(self):
+        response = self.client.post(
+            "/api/partners/bulk/",
+            {"items": '[{"name": "One"}, {"name": "Two"}]', "logo[0]": png("red"), "logo[1]": png("red")},
+        )
+        self.assertEqual(response.status_code, 201)
+        red = Partner.objects.get(name="One").logo.name
+        self.assertEqual(self.refs(red), 2)
+
+        two = Partner.objects.get(name="Two")
+        response = self.client.patch(
+            "/api/partners/bulk/",
+            encode_multipart(BOUNDARY, {"items": f'[{{"id": "{two.pk}"}}]', "logo[0]": png("green")}),
+            content_type=MULTIPART_CONTENT,
+        )
+        self.assertEqual(response.status_code, 200)
+        two.refresh_from_db()
+        self.assertEqual((self.refs(red), self.refs(two)), (1, 1))
+
+    def test_refresh_recounts_drifted_references(self):
+        partner = Partner.objects.create(name="Partner", logo=png("red"))
+        # bulk_create() and update() send no signals, so the count is not adjusted.
+        Book.objects.bulk_create([Book(title="Cover", author="Blob", cover_image=partner.logo.name)])
+        Partner.objects.filter(pk=partner.pk).update(logo="")
+        self.assertEqual(self.refs(partner), 1)
+        Blob.objects.filter(digest=blob_digest(partner.logo.name)).update(ref_count=5)
+
+        self.assertEqual(blobs.refresh_blobs(), 1)
+        self.assertEqual(self.refs(partner), 1)
+
+    def test_gc_deletes_only_old_unreferenced_blobs(self):
+        kept = Partner.objects.create(name="Kept", logo=png("red"))
+        old = Partner.objects.create(name="Old", logo=png("blue"))
+        recent = Partner.objects.create(name="Recent", logo=png("green"))
+        # Referenced behind the counters' back: gc_blobs recounts before deleting.
+        drifted = Partner.objects.create(name="Drifted", logo=png("white"))
+        Blob.objects.filter(digest=blob_digest(drifted.logo.name)).update(ref_count=0)
+        names = {partner.name: partner.logo.name for partner in (kept, old, recent, drifted)}
+        old.delete()
+        recent.delete()
+        Blob.objects.exclude(name=names["Recent"]).update(last_saved_at=timezone.now() - timedelta(hours=2))
+
+        rendition_dir = os.path.dirname(default_storage.path(f"{RENDITION_ROOT}/{names['Old']}"))
+        os.makedirs(rendition_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(names["Old"]))[0]
+        rendition = os.path.join(rendition_dir, f"{stem}-160.webp")
+        open(rendition, "wb").close()
+        stray = default_storage.path(f"{BLOB_ROOT}/00/{'0' * 64}.png")
+        os.makedirs(os.path.dirname(stray), exist_ok=True)
+        open(stray, "wb").close()
+        two_hours_ago = time.time() - 7200
+        os.utime(stray, (two_hours_ago, two_hours_ago))
+
+        call_command("gc_blobs", "--dry-run", stdout=io.StringIO())
+        self.assertTrue(default_storage.exists(names["Old"]))
+        self.assertTrue(os.path.exists(stray))
+
+        call_command("gc_blobs", stdout=io.StringIO())
+        self.assertFalse(Blob.objects.filter(name=names["Old"]).exists())
+        self.assertFalse(default_storage.exists(names["Old"]))
+        self.assertFalse(os.path.exists(rendition))
+        self.assertFalse(os.path.exists(stray))
+        for name in ("Kept", "Recent", "Drifted"):
+            with self.subTest(name):
+                self.assertTrue(Blob.objects.filter(name=names[name]).exists())
+                self.assertTrue(default_storage.exists(names[name]))
+        self.assertEqual(self.refs(names["Drifted"]), 1)
@@ -0,0 +1,80 @@
+from django.test import TestCase, override_settings
+
+from content import views
+from content.models import Book
+
+CONTENT = "<h1>One</h1><p>" + "alpha é " * 40 + "</p><h1>Two</h1><p>" + "beta ✓ " * 40 + "</p>"
+
+
+@override_settings(API_CACHE_ENABLED=False, BOOK_PAGE_CHARS=100)
+class BookContentTests(TestCase):
+    """``/api/books/<id>/content/`` serves pages, chapters and byte ranges of the stored text."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.book = Book.objects.create(title="Paged", author="Reader", content=CONTENT)
+
+    def setUp(self):
+        views._texts.clear()
+        self.book.refresh_from_db()
+        self.text = self.book.content
+        self.url = f"/api/books/{self.book.pk}/content/"
+
+    def body(self, response):
+        return b"".join(response.streaming_content)
+
+    def test_pages(self):
+        pages = self.book.content_pages
+        self.assertGreater(len(pages), 2)
+        for number, page in enumerate(pages, start=1):
+            with self.subTest(page=number):
+                response = self.client.get(self.url, {"page": number})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["Content-Type"], "text/html; charset=utf-8")
+                self.assertEqual(self.body(response).decode(), self.text[page["start"] : page["end"]])
+                self.assertEqual(response["X-Page"], str(number))
+                self.assertEqual(response["X-Page-Count"], str(len(pages)))
+                self.assertEqual('rel="prev"' in response.get("Link", ""), number > 1)
+                self.assertEqual('rel="next"' in response.get("Link", ""), number < len(pages))
+        self.assertEqual(self.client.get(self.url, {"page": len(pages) + 1}).status_code, 404)
+        self.assertEqual(self.client.get(self.url, {"page": "first"}).status_code, 400)
+
+    def test_chapters(self):
+        pages = self.book.content_pages
+        second = [page for page in pages if page["chapter"] == 1]
+        response = self.client.get(self.url, {"chapter": 2})
+        self.assertEqual(response.status_code, 200)
+        text = self.body(response).decode()
+        self.assertEqual(text, self.text[second[0]["start"] : second[-1]["end"]])
+        self.assertTrue(text.startswith('<h1 id="section-2">Two</h1>'), text[:40])
+        self.assertEqual(self.client.get(self.url, {"chapter": 3}).status_code, 404)
+
+    def test_byte_ranges(self):
+        data = self.text.encode()
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-29")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 10-29/{len(data)}")
+        self.assertEqual(self.body(response), data[10:30])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(self.body(response), data[-5:])
+
+        response = self.client.get(self.url, HTTP_RANGE=f"bytes={len(data)}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(data)}")
+
+        # A validator from an older version of the text gets the whole text.
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-29", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), data)
+
+    def test_cached_text_follows_edits(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url, {"page": 2}).status_code, 200)
+
+        self.book.content = "<h1>New</h1><p>Rewritten.</p>"
+        self.book.save()
+        response = self.client.get(self.url)
+        self.assertEqual(self.body(response).decode(), '<h1 id="section-1">New</h1><p>Rewritten.</p>')
@@ -0,0 +1,85 @@
+import uuid
+
+from django.test import TestCase, override_settings
+
+from content.models import Book, Category, Partner
+
+
+@override_settings(API_CACHE_ENABLED=False, IMAGE_RENDITIONS_ASYNC=False)
+class BulkWriteTests(TestCase):
+    """``POST``/``PATCH`` ``<collection>/bulk/`` report every item and write the valid ones."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="Bulk")
+        cls.book = Book.objects.create(title="Existing", author="Bulk", content="Old text.")
+
+    def send(self, method, url, items):
+        return getattr(self.client, method)(url, items, content_type="application/json")
+
+    def test_create_all(self):
+        response = self.send("post", "/api/partners/bulk/", [{"name": "One"}, {"name": "Two"}])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item["status"] for item in response.json()["results"]], [201, 201])
+        self.assertEqual(set(Partner.objects.values_list("name", flat=True)), {"One", "Two"})
+
+    def test_partial_create_is_a_multi_status(self):
+        items = [
+            {"title": "Valid", "author": "Bulk", "category_id": str(self.category.pk), "content": "<p>New</p>"},
+            {"title": "", "author": "Bulk"},
+            {"title": "No category", "author": "Bulk", "category_id": str(uuid.uuid4())},
+            "not an object",
+        ]
+        response = self.send("post", "/api/books/bulk/", items)
+        self.assertEqual(response.status_code, 207)
+        results = response.json()["results"]
+        self.assertEqual([item["index"] for item in results], [0, 1, 2, 3])
+        self.assertEqual([item["status"] for item in results], [201, 400, 400, 400])
+        self.assertEqual(results[0]["data"]["title"], "Valid")
+        self.assertNotIn("content", results[0]["data"])
+        self.assertIn("title", results[1]["errors"])
+        self.assertIn("category_id", results[2]["errors"])
+
+        created = Book.objects.get(title="Valid")
+        self.assertEqual(created.category, self.category)
+        self.assertEqual(created.content, "<p>New</p>")
+        self.assertFalse(Book.objects.filter(title="No category").exists())
+
+    def test_partial_update_is_a_multi_status(self):
+        items = [
+            {"id": str(self.book.pk), "title": "Renamed"},
+            {"id": str(uuid.uuid4()), "title": "Missing"},
+            {"title": "No id"},
+            {"id": "nope", "title": "Bad id"},
+        ]
+        response = self.send("patch", "/api/books/bulk/", items)
+        self.assertEqual(response.status_code, 207)
+        results = response.json()["results"]
+        self.assertEqual([item["status"] for item in results], [200, 404, 400, 400])
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title, "Renamed")
+        self.assertEqual(self.book.content, "Old text.")
+
+    def test_nothing_written_is_a_bad_request(self):
+        response = self.send("post", "/api/partners/bulk/", [{"name": ""}, {}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([item["status"] for item in response.json()["results"]], [400, 400])
+        self.assertFalse(Partner.objects.exists())
+
+    def test_rejects_bodies_that_are_not_lists(self):
+        for body in ([], {"name": "Not a list"}, "42"):
+            with self.subTest(body=body):
+                response = self.send("post", "/api/partners/bulk/", body)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("items", response.json())
+
+    @override_settings(BULK_MAX_ITEMS=3)
+    def test_item_limit(self):
+        response = self.send("post", "/api/partners/bulk/", [{"name": f"Partner {n}"} for n in range(4)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"items": ["At most 3 items per request."]})
+        self.assertFalse(Partner.objects.exists())
+
+        response = self.send("post", "/api/partners/bulk/", [{"name": f"Partner {n}"} for n in range(3)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Partner.objects.count(), 3)
@@ -0,0 +1,47 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from content.models import Partner
+
+API_CACHE = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "test-api"}
+
+
+@override_settings(
+    API_CACHE_ENABLED=True,
+    API_CACHE_LOCK_WAIT=0.1,
+    CACHES={"default": API_CACHE, "api": API_CACHE},
+)
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Partner.objects.create(name="Cached")
+
+    def setUp(self):
+        caches["api"].clear()
+
+    def test_json_is_cached(self):
+        first = self.client.get("/api/partners/", HTTP_ACCEPT="application/json")
+        second = self.client.get("/api/partners/", HTTP_ACCEPT="application/json")
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.content, second.content)
+
+    def test_browsable_api_is_rendered_every_time(self):
+        for _ in range(2):
+            response = self.client.get("/api/partners/", HTTP_ACCEPT="text/html")
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("X-Cache", response)
+
+    def test_giving_up_on_the_lock_leaves_it_alone(self):
+        cache = caches["api"]
+        # Another request holds every lock and never stores its entry.
+        with (
+            mock.patch("content.cache.get_cache", return_value=cache),
+            mock.patch.object(cache, "add", return_value=False),
+            mock.patch.object(cache, "delete") as delete,
+        ):
+            response = self.client.get("/api/partners/", HTTP_ACCEPT="application/json")
+        self.assertEqual(response["X-Cache"], "MISS")
+        delete.assert_not_called()
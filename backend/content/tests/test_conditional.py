@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import parse_http_date
+
+from content import bootstrap
+from content.models import Partner
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class ListLastModifiedTests(TestCase):
+    def test_delete_moves_last_modified(self):
+        kept = Partner.objects.create(name="Kept")
+        deleted = Partner.objects.create(name="Deleted")
+        # Neither row changes MAX(updated_at) when the other one goes.
+        yesterday = timezone.now() - timedelta(days=1)
+        Partner.objects.filter(pk__in=[kept.pk, deleted.pk]).update(updated_at=yesterday)
+
+        before = self.client.get("/api/partners/", HTTP_ACCEPT="application/json")
+        self.assertEqual(parse_http_date(before["Last-Modified"]), int(yesterday.timestamp()))
+
+        deleted.delete()
+        after = self.client.get(
+            "/api/partners/", HTTP_ACCEPT="application/json", HTTP_IF_MODIFIED_SINCE=before["Last-Modified"]
+        )
+        self.assertEqual(after.status_code, 200)
+        self.assertGreater(parse_http_date(after["Last-Modified"]), parse_http_date(before["Last-Modified"]))
+
+        again = self.client.get(
+            "/api/partners/", HTTP_ACCEPT="application/json", HTTP_IF_MODIFIED_SINCE=after["Last-Modified"]
+        )
+        self.assertEqual(again.status_code, 304)
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class BootstrapValidatorTests(TestCase):
+    def setUp(self):
+        bootstrap._local.clear()
+        Partner.objects.create(name="Bootstrap")
+
+    def test_each_encoding_has_its_own_etag(self):
+        gzipped = self.client.get("/api/bootstrap/", HTTP_ACCEPT_ENCODING="gzip")
+        identity = self.client.get("/api/bootstrap/")
+        self.assertEqual(gzipped["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Encoding", identity)
+        self.assertNotEqual(gzipped["ETag"], identity["ETag"])
+
+        for response, encoding in ((gzipped, "gzip"), (identity, "")):
+            with self.subTest(encoding=encoding or "identity"):
+                self.assertIn("Accept-Encoding", response["Vary"])
+                same = self.client.get(
+                    "/api/bootstrap/", HTTP_ACCEPT_ENCODING=encoding, HTTP_IF_NONE_MATCH=response["ETag"]
+                )
+                self.assertEqual(same.status_code, 304)
+                self.assertIn("Accept-Encoding", same["Vary"])
+
+        # The identity validator does not validate the gzip body.
+        other = self.client.get("/api/bootstrap/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=identity["ETag"])
+        self.assertEqual(other.status_code, 200)
@@ -0,0 +1,48 @@
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from content.models import Book, Category
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class CategoryCountersTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Fiction")
+        self.book = Book.objects.create(title="First", author="A", category=self.category)
+
+    def get(self, url, **headers):
+        return self.client.get(url, HTTP_ACCEPT="application/json", **headers)
+
+    def test_book_writes_keep_counts_and_leave_updated_at_alone(self):
+        updated_at = Category.objects.get(pk=self.category.pk).updated_at
+        second = Book.objects.create(title="Second", author="A", category=self.category)
+        category = Category.objects.get(pk=self.category.pk)
+        self.assertEqual(category.book_count, 2)
+        self.assertEqual(category.latest_book_at, second.created_at)
+        self.assertEqual(category.updated_at, updated_at)
+        self.assertIsNotNone(category.stats_updated_at)
+
+        second.delete()
+        self.assertEqual(Category.objects.get(pk=self.category.pk).book_count, 1)
+
+    def test_new_book_does_not_change_the_other_books_of_its_category(self):
+        detail = self.get(f"/api/books/{self.book.pk}/")
+        self.assertNotIn("book_count", detail.json()["category"])
+        Book.objects.create(title="Second", author="A", category=self.category)
+        again = self.get(f"/api/books/{self.book.pk}/", HTTP_IF_NONE_MATCH=detail["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_new_book_changes_the_category_responses_and_feed(self):
+        listing = self.get("/api/categories/")
+        detail = self.get(f"/api/categories/{self.category.pk}/")
+        # A plain timestamp is used as given, without the overlap of a sync token.
+        since = timezone.now().isoformat().replace("+00:00", "Z")
+
+        Book.objects.create(title="Second", author="A", category=self.category)
+
+        for url, previous in (("/api/categories/", listing), (f"/api/categories/{self.category.pk}/", detail)):
+            with self.subTest(url):
+                response = self.get(url, HTTP_IF_NONE_MATCH=previous["ETag"])
+                self.assertEqual(response.status_code, 200)
+        changed = self.get(f"/api/categories/?updated_since={since}").json()
+        self.assertEqual([(row["id"], row["book_count"]) for row in changed], [(str(self.category.pk), 2)])
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from content.counters import refresh_categories
+from content.management.commands.check_fastpath import ENDPOINTS, compare_all
+from content.models import Book, Category, Partner, TeamMember
+
+
+def renditions(source):
+    stem = source.rsplit(".", 1)[0]
+    return {
+        "source": source,
+        "width": 1600,
+        "height": 900,
+        "webp": {"thumbnail": {"name": f"renditions/{stem}-160.webp", "width": 160}},
+        "jpeg": {"thumbnail": {"name": f"renditions/{stem}-160.jpg", "width": 160}},
+    }
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class FastReadsTests(TestCase):
+    """Lists render the same bytes with and without ``API_FAST_READS``; see ``check_fastpath``."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        categories = Category.objects.bulk_create(
+            [Category(name="Poetry", description="Verse"), Category(name="Prose"), Category(name="Empty")]
+        )
+        # bulk_create: no renditions are generated for the made-up image names.
+        Book.objects.bulk_create(
+            Book(
+                title=f"Book {index}",
+                author="Fast Reads",
+                description=None if index % 3 else f"Description {index} é—\U0001f4da",
+                category=categories[index % 2] if index % 4 else None,
+                cover_image=f"books/cover-{index}.png" if index % 2 else None,
+                cover_image_renditions=renditions(f"books/cover-{index}.png") if index % 4 == 1 else {},
+                legacy_cover_image_url=None if index % 2 else f"https://images.example.com/{index}.jpg",
+                created_at=now - timedelta(minutes=index),
+            )
+            for index in range(7)
+        )
+        refresh_categories([category.pk for category in categories])
+        Partner.objects.bulk_create(
+            [
+                Partner(name="Logo", logo="partners/logo.png", logo_renditions=renditions("partners/logo.png")),
+                Partner(name="Legacy", legacy_logo_url="https://images.example.com/logo.png"),
+                Partner(name="Website", website_url="https://example.com/"),
+            ]
+        )
+        TeamMember.objects.bulk_create(
+            [
+                TeamMember(name="Photo", role="Editor", photo="team/photo.png"),
+                TeamMember(name="Legacy", role="Author", legacy_photo_url="https://images.example.com/p.png"),
+                TeamMember(name="Nobody", role="Reader"),
+            ]
+        )
+
+    def test_lists_match_the_serializers(self):
+        checked = 0
+        for url, expected, actual, used_fast_path in compare_all(RequestFactory(), pages=5):
+            checked += 1
+            with self.subTest(url):
+                self.assertTrue(used_fast_path)
+                self.assertEqual(expected, actual)
+        # More than one response per query: the ?page_size= pages were followed.
+        self.assertGreater(checked, sum(len(queries) for *_, queries in ENDPOINTS))
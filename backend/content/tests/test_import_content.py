@@ -0,0 +1,92 @@
+import io
+import json
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from content.models import Book, BookBody, Partner
+
+CREATED = datetime(2020, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc)
+UPDATED = datetime(2021, 6, 7, 8, 9, 10, tzinfo=dt_timezone.utc)
+
+
+class ImportTimestampsTests(TestCase):
+    def setUp(self):
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = directory / "partners.jsonl"
+
+    def import_partners(self, rows, *args):
+        self.path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+        call_command("import_content", "partners", str(self.path), "--restart", *args, stdout=io.StringIO())
+
+    def row(self, pk, name):
+        return {"id": str(pk), "name": name, "created_at": CREATED.isoformat(), "updated_at": UPDATED.isoformat()}
+
+    def test_imported_rows_are_stamped_with_the_import_time(self):
+        pk = uuid.uuid4()
+        started = timezone.now()
+        self.import_partners([self.row(pk, "New")])
+
+        partner = Partner.objects.get(pk=pk)
+        self.assertEqual(partner.created_at, CREATED)
+        self.assertGreaterEqual(partner.updated_at, started)
+
+    def test_keep_timestamps_only_applies_to_new_rows(self):
+        existing, new = uuid.uuid4(), uuid.uuid4()
+        self.import_partners([self.row(existing, "Existing")], "--keep-timestamps")
+        self.assertEqual(Partner.objects.get(pk=existing).updated_at, UPDATED)
+
+        started = timezone.now()
+        self.import_partners([self.row(existing, "Renamed"), self.row(new, "New")], "--keep-timestamps")
+
+        renamed = Partner.objects.get(pk=existing)
+        self.assertEqual(renamed.name, "Renamed")
+        self.assertEqual(renamed.created_at, CREATED)
+        self.assertGreaterEqual(renamed.updated_at, started)
+        self.assertEqual(Partner.objects.get(pk=new).updated_at, UPDATED)
+
+
+class ImportBookTextTests(TestCase):
+    def setUp(self):
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = directory / "books.jsonl"
+        self.book = Book(title="Old title", author="A")
+        self.book.content = "<h1>Kept</h1><p>The text of the book.</p>"
+        self.book.save()
+
+    def import_books(self, *rows):
+        self.path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+        call_command("import_content", "books", str(self.path), "--restart", stdout=io.StringIO())
+
+    def test_rows_without_content_keep_the_stored_text(self):
+        self.import_books({"id": str(self.book.pk), "title": "New title", "author": "A"})
+
+        book = Book.objects.get(pk=self.book.pk)
+        self.assertEqual(book.title, "New title")
+        self.assertEqual(book.content, self.book.content)
+        self.assertEqual(book.word_count, self.book.word_count)
+        self.assertEqual(book.table_of_contents, self.book.table_of_contents)
+        self.assertEqual(book.content_hash, self.book.content_hash)
+
+    def test_rows_with_content_replace_or_clear_it(self):
+        cleared = Book(title="Cleared", author="A")
+        cleared.content = "Text that goes away"
+        cleared.save()
+        self.import_books(
+            {"id": str(self.book.pk), "title": "T", "author": "A", "content": "New words here"},
+            {"id": str(cleared.pk), "title": "Cleared", "author": "A", "content": ""},
+        )
+
+        book = Book.objects.get(pk=self.book.pk)
+        self.assertEqual(book.content, "New words here")
+        self.assertEqual((book.word_count, book.content_format), (3, "text"))
+        self.assertFalse(BookBody.objects.filter(book=cleared).exists())
+        self.assertEqual(Book.objects.get(pk=cleared.pk).word_count, 0)
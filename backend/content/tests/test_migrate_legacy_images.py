@@ -0,0 +1,165 @@
+import io
+import json
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from PIL import Image
+
+from content.models import Book, Category, Partner
+
+
+def png_bytes():
+    output = io.BytesIO()
+    Image.new("RGB", (4, 3), "red").save(output, "PNG")
+    return output.getvalue()
+
+
+PNG = png_bytes()
+
+
+class LegacyImageHandler(BaseHTTPRequestHandler):
+    """Stands in for the old image host: ``/ok/…`` is a PNG, ``/moved/…`` redirects to it, the rest is not."""
+
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        if self.path.startswith("/ok/"):
+            self.answer(200, PNG, "image/png")
+        elif self.path.startswith("/moved/"):
+            self.send_response(301)
+            self.send_header("Location", self.path.replace("/moved/", "/ok/", 1))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.path.startswith("/html/"):
+            self.answer(200, b"<html></html>", "text/html")
+        else:
+            self.answer(404, b"not found", "text/plain")
+
+    def answer(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MigrateLegacyImagesTests(TransactionTestCase):
+    """Run the command against ``LegacyImageHandler``.
+
+    Not a ``TestCase``: the downloads are stored from worker threads, which must see the committed rows.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), LegacyImageHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        thread.start()
+        cls.addClassCleanup(thread.join)
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+
+    def setUp(self):
+        LegacyImageHandler.requests = []
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        media = override_settings(MEDIA_ROOT=str(self.directory / "media"))
+        media.enable()
+        self.addCleanup(media.disable)
+        self.checkpoint = self.directory / "checkpoint.json"
+
+    def migrate(self, *args):
+        call_command(
+            "migrate_legacy_images",
+            "--checkpoint",
+            str(self.checkpoint),
+            "--retries",
+            "0",
+            "--batch-size",
+            "2",
+            *args,
+            stdout=io.StringIO(),
+            stderr=io.StringIO(),
+        )
+
+    def book(self, title, path):
+        return Book.objects.create(title=title, author="Legacy", legacy_cover_image_url=self.base_url + path)
+
+    def test_downloads_each_url_once_and_attaches_it(self):
+        first = self.book("First", "/ok/cover.png")
+        second = self.book("Second", "/ok/cover.png")
+        moved = self.book("Moved", "/moved/other.png")
+        partner = Partner.objects.create(name="Partner", legacy_logo_url=self.base_url + "/ok/logo.png")
+
+        self.migrate()
+
+        self.assertEqual(LegacyImageHandler.requests.count("/ok/cover.png"), 1)
+        for book in (first, second, moved):
+            book.refresh_from_db()
+            self.assertTrue(book.cover_image.name)
+            with book.cover_image.open("rb") as image:
+                self.assertEqual(image.read(), PNG)
+            self.assertTrue(book.legacy_cover_image_url.startswith(self.base_url))
+        self.assertEqual(first.cover_image.name, second.cover_image.name)
+        partner.refresh_from_db()
+        self.assertTrue(partner.logo.name)
+        checkpoint = json.loads(self.checkpoint.read_text())
+        self.assertEqual(checkpoint["failed"], {})
+        self.assertEqual(len(checkpoint["downloaded"]), 3)
+
+    def test_failures_are_remembered_and_leave_the_row_alone(self):
+        missing = self.book("Missing", "/gone.png")
+        html = self.book("Html", "/html/page")
+
+        self.migrate("--model", "books")
+
+        for book in (missing, html):
+            book.refresh_from_db()
+            self.assertFalse(book.cover_image)
+        failed = json.loads(self.checkpoint.read_text())["failed"]
+        self.assertEqual(failed[self.base_url + "/gone.png"], "HTTP 404")
+        self.assertIn("unexpected content type", failed[self.base_url + "/html/page"])
+
+        LegacyImageHandler.requests = []
+        self.migrate("--model", "books")
+        self.assertEqual(LegacyImageHandler.requests, [])
+
+    def test_keeps_existing_images_and_clears_legacy_urls(self):
+        kept = self.book("Kept", "/ok/kept.png")
+        # update(): no renditions are generated for the missing file.
+        Book.objects.filter(pk=kept.pk).update(cover_image="books/uploaded.png")
+        cleared = self.book("Cleared", "/ok/cleared.png")
+
+        self.migrate("--model", "books", "--clear-legacy")
+
+        kept.refresh_from_db()
+        self.assertEqual(kept.cover_image.name, "books/uploaded.png")
+        self.assertEqual(LegacyImageHandler.requests, ["/ok/cleared.png"])
+        cleared.refresh_from_db()
+        self.assertTrue(cleared.cover_image.name)
+        self.assertIsNone(cleared.legacy_cover_image_url)
+
+    def test_republishes_the_snapshots_of_attached_rows(self):
+        category = Category.objects.create(name="Covers")
+        book = self.book("Snapshot", "/ok/snapshot.png")
+        Book.objects.filter(pk=book.pk).update(category=category)
+
+        with override_settings(API_SNAPSHOTS_ON_COMMIT=True), mock.patch("content.snapshots._enqueue") as enqueue:
+            self.migrate("--model", "books")
+
+        urls = set().union(*(call.args[0] for call in enqueue.call_args_list))
+        self.assertIn(f"/api/books/{book.pk}/", urls)
+        self.assertIn(f"/api/books/?category_id={category.pk}", urls)
+        self.assertIn("/api/books/", urls)
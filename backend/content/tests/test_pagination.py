@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from content.models import Book, Partner
+
+
+def cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class KeysetPaginationTests(TestCase):
+    """``?page_size=`` pages follow ``(-created_at, -id)`` forwards and backwards."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        # Three pairs of books share their created_at, so pages must break ties on id.
+        Book.objects.bulk_create(
+            Book(title=f"Book {index}", author="Pages", created_at=now - timedelta(minutes=index // 2))
+            for index in range(7)
+        )
+        cls.expected = [str(pk) for pk in Book.objects.order_by("-created_at", "-id").values_list("pk", flat=True)]
+        Partner.objects.bulk_create(Partner(name=name) for name in ("Beta", "Alpha", "Gamma"))
+
+    def get(self, url):
+        response = self.client.get(url, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 200, url)
+        return response.json()
+
+    def walk(self, url, direction):
+        pages = []
+        while url:
+            page = self.get(url)
+            pages.append([book["id"] for book in page["results"]])
+            url = page[direction]
+        return pages
+
+    def test_pages_forwards_and_backwards(self):
+        for fast in (False, True):
+            with self.subTest(fast=fast), override_settings(API_FAST_READS=fast):
+                forwards = self.walk("/api/books/?page_size=2", "next")
+                self.assertEqual([len(page) for page in forwards], [2, 2, 2, 1])
+                self.assertEqual(sum(forwards, []), self.expected)
+
+                last = self.get("/api/books/?page_size=2")
+                while last["next"]:
+                    last = self.get(last["next"])
+                self.assertIsNotNone(last["previous"])
+                backwards = self.walk(last["previous"], "previous")
+                self.assertEqual(backwards, forwards[-2::-1])
+                self.assertIsNone(self.get("/api/books/?page_size=2")["previous"])
+
+    def test_rows_added_before_the_cursor_do_not_shift_pages(self):
+        first = self.get("/api/books/?page_size=3")
+        Book.objects.create(title="Newest", author="Pages")
+        second = self.get(first["next"])
+        self.assertEqual([book["id"] for book in second["results"]], self.expected[3:6])
+
+    def test_name_ordering(self):
+        pages = self.walk("/api/partners/?page_size=2", "next")
+        names = [self.get(f"/api/partners/{pk}/")["name"] for pk in sum(pages, [])]
+        self.assertEqual(names, ["Alpha", "Beta", "Gamma"])
+
+    def test_bad_cursors_are_rejected(self):
+        created_at = timezone.now().isoformat()
+        book = self.expected[0]
+        for token in (
+            "not base64!",
+            base64.urlsafe_b64encode(b"not json").decode(),
+            cursor({"q": [created_at, book]}),
+            cursor({"p": [created_at]}),
+            cursor({"p": "flat"}),
+            cursor({"p": ["yesterday", book]}),
+            cursor({"p": [created_at, "not-a-uuid"]}),
+            cursor({"p": [None, book]}),
+        ):
+            with self.subTest(token):
+                response = self.client.get(f"/api/books/?cursor={token}", HTTP_ACCEPT="application/json")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("cursor", response.json())
@@ -0,0 +1,46 @@
+from django.test import TestCase, override_settings
+
+from content import bootstrap
+from content.management.commands.check_query_budget import (
+    BUDGETS,
+    explain_plans,
+    request_body,
+    seed,
+    send,
+    vendor_budget,
+)
+
+
+@override_settings(API_CACHE_ENABLED=False, IMAGE_RENDITIONS_ASYNC=False, BOOK_TEXT_CACHE_CHARS=0)
+class QueryBudgetTests(TestCase):
+    """Every endpoint runs exactly its budgeted number of queries; see ``check_query_budget``."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ids = seed(books=300)
+
+    def assertWithinBudgets(self, methods):
+        for fast in (False, True):
+            # Otherwise the bootstrap blob of the other variant is served without its four queries.
+            bootstrap._local.clear()
+            for label, method, path, budget in BUDGETS:
+                budget = vendor_budget(budget)
+                if method not in methods or budget is None:
+                    continue
+                with self.subTest(label, fast=fast), override_settings(API_FAST_READS=fast):
+                    url = path.format(**self.ids)
+                    body = request_body(label, self.ids)
+                    with self.assertNumQueries(budget):
+                        response = send(self.client, method, url, body)
+                    self.assertLess(response.status_code, 400, url)
+
+    def test_reads(self):
+        self.assertWithinBudgets({"get"})
+
+    def test_writes(self):
+        self.assertWithinBudgets({"post", "patch"})
+
+    def test_book_list_plans_use_their_indexes(self):
+        for label, index, plan, problems in explain_plans(self.ids):
+            with self.subTest(label):
+                self.assertEqual(problems, [], plan)
@@ -0,0 +1,110 @@
+import shutil
+import sqlite3
+import tempfile
+from contextlib import closing
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.db import OperationalError, connection, connections
+from django.test import TestCase, override_settings
+
+from content import routers
+from content.models import Partner
+
+REPLICA = "replica_1"
+
+
+@override_settings(
+    API_CACHE_ENABLED=False,
+    DATABASE_REPLICAS=[REPLICA],
+    DATABASE_ROUTERS=["content.routers.ReplicaRouter"],
+    MIDDLEWARE=[*settings.MIDDLEWARE, "content.routers.ReplicaRoutingMiddleware"],
+)
+@skipUnless(connection.vendor == "sqlite", "copies the SQLite test database")
+class ReplicaRoutingTests(TestCase):
+    """Route requests between the test database and a second SQLite file standing in for a replica.
+
+    The replica holds different rows than the primary, so each response shows where it was read.
+    """
+
+    # Resolved in setUpClass, after the replica alias exists; the test runner only knows "default".
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        # The replica starts as a copy of the migrated test database, like `cp db.sqlite3 replica.sqlite3`.
+        cls.directory = Path(tempfile.mkdtemp())
+        path = cls.directory / "replica.sqlite3"
+        primary = connections["default"]
+        primary.ensure_connection()
+        with closing(sqlite3.connect(path)) as copy:
+            primary.connection.backup(copy)
+        connections.settings[REPLICA] = {
+            **connections.settings["default"],
+            "NAME": str(path),
+            "TEST": {**connections.settings["default"]["TEST"], "MIRROR": None},
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        shutil.rmtree(cls.directory)
+
+    @classmethod
+    def setUpTestData(cls):
+        Partner.objects.using("default").create(name="Primary")
+        cls.copy = Partner.objects.using(REPLICA).create(name="Replica")
+
+    def setUp(self):
+        routers._down_until.clear()
+        routers._checked_until.clear()
+        self.addCleanup(routers._down_until.clear)
+
+    def names(self):
+        response = self.client.get("/api/partners/", HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 200)
+        return [partner["name"] for partner in response.json()]
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.names(), ["Replica"])
+        response = self.client.get(f"/api/partners/{self.copy.pk}/", HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 200)
+        # Everything but list and retrieve stays on the primary.
+        self.assertEqual(self.client.get("/api/sync/", HTTP_ACCEPT="application/json").status_code, 200)
+
+    def test_writers_read_their_writes(self):
+        response = self.client.post("/api/partners/", {"name": "Written"}, content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(routers.STICKY_COOKIE, self.client.cookies)
+        self.assertFalse(Partner.objects.using(REPLICA).filter(name="Written").exists())
+        self.assertEqual(self.names(), ["Primary", "Written"])
+
+        # Once the window has passed, reads go back to the replica.
+        self.client.cookies.pop(routers.STICKY_COOKIE)
+        self.assertEqual(self.names(), ["Replica"])
+
+    def test_unreachable_replica_falls_back_to_the_primary(self):
+        replica = connections[REPLICA]
+        # close(): the real connection holds this test's transaction.
+        with (
+            mock.patch.object(replica, "ensure_connection", side_effect=OperationalError("down")) as connect,
+            mock.patch.object(replica, "close"),
+        ):
+            self.assertEqual(self.names(), ["Primary"])
+            self.assertIn(REPLICA, routers._down_until)
+            # Skipped for REPLICA_RETRY_SECONDS without trying to connect again.
+            self.assertEqual(self.names(), ["Primary"])
+        self.assertEqual(connect.call_count, 1)
+
+    def test_failing_queries_mark_the_replica_down(self):
+        routers._install_failure_detector(connection=connections[REPLICA])
+        self.addCleanup(connections[REPLICA].execute_wrappers.remove, routers._mark_down_on_failure)
+        with mock.patch("content.routers.ReplicaRouter.db_for_read", return_value=REPLICA):
+            with self.assertRaises(OperationalError):
+                Partner.objects.raw("SELECT * FROM missing_table")[0]
+        self.assertFalse(routers.is_healthy(REPLICA))
@@ -0,0 +1,67 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from content import search
+from content.models import Book
+
+
+@override_settings(API_CACHE_ENABLED=False)
+class BookSearchTests(TestCase):
+    """``/api/books/?q=`` through the search index of the test database."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.title = Book.objects.create(title="The Whale", author="Melville")
+        cls.description = Book.objects.create(title="Sea Stories", author="Conrad", description="A whale of a tale")
+        cls.text = Book.objects.create(
+            title="Harbour", author="Unknown", content="<p>Far out at sea a whale surfaced at dawn.</p>"
+        )
+        Book.objects.create(title="Unrelated", author="Nobody", content="Nothing to see here.")
+
+    def search(self, query):
+        response = self.client.get("/api/books/", {"q": query}, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_title_outranks_description_outranks_text(self):
+        if not isinstance(search.get_backend(), search.IndexedBookSearch):
+            self.skipTest(f"no search index on {connection.vendor}")
+        results = self.search("whale")
+        self.assertEqual(
+            [book["id"] for book in results],
+            [str(self.title.pk), str(self.description.pk), str(self.text.pk)],
+        )
+        ranks = [book["search_rank"] for book in results]
+        self.assertEqual(ranks, sorted(ranks, reverse=True))
+        self.assertIn("<mark>whale</mark>", results[2]["search_snippet"].lower())
+
+    @skipUnless(connection.vendor == "sqlite", "FTS5 is SQLite only")
+    def test_fts5_index(self):
+        self.assertIsInstance(search.get_backend(), search.SqliteBookSearch)
+        # The last term matches as a prefix; the others must match whole.
+        self.assertEqual([book["title"] for book in self.search("surfaced da")], ["Harbour"])
+        self.assertEqual(self.search("surf dawn"), [])
+        # Punctuation is not FTS5 syntax.
+        self.assertEqual(self.search('"(*'), [])
+
+        self.text.content = "<p>Only gulls here now.</p>"
+        self.text.save()
+        self.assertEqual(self.search("dawn"), [])
+        self.assertEqual([book["title"] for book in self.search("gulls")], ["Harbour"])
+
+        self.title.delete()
+        self.assertNotIn("The Whale", [book["title"] for book in self.search("whale")])
+
+    @skipUnless(connection.vendor == "sqlite", "drops the FTS5 table")
+    def test_missing_index_falls_back_to_metadata_lookups(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE content_book_fts")
+        self.assertIsInstance(search.get_backend(), search.FallbackBookSearch)
+
+        results = self.search("whale")
+        # Only title, author and description are searched, without ranks or snippets.
+        self.assertEqual({book["id"] for book in results}, {str(self.title.pk), str(self.description.pk)})
+        self.assertEqual({book["search_rank"] for book in results}, {0.0})
+        self.assertEqual({book["search_snippet"] for book in results}, {None})
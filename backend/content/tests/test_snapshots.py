@@ -0,0 +1,97 @@
+import gzip
+import io
+import json
+import shutil
+import tempfile
+import uuid
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from content import snapshots
+from content.models import Book, Category
+
+
+class AffectedUrlsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.fiction = Category.objects.create(name="Fiction")
+        cls.poetry = Category.objects.create(name="Poetry")
+        cls.neighbour = Book.objects.create(title="Neighbour", author="A", category=cls.fiction)
+
+    def test_new_book_leaves_the_other_books_of_its_category_alone(self):
+        book = Book.objects.create(title="New", author="A", category=self.fiction)
+        urls = snapshots.affected_urls(Book, [book], created=True)
+        self.assertEqual(
+            urls,
+            {
+                "/api/books/",
+                "/api/categories/",
+                "/api/bootstrap/",
+                f"/api/books/{book.pk}/",
+                f"/api/books/?category_id={self.fiction.pk}",
+            },
+        )
+
+    def test_moved_book_rewrites_both_category_lists(self):
+        book = Book.objects.get(pk=self.neighbour.pk)
+        book.category = self.poetry
+        urls = snapshots.affected_urls(Book, [book])
+        self.assertIn(f"/api/books/?category_id={self.fiction.pk}", urls)
+        self.assertIn(f"/api/books/?category_id={self.poetry.pk}", urls)
+
+    def test_book_of_unknown_origin_rewrites_every_category_list(self):
+        urls = snapshots.affected_urls(Book, [Book(pk=self.neighbour.pk, category=self.poetry)])
+        self.assertIn(f"/api/books/?category_id={self.fiction.pk}", urls)
+
+    def test_category_edit_rewrites_its_books(self):
+        urls = snapshots.affected_urls(Category, [self.fiction])
+        self.assertIn(f"/api/books/{self.neighbour.pk}/", urls)
+        self.assertIn("/api/books/", urls)
+
+
+@override_settings(API_CACHE_ENABLED=False, ALLOWED_HOSTS=["localhost"])
+class PublisherTests(TestCase):
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        self.book = Book.objects.create(title="Published", author="A")
+
+    def test_publish_writes_hashed_compressed_copies_and_a_manifest(self):
+        publisher = snapshots.Publisher(root=self.root, base_url="http://localhost")
+        written, unchanged, removed = publisher.publish(snapshots.all_urls(), prune=True)
+        self.assertEqual((written, unchanged, removed), (6, 0, 0))
+
+        body = (self.root / "api/books" / str(self.book.pk) / "index.json").read_bytes()
+        self.assertEqual(json.loads(body)["title"], "Published")
+        self.assertEqual(gzip.decompress((self.root / f"api/books/{self.book.pk}/index.json.gz").read_bytes()), body)
+        if snapshots.brotli is not None:
+            brotli_copy = (self.root / f"api/books/{self.book.pk}/index.json.br").read_bytes()
+            self.assertEqual(snapshots.brotli.decompress(brotli_copy), body)
+        manifest = json.loads((self.root / "manifest.json").read_text())
+        self.assertTrue((self.root / manifest[f"/api/books/{self.book.pk}/"]["file"]).exists())
+
+        self.assertEqual(publisher.publish(snapshots.all_urls(), prune=True), (0, 6, 0))
+        self.book.delete()
+        self.assertEqual(publisher.publish(snapshots.all_urls(), prune=True)[2], 1)
+        self.assertFalse((self.root / f"api/books/{self.book.pk}/index.json").exists())
+
+
+class ImportSchedulesSnapshotsTests(TestCase):
+    def test_import_schedules_each_batch(self):
+        category = Category.objects.create(name="Imported")
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory)
+        path = directory / "books.jsonl"
+        row = {"id": str(uuid.uuid4()), "title": "T", "author": "A", "category_id": str(category.pk)}
+        path.write_text(json.dumps(row) + "\n")
+
+        with override_settings(API_SNAPSHOTS_ON_COMMIT=True), mock.patch("content.snapshots._enqueue") as enqueue:
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command("import_content", "books", str(path), stdout=io.StringIO())
+
+        urls = set().union(*(call.args[0] for call in enqueue.call_args_list))
+        self.assertIn(f"/api/books/{row['id']}/", urls)
+        self.assertIn(f"/api/books/?category_id={category.pk}", urls)
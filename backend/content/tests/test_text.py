@@ -0,0 +1,100 @@
+from django.test import SimpleTestCase, TestCase
+
+from content.models import Book, BookBody
+from content.text import derive_text, sanitize_html, split_pages
+
+
+class SanitizeHtmlTests(SimpleTestCase):
+    def test_keeps_allowed_markup(self):
+        html, plain, headings = sanitize_html('<p title="t">Some <em>text</em> &amp; <a href="/x">a link</a></p>')
+        self.assertEqual(html, '<p title="t">Some <em>text</em> &amp; <a href="/x">a link</a></p>')
+        self.assertEqual(plain, "Some text & a link")
+        self.assertEqual(headings, [])
+
+    def test_drops_scripts_handlers_and_unsafe_urls(self):
+        html, plain, _ = sanitize_html(
+            '<p onclick="x()">Hi<script>alert(1)</script></p>'
+            '<a href="java\tscript:alert(1)">bad</a><img src="javascript:x" alt="a"><style>p{}</style>'
+        )
+        self.assertEqual(html, '<p>Hi</p><a>bad</a><img alt="a">')
+        self.assertEqual(plain, "Hi\nbad")
+
+    def test_void_dropped_tags_do_not_swallow_the_rest(self):
+        for markup in ('<embed src="x">', '<embed src="x"/>', "</embed>", "<object><embed/></object>"):
+            with self.subTest(markup):
+                html, plain, _ = sanitize_html(f"<p>Before</p>{markup}<p>After</p>")
+                self.assertEqual(html, "<p>Before</p><p>After</p>")
+                self.assertEqual(plain, "Before\n\nAfter")
+
+    def test_unknown_tags_keep_their_text_and_unclosed_tags_are_closed(self):
+        html, _, _ = sanitize_html("<section><p>One <b>two</p><custom>three</custom></section><i>four")
+        self.assertEqual(html, "<p>One <b>two</b></p>three<i>four</i>")
+
+    def test_headings_get_anchors(self):
+        html, _, headings = sanitize_html("<h1>Part <i>one</i></h1><p>x</p><h3>Detail</h3><h4>Not listed</h4>")
+        self.assertTrue(html.startswith('<h1 id="section-1">Part <i>one</i></h1>'))
+        self.assertEqual(
+            [(heading["title"], heading["level"], heading["anchor"]) for heading in headings],
+            [("Part one", 1, "section-1"), ("Detail", 3, "section-2")],
+        )
+
+
+class DeriveTextTests(SimpleTestCase):
+    def test_plain_text(self):
+        derived = derive_text("one two three", page_chars=100, words_per_minute=2)
+        self.assertEqual(derived.format, "text")
+        self.assertEqual(derived.text, "one two three")
+        self.assertEqual(derived.word_count, 3)
+        self.assertEqual(derived.reading_minutes, 2)
+        self.assertIsNone(derived.source)
+
+    def test_html_keeps_the_source_only_when_sanitizing_changed_it(self):
+        clean = derive_text("<p>Clean</p>", page_chars=100, words_per_minute=200)
+        self.assertEqual(clean.format, "html")
+        self.assertIsNone(clean.source)
+        dirty = derive_text("<p>Dirty<script>x</script></p>", page_chars=100, words_per_minute=200)
+        self.assertEqual(dirty.text, "<p>Dirty</p>")
+        self.assertEqual(dirty.source, "<p>Dirty<script>x</script></p>")
+
+    def test_table_of_contents_points_at_pages(self):
+        text = "<h1>One</h1>" + "<p>word</p>" * 30 + "<h2>Two</h2><p>end</p>"
+        derived = derive_text(text, page_chars=100, words_per_minute=200)
+        self.assertEqual([entry["title"] for entry in derived.table_of_contents], ["One", "Two"])
+        self.assertEqual(derived.table_of_contents[0]["page"], 1)
+        self.assertEqual(derived.table_of_contents[1]["page"], len(derived.pages))
+        self.assertEqual(derived.pages, split_pages(derived.text, 100))
+
+    def test_no_text(self):
+        derived = derive_text(None, page_chars=100, words_per_minute=200)
+        self.assertEqual((derived.text, derived.word_count, derived.content_hash), (None, 0, ""))
+
+
+class BookTextPipelineTests(TestCase):
+    def test_save_stores_sanitized_text_derived_fields_and_source(self):
+        book = Book(title="T", author="A")
+        book.content = "<h1>Start</h1><p>Hello <b>world</b></p><embed src=x><p>Rest of the book</p>"
+        book.save()
+
+        book = Book.objects.get(pk=book.pk)
+        self.assertEqual(book.content, '<h1 id="section-1">Start</h1><p>Hello <b>world</b></p><p>Rest of the book</p>')
+        self.assertEqual(book.content_format, "html")
+        self.assertEqual(book.word_count, 7)
+        self.assertEqual(book.table_of_contents, [{"title": "Start", "level": 1, "anchor": "section-1", "page": 1}])
+        self.assertEqual(len(book.content_hash), 64)
+        body = BookBody.objects.get(book=book)
+        self.assertIn("<embed src=x>", body.source_text)
+        self.assertEqual(body.plain_text, "Start\n\nHello world\n\nRest of the book")
+
+    def test_clean_text_is_stored_once_and_clearing_removes_the_body(self):
+        book = Book(title="T", author="A")
+        book.content = "Plain text"
+        book.save()
+        body = BookBody.objects.get(book=book)
+        self.assertIsNone(body.source_data)
+        self.assertIsNone(body.plain_data)
+
+        book.content = None
+        book.save()
+        self.assertFalse(BookBody.objects.filter(book=book).exists())
+        book.refresh_from_db()
+        self.assertEqual((book.word_count, book.content_hash, book.content_pages), (0, "", []))
@@ -0,0 +1,308 @@
+"""Helpers for working with book text."""
+
+import bisect
+import hashlib
+import html
+import math
+import re
+import zlib
+from dataclasses import dataclass
+from html.parser import HTMLParser
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for BOOK_BODY_CODEC = "zstd"
+    zstandard = None
+
+HEADING_RE = re.compile(r"<h[12][^>]*>(.*?)</h[12]\s*>", re.IGNORECASE | re.DOTALL)
+TAG_RE = re.compile(r"<[^>]+>")
+HTML_TAG_RE = re.compile(r"<(?:/?[a-zA-Z][\w:-]*|!--)[^>]*>")
+# Places where a page may end without splitting a paragraph, best first.
+BLOCK_ENDINGS = ("</p>", "</div>", "</blockquote>", "</ul>", "</ol>", "\n\n", "<br>", "<br/>", "<br />", "\n")
+
+
+def _clean_heading(raw):
+    return html.unescape(TAG_RE.sub("", raw)).strip() or None
+
+
+def _break_position(text, start, limit):
+    """Pick where a page starting at ``start`` should end, at most ``limit`` chars later."""
+    end = start + limit
+    window_start = start + limit // 2
+    for marker in BLOCK_ENDINGS:
+        found = text.rfind(marker, window_start, end)
+        if found != -1:
+            return found + len(marker)
+    found = max(text.rfind(" ", window_start, end), text.rfind("\t", window_start, end))
+    if found != -1:
+        # Never end a page inside an HTML tag.
+        tag_open = text.rfind("<", start, found)
+        if tag_open > text.rfind(">", start, found):
+            found = tag_open
+        if found > start:
+            return found
+    return end
+
+
+def split_pages(text, page_chars):
+    """Split ``text`` into pages of roughly ``page_chars`` characters.
+
+    Chapters start at ``<h1>``/``<h2>`` headings and always begin a new page;
+    long chapters are broken at the last block boundary (closing paragraph
+    tag or blank line) that fits. Returns a list of dicts with ``start`` and
+    ``end`` character offsets plus the ``chapter`` index and ``title``.
+    """
+    if not text:
+        return []
+    chapters = [(0, None)]
+    for match in HEADING_RE.finditer(text):
+        title = _clean_heading(match.group(1))
+        if match.start() == 0:
+            chapters[0] = (0, title)
+        else:
+            chapters.append((match.start(), title))
+
+    pages = []
+    for index, (start, title) in enumerate(chapters):
+        chapter_end = chapters[index + 1][0] if index + 1 < len(chapters) else len(text)
+        position = start
+        while position < chapter_end:
+            if chapter_end - position <= page_chars:
+                end = chapter_end
+            else:
+                end = _break_position(text, position, page_chars)
+            pages.append({"start": position, "end": end, "chapter": index, "title": title})
+            position = end
+    return pages
+
+
+def looks_like_html(text):
+    return bool(text) and HTML_TAG_RE.search(text) is not None
+
+
+# Sanitizing: tags and attributes that may reach the reader, everything else is
+# dropped (the text inside unknown tags is kept, inside DROPPED_CONTENT_TAGS not).
+ALLOWED_TAGS = set(
+    "a abbr b blockquote br caption cite code dd del div dl dt em figcaption figure h1 h2 h3 h4 h5 h6 hr i img "
+    "ins li mark ol p pre q s small span strong sub sup table tbody td tfoot th thead tr u ul".split()
+)
+ALLOWED_ATTRIBUTES = {
+    "*": {"title", "lang", "dir"},
+    "a": {"href"},
+    "blockquote": {"cite"},
+    "img": {"src", "alt", "width", "height"},
+    "ol": {"start"},
+    "q": {"cite"},
+    "td": {"colspan", "rowspan"},
+    "th": {"colspan", "rowspan", "scope"},
+}
+URL_ATTRIBUTES = {"href", "src", "cite"}
+SAFE_URL_SCHEMES = {"http", "https", "mailto"}
+DROPPED_CONTENT_TAGS = {"script", "style", "iframe", "object", "embed", "template", "noscript", "svg", "math"}
+# Elements that never have an end tag, allowed or not: they must not open anything.
+VOID_TAGS = set("area base br col embed hr img input link meta param source track wbr".split())
+# Tags that end a line of the plain text.
+BLOCK_TAGS = set(
+    "blockquote br caption dd div dl dt figcaption figure h1 h2 h3 h4 h5 h6 hr li ol p pre table tr ul".split()
+)
+# Headings listed in the table of contents; each gets an id="section-N" anchor.
+TOC_TAGS = {"h1": 1, "h2": 2, "h3": 3}
+URL_SCHEME_RE = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*):")
+URL_IGNORED_RE = re.compile(r"[\x00-\x20\x7f]+")
+
+
+def _safe_url(value):
+    # Browsers ignore whitespace and control characters inside a scheme ("java\tscript:").
+    match = URL_SCHEME_RE.match(URL_IGNORED_RE.sub("", value))
+    return match is None or match.group(1).lower() in SAFE_URL_SCHEMES
+
+
+class _Sanitizer(HTMLParser):
+    """One pass over book HTML producing the sanitized HTML, its plain text and its headings."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.html = []
+        self.html_length = 0
+        self.plain = []
+        self.open_tags = []
+        self.dropped_depth = 0
+        self.headings = []
+        self.heading = None
+
+    def emit(self, markup):
+        self.html.append(markup)
+        self.html_length += len(markup)
+
+    def handle_starttag(self, tag, attrs):
+        if self.dropped_depth or tag in DROPPED_CONTENT_TAGS:
+            # A void element such as <embed> has no content to drop.
+            if tag in DROPPED_CONTENT_TAGS and tag not in VOID_TAGS:
+                self.dropped_depth += 1
+            return
+        if tag in BLOCK_TAGS:
+            self.plain.append("\n")
+        if tag not in ALLOWED_TAGS:
+            return
+        allowed = ALLOWED_ATTRIBUTES["*"] | ALLOWED_ATTRIBUTES.get(tag, set())
+        kept = [
+            (name, value or "")
+            for name, value in attrs
+            if name in allowed and (name not in URL_ATTRIBUTES or _safe_url(value or ""))
+        ]
+        if tag in TOC_TAGS and self.heading is None:
+            anchor = f"section-{len(self.headings) + 1}"
+            kept.insert(0, ("id", anchor))
+            self.heading = {"title": [], "level": TOC_TAGS[tag], "anchor": anchor, "offset": self.html_length}
+        rendered = "".join(f' {name}="{html.escape(value)}"' for name, value in kept)
+        self.emit(f"<{tag}{rendered}>")
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.dropped_depth:
+            if tag in DROPPED_CONTENT_TAGS and tag not in VOID_TAGS:
+                self.dropped_depth -= 1
+            return
+        if tag in BLOCK_TAGS:
+            self.plain.append("\n")
+        if tag not in self.open_tags:
+            return
+        # Close anything left open inside this element, so the output stays well formed.
+        while self.open_tags:
+            closing = self.open_tags.pop()
+            self.emit(f"</{closing}>")
+            if closing in TOC_TAGS and self.heading is not None:
+                self._finish_heading()
+            if closing == tag:
+                break
+
+    def handle_data(self, data):
+        if self.dropped_depth:
+            return
+        self.emit(html.escape(data, quote=False))
+        self.plain.append(data)
+        if self.heading is not None:
+            self.heading["title"].append(data)
+
+    def _finish_heading(self):
+        heading, self.heading = self.heading, None
+        title = " ".join("".join(heading["title"]).split())
+        if title:
+            self.headings.append({**heading, "title": title})
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.handle_endtag(self.open_tags[-1])
+
+
+def normalize_plain_text(text):
+    """Collapse runs of spaces, trim every line and keep at most one blank line between paragraphs."""
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def sanitize_html(text):
+    """Return ``(html, plain_text, headings)`` for book HTML.
+
+    Only ``ALLOWED_TAGS`` and ``ALLOWED_ATTRIBUTES`` survive, URLs must be
+    relative or use a ``SAFE_URL_SCHEMES`` scheme, and unclosed elements are
+    closed. ``headings`` are the ``TOC_TAGS`` with their title, level,
+    anchor and offset in the sanitized HTML.
+    """
+    parser = _Sanitizer()
+    parser.feed(text)
+    parser.close()
+    return "".join(parser.html), normalize_plain_text("".join(parser.plain)), parser.headings
+
+
+@dataclass(frozen=True)
+class DerivedText:
+    """Book text after the save pipeline, and everything computed from it.
+
+    ``source`` is the text as written when sanitizing changed it, else ``None``.
+    """
+
+    text: str | None
+    plain: str | None
+    format: str
+    pages: list
+    word_count: int
+    reading_minutes: int
+    table_of_contents: list
+    content_hash: str
+    source: str | None = None
+
+
+def derive_text(text, page_chars, words_per_minute):
+    """Sanitize ``text`` (when it is HTML) and compute its pages, word count, reading time, contents and hash."""
+    if text is None:
+        return DerivedText(None, None, "", [], 0, 0, [], "")
+    source = text
+    if looks_like_html(text):
+        text, plain, headings = sanitize_html(text)
+        text_format = "html"
+    else:
+        plain, headings = text, []
+        text_format = "text"
+    pages = split_pages(text, page_chars)
+    starts = [page["start"] for page in pages]
+    table_of_contents = [
+        {
+            "title": heading["title"],
+            "level": heading["level"],
+            "anchor": heading["anchor"],
+            "page": max(bisect.bisect_right(starts, heading["offset"]), 1),
+        }
+        for heading in headings
+    ]
+    word_count = len(plain.split())
+    return DerivedText(
+        text=text,
+        plain=plain,
+        format=text_format,
+        pages=pages,
+        word_count=word_count,
+        reading_minutes=math.ceil(word_count / words_per_minute),
+        table_of_contents=table_of_contents,
+        content_hash=hashlib.sha256(text.encode()).hexdigest(),
+        source=source if source != text else None,
+    )
+
+
+def compress_text(text, codec):
+    """Compress ``text`` (UTF-8) with ``codec``, ``"zlib"`` or ``"zstd"``."""
+    data = text.encode()
+    if codec == "zlib":
+        return zlib.compress(data, 6)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError('BOOK_BODY_CODEC = "zstd" needs the zstandard package')
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    raise ValueError(f"Unknown codec {codec!r}")
+
+
+def decompress_text(data, codec, max_bytes=-1):
+    """Inverse of :func:`compress_text`.
+
+    With ``max_bytes`` only that much of the text is decoded, which also works
+    on a prefix of ``data``; a character cut in half at the end is dropped.
+    """
+    data = bytes(data)
+    if codec == "zlib":
+        decompressor = zlib.decompressobj()
+        raw = decompressor.decompress(data, max_bytes) if max_bytes >= 0 else decompressor.decompress(data)
+    elif codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Decompressing zstd book text needs the zstandard package")
+        reader = zstandard.ZstdDecompressor().stream_reader(data, read_across_frames=True)
+        raw = reader.read(max_bytes)
+    else:
+        raise ValueError(f"Unknown codec {codec!r}")
+    return raw.decode(errors="ignore" if max_bytes >= 0 else "strict")
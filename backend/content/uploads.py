@@ -0,0 +1,33 @@
+"""Upload handling that keeps large files out of worker memory.
+
+``UploadLimitHandler`` runs before Django's own handlers
+(``FILE_UPLOAD_HANDLERS``): it refuses a file as soon as more than
+``MEDIA_UPLOAD_MAX_BYTES`` of it has arrived, before the rest is read.
+Files that fit are kept in memory up to ``FILE_UPLOAD_MAX_MEMORY_SIZE`` and
+streamed to a temporary file in ``FILE_UPLOAD_TEMP_DIR`` above it, which
+``BlobStorage`` then hashes and moves into place without copying it into
+memory.
+"""
+
+from django.conf import settings
+from django.core.exceptions import RequestDataTooBig
+from django.core.files.uploadhandler import FileUploadHandler
+
+
+class UploadLimitHandler(FileUploadHandler):
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.MEDIA_UPLOAD_MAX_BYTES:
+            # Django answers 400, as for DATA_UPLOAD_MAX_MEMORY_SIZE.
+            raise RequestDataTooBig(
+                f"Uploaded file {self.file_name!r} is larger than MEDIA_UPLOAD_MAX_BYTES "
+                f"({settings.MEDIA_UPLOAD_MAX_BYTES} bytes)."
+            )
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
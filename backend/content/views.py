@@ -1,72 +1,281 @@
-import logging
+import threading
+import uuid
+from collections import OrderedDict
 
+from django.conf import settings
+from django.db.models import Case, IntegerField, When
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from rest_framework import parsers, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.utils.urls import replace_query_param
 
-from .models import Book, Category, Partner, TeamMember
+from .bulk import BulkWriteMixin
+from .cache import CachedResponseMixin
+from .conditional import ConditionalGetMixin
+from .counters import refresh_categories
+from .fastpath import FastListMixin
+from .http import UnsatisfiableRange, if_range_matches, iter_bytes, iter_text, parse_range
+from .models import Book, BookBody, Category, Partner, TeamMember
+from .pagination import KeysetPagination, NameKeysetPagination
+from .search import rank_books
+from .sync import ChangeFeedMixin
+from .text import decompress_text, looks_like_html
 from .serializers import (
+    BookSearchResultSerializer,
     BookSerializer,
+    BookSummarySerializer,
     CategorySerializer,
     PartnerSerializer,
     TeamMemberSerializer,
+    requested_fields,
 )
 
+# Per-process copies of recently read book texts, so that paging through a book
+# or resuming a download doesn't decompress it again; see BOOK_TEXT_CACHE_CHARS.
+_texts = OrderedDict()
+_texts_lock = threading.Lock()
 
-logger = logging.getLogger(__name__)
 
-
-class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+class CategoryViewSet(
+    ChangeFeedMixin, CachedResponseMixin, ConditionalGetMixin, FastListMixin, viewsets.ReadOnlyModelViewSet
+):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     ordering = ["name"]
     pagination_class = None
-
-    def get_queryset(self):
-        qs = super().get_queryset()
-        count = qs.count()
-        logger.info("Category queryset requested: count=%s", count)
-        return qs
+    # book_count and latest_book_at follow the books without touching the category's updated_at.
+    cache_dependencies = (Category, Book)
+    object_validator_fields = ("updated_at", "stats_updated_at")
 
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(
+    BulkWriteMixin, ChangeFeedMixin, CachedResponseMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet
+):
     serializer_class = BookSerializer
     parser_classes = (parsers.MultiPartParser, parsers.FormParser, parsers.JSONParser)
-    pagination_class = None
+    pagination_class = KeysetPagination
+    # Books embed their category, so category edits and deletes must change the validators.
+    collection_dependencies = (Category,)
+    cache_dependencies = (Book, Category)
+    object_validator_fields = ("updated_at", "category__updated_at")
+    bulk_response_serializer_class = BookSummarySerializer
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            if self._search_query():
+                return BookSearchResultSerializer
+            return BookSummarySerializer
+        return BookSerializer
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == "list" and self._search_query():
+            context["search_hits"] = self._search_hits()
+        return context
 
     def get_queryset(self):
         qs = Book.objects.select_related("category").all()
+        if self.action not in ("list", "content", "bulk") and not self._content_excluded():
+            qs = qs.with_content()
         category_id = self.request.query_params.get("category_id")
         if category_id:
+            try:
+                uuid.UUID(category_id)
+            except ValueError:
+                raise ValidationError({"category_id": ["Must be a valid UUID."]})
             qs = qs.filter(category_id=category_id)
-        ordered_qs = qs.order_by("-created_at")
-        logger.info(
-            "Book queryset requested: category_id=%s count=%s",
-            category_id,
-            ordered_qs.count(),
-        )
-        return ordered_qs
+        if self.action == "list" and self._search_query():
+            # Search results come back in relevance order, capped at SEARCH_MAX_RESULTS.
+            hits = self._search_hits()
+            ranking = [When(pk=book_id, then=position) for position, book_id in enumerate(hits)]
+            if not ranking:
+                return qs.none()
+            return qs.filter(pk__in=list(hits)).order_by(Case(*ranking, output_field=IntegerField()))
+        return qs.order_by("-created_at", "-id")
+
+    @action(detail=True, methods=["get"], url_path="content")
+    def content(self, request, pk=None):
+        """Serve the book text one page, chapter or character window at a time.
+
+        ``?page=N`` (default 1) and ``?chapter=N`` use the boundaries stored in
+        ``content_pages``; ``?offset=&length=`` selects raw characters. A
+        ``Range: bytes=`` header addresses the UTF-8 encoded text instead.
+        """
+        book = self.get_object()
+        timestamp = book.updated_at.timestamp()
+        etag = f'"{book.pk.hex}-{int(timestamp * 1_000_000)}"'
+        last_modified = http_date(timestamp)
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=int(timestamp))
+        if not_modified is not None:
+            return self._with_content_headers(not_modified, etag, last_modified)
+
+        if "Range" in request.headers:
+            # Byte ranges always address the whole text; a stale If-Range gets all of it.
+            honour_range = if_range_matches(request, etag, last_modified)
+            return self._content_range_response(request, book, etag, last_modified, honour_range)
+
+        pages = book.content_pages or []
+        start, end, page_number = self._content_window(request, pages)
+        full_text = self._book_text(book)
+        text = full_text[start:end]
+        content_type = self._content_type(book, full_text)
+
+        response = StreamingHttpResponse(iter_text(text), content_type=f"{content_type}; charset=utf-8")
+        response["X-Page-Count"] = str(len(pages))
+        response["X-Content-Chars"] = str(pages[-1]["end"] if pages else 0)
+        response["X-Content-Window"] = f"{start}-{end}"
+        if page_number is not None:
+            response["X-Page"] = str(page_number)
+            links = []
+            url = request.build_absolute_uri()
+            if page_number > 1:
+                links.append(f'<{replace_query_param(url, "page", page_number - 1)}>; rel="prev"')
+            if page_number < len(pages):
+                links.append(f'<{replace_query_param(url, "page", page_number + 1)}>; rel="next"')
+            if links:
+                response["Link"] = ", ".join(links)
+        return self._with_content_headers(response, etag, last_modified)
+
+    def _content_window(self, request, pages):
+        params = request.query_params
+        total = pages[-1]["end"] if pages else 0
+        try:
+            if "offset" in params or "length" in params:
+                offset = int(params.get("offset", 0))
+                length = int(params.get("length", settings.BOOK_PAGE_CHARS))
+                if offset < 0 or length <= 0:
+                    raise ValueError
+                length = min(length, settings.BOOK_PAGE_CHARS * 4)
+                return min(offset, total), min(offset + length, total), None
+            if "chapter" in params:
+                chapter = int(params["chapter"])
+                selected = [page for page in pages if page["chapter"] == chapter - 1]
+                if not selected:
+                    raise NotFound("No such chapter.")
+                return selected[0]["start"], selected[-1]["end"], None
+            page_number = int(params.get("page", 1))
+        except ValueError:
+            raise ValidationError({"detail": "page, chapter, offset and length must be positive integers."})
+        if not pages and page_number == 1:
+            return 0, 0, 1
+        if page_number < 1 or page_number > len(pages):
+            raise NotFound("No such page.")
+        page = pages[page_number - 1]
+        return page["start"], page["end"], page_number
+
+    def _content_range_response(self, request, book, etag, last_modified, honour_range):
+        data = self._book_text(book, encoded=True)
+        content_type = self._content_type(book, data[:8000].decode(errors="ignore"))
+        try:
+            byte_range = parse_range(request.headers["Range"], len(data)) if honour_range else None
+        except UnsatisfiableRange:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{len(data)}"
+            return self._with_content_headers(response, etag, last_modified)
+        if byte_range is None:
+            response = StreamingHttpResponse(iter_bytes(data), content_type=f"{content_type}; charset=utf-8")
+            response["Content-Length"] = str(len(data))
+        else:
+            first, last = byte_range
+            response = StreamingHttpResponse(
+                iter_bytes(data[first : last + 1]), status=206, content_type=f"{content_type}; charset=utf-8"
+            )
+            response["Content-Range"] = f"bytes {first}-{last}/{len(data)}"
+            response["Content-Length"] = str(last - first + 1)
+        return self._with_content_headers(response, etag, last_modified)
+
+    @staticmethod
+    def _content_type(book, text):
+        # Books saved before the text pipeline have no format until derive_book_text runs.
+        html = book.content_format == "html" if book.content_format else looks_like_html(text[:2000])
+        return "text/html" if html else "text/plain"
 
+    @staticmethod
+    def _book_text(book, encoded=False):
+        """Return the text of ``book``, or its UTF-8 bytes with ``encoded``.
 
-class PartnerViewSet(viewsets.ModelViewSet):
+        Texts are cached by ``content_hash``, which changes with every write of
+        the text, so a cached copy is never stale.
+        """
+        key = (book.content_hash, encoded)
+        if book.content_hash:
+            with _texts_lock:
+                if key in _texts:
+                    _texts.move_to_end(key)
+                    return _texts[key]
+        body = BookBody.objects.filter(book_id=book.pk).values_list("codec", "data").first()
+        text = decompress_text(body[1], body[0]) if body is not None else ""
+        value = text.encode() if encoded else text
+        if book.content_hash and len(value) < settings.BOOK_TEXT_CACHE_CHARS:
+            with _texts_lock:
+                _texts[key] = value
+                size = sum(len(cached) for cached in _texts.values())
+                while size > settings.BOOK_TEXT_CACHE_CHARS:
+                    size -= len(_texts.popitem(last=False)[1])
+        return value
+
+    @staticmethod
+    def _with_content_headers(response, etag, last_modified):
+        response["ETag"] = etag
+        response["Last-Modified"] = last_modified
+        response["Accept-Ranges"] = "bytes"
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def prepare_bulk_instance(self, instance, changed):
+        if changed is None or "content" in changed:
+            derived = instance.derive_text_fields()
+            if changed is not None:
+                changed.update(derived)
+
+    def finish_bulk_write(self, written):
+        books = [instance for instance, _ in written if instance.content_changed]
+        if books:
+            BookBody.objects.store(books)
+        categories = set()
+        for instance, changed in written:
+            if changed is None or "category" in changed:
+                categories.update((instance.__dict__.get("_loaded_category_id"), instance.category_id))
+        refresh_categories(categories)
+
+    def paginate_queryset(self, queryset):
+        if self._search_query():
+            return None
+        return super().paginate_queryset(queryset)
+
+    def _search_query(self):
+        return self.request.query_params.get("q", "").strip()
+
+    def _search_hits(self):
+        if not hasattr(self, "_hits"):
+            hits = rank_books(self._search_query(), settings.SEARCH_MAX_RESULTS)
+            self._hits = {hit.book_id: hit for hit in hits}
+        return self._hits
+
+    def _content_excluded(self):
+        fields = requested_fields(self.request)
+        return fields is not None and "content" not in fields
+
+
+class PartnerViewSet(
+    BulkWriteMixin, ChangeFeedMixin, CachedResponseMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet
+):
     queryset = Partner.objects.all().order_by("name")
     serializer_class = PartnerSerializer
     parser_classes = (parsers.MultiPartParser, parsers.FormParser, parsers.JSONParser)
-    pagination_class = None
-
-    def get_queryset(self):
-        qs = super().get_queryset()
-        count = qs.count()
-        logger.info("Partner queryset requested: count=%s", count)
-        return qs
+    pagination_class = NameKeysetPagination
+    cache_dependencies = (Partner,)
 
 
-class TeamMemberViewSet(viewsets.ModelViewSet):
+class TeamMemberViewSet(
+    BulkWriteMixin, ChangeFeedMixin, CachedResponseMixin, ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet
+):
     queryset = TeamMember.objects.all().order_by("name")
     serializer_class = TeamMemberSerializer
     parser_classes = (parsers.MultiPartParser, parsers.FormParser, parsers.JSONParser)
-    pagination_class = None
-
-    def get_queryset(self):
-        qs = super().get_queryset()
-        count = qs.count()
-        logger.info("Team member queryset requested: count=%s", count)
-        return qs
+    pagination_class = NameKeysetPagination
+    cache_dependencies = (TeamMember,)
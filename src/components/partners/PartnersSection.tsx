@@ -1,8 +1,17 @@
 import { usePartners } from '@/hooks/usePartners';
+import { Partner } from '@/types/database';
 import { Handshake } from 'lucide-react';
 
-export function PartnersSection() {
-  const { data: partners = [], isLoading } = usePartners();
+interface PartnersSectionProps {
+  // Partners loaded by the caller; when omitted the section fetches them itself.
+  partners?: Partner[];
+  loading?: boolean;
+}
+
+export function PartnersSection({ partners: provided, loading = false }: PartnersSectionProps = {}) {
+  const query = usePartners(provided === undefined);
+  const partners = provided ?? query.data ?? [];
+  const isLoading = provided === undefined ? query.isLoading : loading;
 
   if (isLoading) {
     return (
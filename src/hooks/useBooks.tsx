@@ -1,39 +1,69 @@
-import { useQuery } from '@tanstack/react-query';
-import { apiGet } from '@/lib/api';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
+import { apiGet, apiGetText } from '@/lib/api';
+import { fetchSyncedList, newestFirst } from '@/lib/sync';
 import { Book } from '@/types/database';
 
+const prepare = (book: Book) => ({
+  ...book,
+  cover_image: book.cover_image_url ?? book.cover_image ?? null,
+});
+
 export function useBooks(categoryId?: string) {
+  const queryClient = useQueryClient();
   return useQuery({
     queryKey: ['books', categoryId],
-    queryFn: async () => {
-      const params = new URLSearchParams();
-      if (categoryId) {
-        params.append('category_id', categoryId);
-      }
+    queryFn: () =>
+      fetchSyncedList<Book>({
+        queryClient,
+        queryKey: ['books', categoryId],
+        collection: 'books',
+        fetchAll: async () => {
+          const params = new URLSearchParams();
+          if (categoryId) {
+            params.append('category_id', categoryId);
+          }
 
-      const queryString = params.toString();
-      const path = `/api/books/${queryString ? `?${queryString}` : ''}`;
-      const data = await apiGet<Book[] | { results?: Book[] }>(path);
-      const items = Array.isArray(data) ? data : data.results ?? [];
-      return items.map((book) => ({
-        ...book,
-        cover_image: book.cover_image_url ?? book.cover_image ?? null,
-      }));
-    },
+          const queryString = params.toString();
+          const path = `/api/books/${queryString ? `?${queryString}` : ''}`;
+          const data = await apiGet<Book[] | { results?: Book[] }>(path);
+          const items = Array.isArray(data) ? data : data.results ?? [];
+          return items.map(prepare);
+        },
+        prepare,
+        include: (book) => !categoryId || book.category_id === categoryId,
+        compare: newestFirst,
+      }),
   });
 }
 
-export function useBook(id: string) {
+// Everything the reader shows except the text itself, which it fetches page by page.
+export const READER_FIELDS = [
+  'id',
+  'title',
+  'author',
+  'description',
+  'content_format',
+  'word_count',
+  'reading_minutes',
+  'table_of_contents',
+  'content_hash',
+  'cover_image',
+  'cover_image_url',
+  'category_id',
+  'category',
+  'created_at',
+  'updated_at',
+];
+
+export function useBook(id: string, fields?: string[]) {
   return useQuery({
-    queryKey: ['book', id],
+    queryKey: ['book', id, fields],
     queryFn: async () => {
       try {
-        const book = await apiGet<Book | null>(`/api/books/${id}/`);
+        const query = fields ? `?fields=${fields.join(',')}` : '';
+        const book = await apiGet<Book | null>(`/api/books/${id}/${query}`);
         if (!book) return null;
-        return {
-          ...book,
-          cover_image: book.cover_image_url ?? book.cover_image ?? null,
-        };
+        return prepare(book);
       } catch (error: any) {
         if (error?.status === 404) {
           return null;
@@ -44,3 +74,31 @@ export function useBook(id: string) {
     enabled: !!id,
   });
 }
+
+export interface BookPage {
+  text: string;
+  page: number;
+  pageCount: number;
+  // Length of the whole text in characters.
+  contentChars: number;
+  isHtml: boolean;
+}
+
+// One page of /api/books/<id>/content/. contentHash keys the cache, so an edited book is fetched again.
+export function useBookPage(id: string, page: number, contentHash?: string) {
+  return useQuery({
+    queryKey: ['book-page', id, contentHash, page],
+    queryFn: async (): Promise<BookPage> => {
+      const { text, headers } = await apiGetText(`/api/books/${id}/content/?page=${page}`);
+      return {
+        text,
+        page: Number(headers.get('X-Page') ?? page),
+        pageCount: Number(headers.get('X-Page-Count') ?? 0),
+        contentChars: Number(headers.get('X-Content-Chars') ?? 0),
+        isHtml: (headers.get('Content-Type') ?? '').startsWith('text/html'),
+      };
+    },
+    enabled: !!id && contentHash !== undefined,
+    placeholderData: (previous) => previous,
+  });
+}
@@ -0,0 +1,34 @@
+import { useQuery, useQueryClient } from '@tanstack/react-query';
+import { apiGet } from '@/lib/api';
+import { BootstrapData } from '@/types/database';
+
+// Landing page data in one request. The lists it contains also seed the
+// categories, partners and team member queries used by the other pages.
+export function useBootstrap() {
+  const queryClient = useQueryClient();
+  return useQuery({
+    queryKey: ['bootstrap'],
+    queryFn: async () => {
+      const data = await apiGet<BootstrapData>('/api/bootstrap/');
+      const result: BootstrapData = {
+        categories: data.categories,
+        books: data.books.map((book) => ({
+          ...book,
+          cover_image: book.cover_image_url ?? book.cover_image ?? null,
+        })),
+        partners: data.partners.map((partner) => ({
+          ...partner,
+          logo: partner.logo_url ?? partner.logo ?? null,
+        })),
+        team_members: data.team_members.map((member) => ({
+          ...member,
+          photo: member.photo_url ?? member.photo ?? null,
+        })),
+      };
+      queryClient.setQueryData(['categories'], result.categories);
+      queryClient.setQueryData(['partners'], result.partners);
+      queryClient.setQueryData(['team_members'], result.team_members);
+      return result;
+    },
+  });
+}
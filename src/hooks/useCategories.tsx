@@ -1,13 +1,23 @@
-import { useQuery } from '@tanstack/react-query';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
 import { apiGet } from '@/lib/api';
+import { byName, fetchSyncedList } from '@/lib/sync';
 import { Category } from '@/types/database';
 
 export function useCategories() {
+  const queryClient = useQueryClient();
   return useQuery({
     queryKey: ['categories'],
-    queryFn: async () => {
-      const data = await apiGet<Category[] | { results?: Category[] }>('/api/categories/');
-      return Array.isArray(data) ? data : data.results ?? [];
-    },
+    queryFn: () =>
+      fetchSyncedList<Category>({
+        queryClient,
+        queryKey: ['categories'],
+        collection: 'categories',
+        fetchAll: async () => {
+          const data = await apiGet<Category[] | { results?: Category[] }>('/api/categories/');
+          return Array.isArray(data) ? data : data.results ?? [];
+        },
+        prepare: (category) => category,
+        compare: byName,
+      }),
   });
 }
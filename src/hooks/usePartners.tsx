@@ -1,17 +1,30 @@
-import { useQuery } from '@tanstack/react-query';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
 import { apiGet } from '@/lib/api';
+import { byName, fetchSyncedList } from '@/lib/sync';
 import { Partner } from '@/types/database';
 
-export function usePartners() {
+const prepare = (partner: Partner) => ({
+  ...partner,
+  logo: partner.logo_url ?? partner.logo ?? null,
+});
+
+export function usePartners(enabled = true) {
+  const queryClient = useQueryClient();
   return useQuery({
     queryKey: ['partners'],
-    queryFn: async () => {
-      const data = await apiGet<Partner[] | { results?: Partner[] }>('/api/partners/');
-      const items = Array.isArray(data) ? data : data.results ?? [];
-      return items.map((partner) => ({
-        ...partner,
-        logo: partner.logo_url ?? partner.logo ?? null,
-      }));
-    },
+    queryFn: () =>
+      fetchSyncedList<Partner>({
+        queryClient,
+        queryKey: ['partners'],
+        collection: 'partners',
+        fetchAll: async () => {
+          const data = await apiGet<Partner[] | { results?: Partner[] }>('/api/partners/');
+          const items = Array.isArray(data) ? data : data.results ?? [];
+          return items.map(prepare);
+        },
+        prepare,
+        compare: byName,
+      }),
+    enabled,
   });
 }
@@ -1,17 +1,29 @@
-import { useQuery } from '@tanstack/react-query';
+import { useQuery, useQueryClient } from '@tanstack/react-query';
 import { apiGet } from '@/lib/api';
+import { byName, fetchSyncedList } from '@/lib/sync';
 import { TeamMember } from '@/types/database';
 
+const prepare = (member: TeamMember) => ({
+  ...member,
+  photo: member.photo_url ?? member.photo ?? null,
+});
+
 export function useTeamMembers() {
+  const queryClient = useQueryClient();
   return useQuery({
     queryKey: ['team_members'],
-    queryFn: async () => {
-      const data = await apiGet<TeamMember[] | { results?: TeamMember[] }>('/api/team-members/');
-      const items = Array.isArray(data) ? data : data.results ?? [];
-      return items.map((member) => ({
-        ...member,
-        photo: member.photo_url ?? member.photo ?? null,
-      }));
-    },
+    queryFn: () =>
+      fetchSyncedList<TeamMember>({
+        queryClient,
+        queryKey: ['team_members'],
+        collection: 'team_members',
+        fetchAll: async () => {
+          const data = await apiGet<TeamMember[] | { results?: TeamMember[] }>('/api/team-members/');
+          const items = Array.isArray(data) ? data : data.results ?? [];
+          return items.map(prepare);
+        },
+        prepare,
+        compare: byName,
+      }),
   });
 }
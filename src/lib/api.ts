@@ -1,6 +1,6 @@
 const API_BASE_URL = import.meta.env.VITE_API_URL || "http://localhost:8000";
 
-async function parseResponse<T>(response: Response): Promise<T> {
+async function checkResponse(response: Response): Promise<void> {
   if (!response.ok) {
     const text = await response.text();
     const error = new Error(text || `Request failed with status ${response.status}`) as Error & {
@@ -9,6 +9,10 @@ async function parseResponse<T>(response: Response): Promise<T> {
     error.status = response.status;
     throw error;
   }
+}
+
+async function parseResponse<T>(response: Response): Promise<T> {
+  await checkResponse(response);
   return response.json() as Promise<T>;
 }
 
@@ -19,3 +23,16 @@ export async function apiGet<T>(path: string, signal?: AbortSignal): Promise<T>
   console.log("[apiGet] Response", response.status, response.statusText);
   return parseResponse<T>(response);
 }
+
+export interface TextResponse {
+  text: string;
+  headers: Headers;
+}
+
+// For endpoints that answer with text rather than JSON, such as /api/books/<id>/content/.
+export async function apiGetText(path: string, signal?: AbortSignal): Promise<TextResponse> {
+  const url = new URL(path, API_BASE_URL);
+  const response = await fetch(url.toString(), { signal });
+  await checkResponse(response);
+  return { text: await response.text(), headers: response.headers };
+}
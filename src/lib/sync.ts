@@ -0,0 +1,90 @@
+import { QueryClient, QueryKey } from '@tanstack/react-query';
+import { apiGet } from '@/lib/api';
+
+export type SyncCollection = 'books' | 'categories' | 'partners' | 'team_members';
+
+interface CollectionChanges<T> {
+  reset: boolean;
+  changed: T[];
+  deleted: string[];
+}
+
+type SyncResponse<T> = { token: string } & Partial<Record<SyncCollection, CollectionChanges<T>>>;
+
+interface SyncedListOptions<T> {
+  queryClient: QueryClient;
+  queryKey: QueryKey;
+  collection: SyncCollection;
+  // Fetches the whole list; used on the first load and whenever the server asks for a reset.
+  fetchAll: () => Promise<T[]>;
+  prepare: (item: T) => T;
+  // Keeps changed rows out of a filtered list (e.g. books of another category).
+  include?: (item: T) => boolean;
+  compare: (a: T, b: T) => number;
+}
+
+// Sync token of each cached list, keyed by its query key.
+const tokens = new Map<string, string>();
+
+function syncPath(collection: SyncCollection, token?: string) {
+  const params = new URLSearchParams({ collections: collection });
+  if (token) {
+    params.append('updated_since', token);
+  }
+  return `/api/sync/?${params.toString()}`;
+}
+
+// Refreshes a cached list from /api/sync/ when it has a token, so a stale
+// query downloads only the rows that changed since the last fetch.
+export async function fetchSyncedList<T extends { id: string }>(options: SyncedListOptions<T>): Promise<T[]> {
+  const { queryClient, queryKey, collection } = options;
+  const key = JSON.stringify(queryKey);
+  const previous = queryClient.getQueryData<T[]>(queryKey);
+  const token = tokens.get(key);
+
+  if (previous && token) {
+    const data = await apiGet<SyncResponse<T>>(syncPath(collection, token));
+    const changes = data[collection];
+    if (changes && !changes.reset) {
+      tokens.set(key, data.token);
+      return applyChanges(previous, changes, options);
+    }
+  }
+
+  // Taking the token before the list can only repeat changes later, never miss one.
+  const { token: next } = await apiGet<SyncResponse<T>>(syncPath(collection));
+  const items = await options.fetchAll();
+  tokens.set(key, next);
+  return items;
+}
+
+function applyChanges<T extends { id: string }>(
+  previous: T[],
+  changes: CollectionChanges<T>,
+  options: SyncedListOptions<T>,
+): T[] {
+  if (!changes.changed.length && !changes.deleted.length) {
+    return previous;
+  }
+  const items = new Map(previous.map((item) => [item.id, item]));
+  for (const id of changes.deleted) {
+    items.delete(id);
+  }
+  for (const item of changes.changed) {
+    const prepared = options.prepare(item);
+    if (!options.include || options.include(prepared)) {
+      items.set(prepared.id, prepared);
+    } else {
+      items.delete(prepared.id);
+    }
+  }
+  return Array.from(items.values()).sort(options.compare);
+}
+
+export function byName<T extends { id: string; name: string }>(a: T, b: T) {
+  return a.name.localeCompare(b.name) || a.id.localeCompare(b.id);
+}
+
+export function newestFirst<T extends { id: string; created_at: string }>(a: T, b: T) {
+  return b.created_at.localeCompare(a.created_at) || b.id.localeCompare(a.id);
+}
@@ -1,7 +1,6 @@
 import { Link } from 'react-router-dom';
 import { Layout } from '@/components/layout/Layout';
 import { useCategories } from '@/hooks/useCategories';
-import { useBooks } from '@/hooks/useBooks';
 import { BookOpen, ArrowRight } from 'lucide-react';
 
 const genreColors = [
@@ -15,11 +14,6 @@ const genreColors = [
 
 export default function Genres() {
   const { data: categories = [], isLoading } = useCategories();
-  const { data: books = [] } = useBooks();
-
-  const getCategoryBookCount = (categoryId: string) => {
-    return books.filter((book) => book.category_id === categoryId).length;
-  };
 
   if (isLoading) {
     return (
@@ -70,7 +64,7 @@ export default function Genres() {
             ) : (
               <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
                 {categories.map((category, index) => {
-                  const bookCount = getCategoryBookCount(category.id);
+                  const bookCount = category.book_count;
                   const colorClass = genreColors[index % genreColors.length];
                   
                   return (
@@ -3,16 +3,15 @@ import { Layout } from '@/components/layout/Layout';
 import { SparkLogo3D } from '@/components/3d/SparkLogo';
 import { BookGrid } from '@/components/books/BookGrid';
 import { PartnersSection } from '@/components/partners/PartnersSection';
-import { useBooks } from '@/hooks/useBooks';
-import { useCategories } from '@/hooks/useCategories';
+import { useBootstrap } from '@/hooks/useBootstrap';
 import { ArrowRight, BookOpen, Sparkles, Users, Library } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 
 export default function Index() {
-  const { data: books = [], isLoading: booksLoading } = useBooks();
-  const { data: categories = [] } = useCategories();
+  const { data, isLoading } = useBootstrap();
+  const categories = data?.categories ?? [];
 
-  const featuredBooks = books.slice(0, 4);
+  const featuredBooks = (data?.books ?? []).slice(0, 4);
 
   return (
     <Layout>
@@ -129,7 +128,7 @@ export default function Index() {
             </Link>
           </div>
           
-          <BookGrid books={featuredBooks} loading={booksLoading} />
+          <BookGrid books={featuredBooks} loading={isLoading} />
         </div>
       </section>
 
@@ -173,7 +172,7 @@ export default function Index() {
       )}
 
       {/* Partners Section */}
-      <PartnersSection />
+      <PartnersSection partners={data?.partners ?? []} loading={isLoading} />
 
       {/* CTA Section */}
       <section className="py-24">
@@ -1,12 +1,46 @@
+import { useEffect, useState } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import { Layout } from '@/components/layout/Layout';
-import { useBook } from '@/hooks/useBooks';
-import { ArrowLeft, BookOpen, Clock, User } from 'lucide-react';
+import { type BookPage, READER_FIELDS, useBook, useBookPage } from '@/hooks/useBooks';
+import { ArrowLeft, BookOpen, ChevronLeft, ChevronRight, Clock, User } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 
+// Scale the words on the loaded page up to the whole text, at 200 words per minute.
+function estimateReadingTime(page?: BookPage) {
+  if (!page?.text) return 0;
+  const plainText = page.text.replace(/<[^>]*>/g, ' ');
+  const wordCount = plainText.split(/\s+/).filter(w => w.length > 0).length;
+  return Math.ceil((wordCount * Math.max(page.contentChars, page.text.length)) / page.text.length / 200);
+}
+
 export default function ReadBook() {
   const { id } = useParams<{ id: string }>();
-  const { data: book, isLoading } = useBook(id || '');
+  const { data: book, isLoading } = useBook(id || '', READER_FIELDS);
+  // The text is fetched one page at a time from /api/books/<id>/content/.
+  const [page, setPage] = useState(1);
+  const [anchor, setAnchor] = useState<string | null>(null);
+  const { data: bookPage, isLoading: isPageLoading } = useBookPage(id || '', page, book?.content_hash);
+
+  useEffect(() => {
+    setPage(1);
+    setAnchor(null);
+  }, [id]);
+
+  useEffect(() => {
+    // Wait for the page with the heading before jumping to it; otherwise go to the top of the new page.
+    if (!bookPage || bookPage.page !== page) return;
+    if (anchor) {
+      document.getElementById(anchor)?.scrollIntoView();
+      setAnchor(null);
+    } else {
+      window.scrollTo({ top: 0 });
+    }
+  }, [bookPage, page, anchor]);
+
+  const goToPage = (target: number, heading: string | null = null) => {
+    setAnchor(heading);
+    setPage(target);
+  };
 
   if (isLoading) {
     return (
@@ -41,13 +75,16 @@ export default function ReadBook() {
     );
   }
 
-  // Strip HTML tags for word count
-  const plainText = book.content?.replace(/<[^>]*>/g, ' ') || '';
-  const wordCount = plainText.split(/\s+/).filter(w => w.length > 0).length;
-  const readingTime = Math.ceil(wordCount / 200);
-
-  // Check if content is HTML
-  const isHtmlContent = book.content?.includes('<') && book.content?.includes('>');
+  // Reading time and format come from the backend, which also sanitizes the HTML. Books saved
+  // before the text pipeline existed have neither until derive_book_text has run; the reading
+  // time is estimated from the current page then, and the content endpoint still answers with
+  // the right Content-Type for them.
+  const readingTime = book.reading_minutes || estimateReadingTime(bookPage);
+  const isHtmlContent = book.content_format ? book.content_format === 'html' : !!bookPage?.isHtml;
+  const contents = book.table_of_contents ?? [];
+  const pageText = bookPage?.text ?? '';
+  const pageCount = bookPage?.pageCount ?? 0;
+  const isLastPage = page >= pageCount;
 
   return (
     <Layout hideFooter>
@@ -113,21 +150,49 @@ export default function ReadBook() {
               )}
             </div>
 
+            {/* Table of Contents */}
+            {isHtmlContent && contents.length > 1 && (
+              <nav className="mb-12 pb-12 border-b border-border">
+                <h2 className="font-display text-xl font-semibold text-foreground mb-4">Contents</h2>
+                <ol className="space-y-2">
+                  {contents.map((entry) => (
+                    <li key={entry.anchor} style={{ paddingLeft: `${(entry.level - 1) * 1.25}rem` }}>
+                      <a
+                        href={`#${entry.anchor}`}
+                        className="text-muted-foreground hover:text-primary"
+                        onClick={(event) => {
+                          event.preventDefault();
+                          goToPage(entry.page, entry.anchor);
+                        }}
+                      >
+                        {entry.title}
+                      </a>
+                    </li>
+                  ))}
+                </ol>
+              </nav>
+            )}
+
             {/* Book Text Content */}
             <div className="prose prose-lg max-w-none">
-              {book.content ? (
+              {isPageLoading ? (
+                <div className="animate-pulse text-center py-20">
+                  <BookOpen className="w-12 h-12 text-primary/50 mx-auto mb-4" />
+                  <p className="text-muted-foreground">Loading page...</p>
+                </div>
+              ) : pageText ? (
                 isHtmlContent ? (
                   <div 
                     className="book-content text-foreground leading-relaxed"
                     style={{ fontFamily: 'Georgia, serif', fontSize: '1.125rem', lineHeight: '1.8' }}
-                    dangerouslySetInnerHTML={{ __html: book.content }}
+                    dangerouslySetInnerHTML={{ __html: pageText }}
                   />
                 ) : (
                   <div 
                     className="text-foreground leading-relaxed space-y-6"
                     style={{ fontFamily: 'Georgia, serif', fontSize: '1.125rem', lineHeight: '1.8' }}
                   >
-                    {book.content.split('\n\n').map((paragraph, index) => (
+                    {pageText.split('\n\n').map((paragraph, index) => (
                       <p key={index} className="text-foreground/90">
                         {paragraph}
                       </p>
@@ -144,16 +209,35 @@ export default function ReadBook() {
               )}
             </div>
 
-            {/* End of Book */}
-            <div className="mt-16 pt-12 border-t border-border text-center">
-              <p className="text-muted-foreground mb-6">— The End —</p>
-              <Link to="/books">
-                <Button className="btn-primary gap-2">
-                  <BookOpen className="w-4 h-4" />
-                  Explore More Books
+            {/* Page Navigation */}
+            {pageCount > 1 && (
+              <nav className="mt-16 flex items-center justify-between">
+                <Button variant="ghost" className="gap-2" disabled={page <= 1} onClick={() => goToPage(page - 1)}>
+                  <ChevronLeft className="w-4 h-4" />
+                  Previous
                 </Button>
-              </Link>
-            </div>
+                <span className="text-sm text-muted-foreground">
+                  Page {page} of {pageCount}
+                </span>
+                <Button variant="ghost" className="gap-2" disabled={isLastPage} onClick={() => goToPage(page + 1)}>
+                  Next
+                  <ChevronRight className="w-4 h-4" />
+                </Button>
+              </nav>
+            )}
+
+            {/* End of Book */}
+            {isLastPage && (
+              <div className="mt-16 pt-12 border-t border-border text-center">
+                <p className="text-muted-foreground mb-6">— The End —</p>
+                <Link to="/books">
+                  <Button className="btn-primary gap-2">
+                    <BookOpen className="w-4 h-4" />
+                    Explore More Books
+                  </Button>
+                </Link>
+              </div>
+            )}
           </article>
         </main>
       </div>
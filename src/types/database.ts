@@ -4,12 +4,27 @@ export interface Book {
   author: string;
   description: string | null;
   content: string | null;
+  // Computed by the backend when the text is saved; '' until derive_book_text has run.
+  content_format: 'html' | 'text' | '';
+  word_count: number;
+  reading_minutes: number;
+  content_hash: string;
+  // Detail responses only.
+  table_of_contents?: TableOfContentsEntry[];
   cover_image: string | null;
   cover_image_url?: string | null;
   category_id: string | null;
   created_at: string;
   updated_at: string;
-  category?: Category;
+  // Embedded without the counters, which only the categories list carries.
+  category?: Omit<Category, 'book_count' | 'latest_book_at'>;
+}
+
+export interface TableOfContentsEntry {
+  title: string;
+  level: number;
+  anchor: string;
+  page: number;
 }
 
 export interface Category {
@@ -18,6 +33,8 @@ export interface Category {
   description: string | null;
   created_at: string;
   updated_at: string;
+  book_count: number;
+  latest_book_at: string | null;
 }
 
 export interface TeamMember {
@@ -39,3 +56,10 @@ export interface Partner {
   created_at: string;
   updated_at: string;
 }
+
+export interface BootstrapData {
+  categories: Category[];
+  books: Book[];
+  partners: Partner[];
+  team_members: TeamMember[];
+}